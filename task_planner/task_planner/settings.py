@@ -20,6 +20,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "tasks",
     "taggit",
     "simple_history",
@@ -109,5 +110,17 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Быстрые JSON-рендерер и парсер на orjson (включаются FAST_JSON=True)
+if os.getenv('FAST_JSON', 'False') == 'True':
+    REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+        "tasks.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ]
+    REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"] = [
+        "tasks.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ]
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
@@ -1,4 +1,4 @@
-from time import timezone
+from django.utils import timezone
 from django.contrib import admin
 from django.utils.html import format_html
 from simple_history.admin import SimpleHistoryAdmin
@@ -10,6 +10,7 @@ from .models import (
     Task,
     TaskLink,
     FileAttachment,
+    TaskRevision,
 )
 from django.utils.translation import gettext_lazy as _
 from django import forms
@@ -17,15 +18,51 @@ from django.contrib import messages
 from django.utils.html import escape
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
-from django.utils.text import Truncator
+from django.utils.text import Truncator, capfirst
 from django.utils.safestring import mark_safe
-from django.db.models import Count
+from tasks.history import record_history, revision_diffs
+from tasks.models.graph_revision import record_graph_change
+from tasks.search import search_tasks
 from django.contrib.admin import SimpleListFilter
-from django.db import models
+from django.contrib.admin.utils import unquote
+from django.contrib.admin.views.main import PAGE_VAR
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.template.response import TemplateResponse
+from django.contrib.admin.widgets import AutocompleteSelectMultiple
+from django.db import models, transaction
+from django.db.models import F, Q
 
 
 
 
+class TaskTypeaheadWidget(AutocompleteSelectMultiple):
+    """
+    Выбор задач с автодополнением через /api/tasks/typeahead/.
+
+    Как и стандартный виджет автодополнения, выводит в HTML только
+    выбранные задачи, остальные подгружаются по мере ввода.
+    """
+
+    def __init__(self, field, admin_site, exclude_id=None, **kwargs):
+        super().__init__(field, admin_site, **kwargs)
+        self.exclude_id = exclude_id
+
+    def get_url(self):
+        return reverse("task-typeahead")
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        # Инициализируется tasks/js/task_typeahead.js, а не admin/js/autocomplete.js
+        attrs["class"] = attrs["class"].replace("admin-autocomplete", "task-typeahead")
+        attrs["data-exclude"] = self.exclude_id or ""
+        return attrs
+
+    @property
+    def media(self):
+        return super().media + forms.Media(js=["tasks/js/task_typeahead.js"])
+
+
 @admin.register(TaskCategory)
 class TaskCategoryAdmin(admin.ModelAdmin):
     """Административный интерфейс для категорий задач"""
@@ -171,9 +208,9 @@ class DependencyFilter(admin.SimpleListFilter):
 
     def queryset(self, request, queryset):
         if self.value() == "has_dependencies":
-            return queryset.filter(dependencies__isnull=False).distinct()
+            return queryset.filter(dependencies_count__gt=0)
         if self.value() == "no_dependencies":
-            return queryset.filter(dependencies__isnull=True)
+            return queryset.filter(dependencies_count=0)
 
 
 
@@ -191,9 +228,9 @@ class DependencyFilter(SimpleListFilter):
 
     def queryset(self, request, queryset):
         if self.value() == 'with_deps':
-            return queryset.annotate(dep_count=Count('dependencies')).filter(dep_count__gt=0)
+            return queryset.filter(dependencies_count__gt=0)
         if self.value() == 'without_deps':
-            return queryset.annotate(dep_count=Count('dependencies')).filter(dep_count=0)
+            return queryset.filter(dependencies_count=0)
         return queryset
 
 
@@ -260,9 +297,9 @@ class DependencyFilter(SimpleListFilter):
 
     def queryset(self, request, queryset):
         if self.value() == 'with_deps':
-            return queryset.annotate(dep_count=Count('dependencies')).filter(dep_count__gt=0)
+            return queryset.filter(dependencies_count__gt=0)
         if self.value() == 'without_deps':
-            return queryset.annotate(dep_count=Count('dependencies')).filter(dep_count=0)
+            return queryset.filter(dependencies_count=0)
         return queryset
 
 
@@ -313,6 +350,35 @@ class FileAttachmentInline(admin.TabularInline):
     verbose_name_plural = _("Прикрепленные файлы")
 
 
+class RevisionEntry:
+    """
+    Ревизия журнала в виде записи стандартной страницы истории
+    админки (admin/object_history.html).
+
+    Attributes:
+        action_time (datetime): Время изменения
+        user (User): Автор изменения
+    """
+
+    ACTIONS = {"+": "Создание", "-": "Удаление"}
+
+    def __init__(self, revision, diff):
+        self.action_time = revision.history_date
+        self.user = revision.history_user
+        self.history_type = revision.history_type
+        self.diff = diff
+
+    def get_change_message(self):
+        """Изменённые поля: «Поле: старое → новое» через точку с запятой"""
+        if self.history_type in self.ACTIONS:
+            return self.ACTIONS[self.history_type]
+        return "; ".join(
+            f"{capfirst(Task._meta.get_field(name).verbose_name)}: "
+            f"{change['old']} → {change['new']}"
+            for name, change in self.diff.items()
+        ) or "Изменение"
+
+
 @admin.register(Task)
 class TaskAdmin(SimpleHistoryAdmin):
     """Административный интерфейс для управления задачами"""
@@ -336,10 +402,10 @@ class TaskAdmin(SimpleHistoryAdmin):
     readonly_fields = [
         "created_at", "updated_at", "deleted_at", "version",
         "outgoing_dependencies", "is_overdue", "progress_bar",
-        "is_deleted", "status_history"
+        "is_deleted", "is_ready", "status_history"
     ]
     date_hierarchy = "deadline"
-    filter_horizontal = ["dependencies", "categories", "notifications"]
+    filter_horizontal = ["categories", "notifications"]
     raw_id_fields = ["author", "last_editor", "assignee", "location"]
     inlines = [TaskLinkInline, FileAttachmentInline]
     actions = [
@@ -482,10 +548,10 @@ class TaskAdmin(SimpleHistoryAdmin):
             return "-"
         return obj.deadline.strftime("%d.%m.%Y %H:%M")
 
-    @admin.display(description=_("Зависимости"))
+    @admin.display(description=_("Зависимости"), ordering="dependencies_count")
     def dependencies_count(self, obj):
         """Количество зависимостей с ссылками"""
-        count = obj.dependencies.count()
+        count = obj.dependencies_count
         if not count:
             return "-"
         
@@ -497,8 +563,12 @@ class TaskAdmin(SimpleHistoryAdmin):
 
     @admin.display(description=_("История статусов"))
     def status_history(self, obj):
-        """История изменений статусов задачи"""
-        history = obj.history.order_by('-history_date').values_list('status', 'history_date')
+        """История изменений статусов задачи по журналу ревизий"""
+        changes = TaskRevision.objects.filter(
+            task_id=obj.pk, changes__has_key='status'
+        ).order_by('-revision').values_list('changes__status', 'history_date')
+        created = obj.history.filter(history_type='+').values_list('status', 'history_date')
+        history = [*changes[:5], *created]
         if not history:
             return "-"
             
@@ -533,21 +603,40 @@ class TaskAdmin(SimpleHistoryAdmin):
             "author", "last_editor", "assignee", "location"
         ).prefetch_related(
             "dependencies", "categories", "notifications", "tags", "dependent_tasks"
-        ).annotate(
-            dependencies_count=Count('dependencies')
         ).defer(
-            "description", "time_intervals", "reminders", "cancel_reason"
+            "description", "time_intervals", "reminders", "cancel_reason",
+            "search_vector"
         )
 
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Поиск через search_tasks (полнотекстовый и триграммный индексы)
+        вместо ILIKE по каждому полю из search_fields. Почта исполнителя,
+        теги и категории сравниваются точно, подзапросами без дублей.
+        """
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        extra = (
+            Q(assignee__email__iexact=search_term)
+            | Q(pk__in=Task.all_objects.filter(tags__name__iexact=search_term).values("pk"))
+            | Q(pk__in=Task.all_objects.filter(categories__name__iexact=search_term).values("pk"))
+        )
+        return search_tasks(queryset, search_term, extra=extra), False
+
     def formfield_for_manytomany(self, db_field, request, **kwargs):
         """Фильтрация зависимостей"""
         if db_field.name == "dependencies":
             # Исключаем удаленные задачи и текущую задачу
             exclude_id = request.resolver_match.kwargs.get('object_id')
-            qs = Task.objects.filter(is_deleted=False)
+            qs = Task.objects.all()
             if exclude_id:
                 qs = qs.exclude(id=exclude_id)
             kwargs["queryset"] = qs
+            # Задачи подгружаются по вводу, а не выводятся все в списке
+            kwargs["widget"] = TaskTypeaheadWidget(
+                db_field, self.admin_site, exclude_id=exclude_id
+            )
         return super().formfield_for_manytomany(db_field, request, **kwargs)
 
     def get_readonly_fields(self, request, obj=None):
@@ -564,6 +653,30 @@ class TaskAdmin(SimpleHistoryAdmin):
         return super().get_exclude(request, obj)
 
     # Действия администратора
+    def save_status_change(self, request, tasks, fields):
+        """
+        Сохраняет смену статуса задач одним bulk_update. Сигналы сохранения
+        не отправляются, поэтому история, счётчики зависящих задач и журнал
+        графа (ревизия для ETag списков) обновляются здесь явно.
+        """
+        now = timezone.now()
+        for task in tasks:
+            task.updated_at = now
+            task.version = F("version") + 1
+            task.last_editor = request.user
+        with transaction.atomic():
+            Task.all_objects.bulk_update(
+                tasks, [*fields, 'updated_at', 'version', 'last_editor']
+            )
+            record_history(tasks, history_user=request.user)
+            task_ids = [task.id for task in tasks]
+            dependent_ids = Task.dependencies.through.objects.filter(
+                to_task_id__in=task_ids
+            ).values_list('from_task_id', flat=True)
+            Task.all_objects.dependents_of(task_ids).recompute_dependency_counters()
+            Task.objects.dependents_of(task_ids).recompute_dependency_progress()
+            record_graph_change(set(task_ids) | set(dependent_ids))
+
     @admin.action(description=_("Пометить как выполненные"))
     def mark_as_done(self, request, queryset):
         """Помечает задачи как выполненные"""
@@ -573,8 +686,7 @@ class TaskAdmin(SimpleHistoryAdmin):
             task.progress = 100
             if not task.end_date:
                 task.end_date = timezone.now()
-        
-        Task.objects.bulk_update(tasks, ['status', 'progress', 'end_date'])
+        self.save_status_change(request, tasks, ['status', 'progress', 'end_date'])
         self.message_user(
             request, 
             f"Помечено как выполненные: {len(tasks)} задач", 
@@ -589,8 +701,7 @@ class TaskAdmin(SimpleHistoryAdmin):
             if not task.cancel_reason:
                 task.cancel_reason = _("Отменено администратором")
             task.status = "canceled"
-        
-        Task.objects.bulk_update(tasks, ['status', 'cancel_reason'])
+        self.save_status_change(request, tasks, ['status', 'cancel_reason'])
         self.message_user(
             request, 
             f"Помечено как отмененные: {len(tasks)} задач", 
@@ -655,6 +766,56 @@ class TaskAdmin(SimpleHistoryAdmin):
         actions.pop('delete_selected', None)
         return actions
 
+    def history_view(self, request, object_id, extra_context=None):
+        """
+        История изменений задачи по журналу ревизий TaskRevision.
+
+        Полные строки истории simple_history - только контрольные точки,
+        поэтому страница выводит ревизии журнала с изменёнными полями
+        (старое и новое значение) в стандартном шаблоне истории админки.
+        Удалённая задача берётся из последней контрольной точки.
+        """
+        object_id = unquote(object_id)
+        obj = self.get_object(request, object_id)
+        if obj is None:
+            checkpoint = self.model.history.filter(id=object_id).order_by(
+                '-history_revision'
+            ).first()
+            if checkpoint is None:
+                raise Http404
+            obj = checkpoint.instance
+
+        if not self.has_view_history_or_change_history_permission(request, obj):
+            raise PermissionDenied
+
+        revisions = TaskRevision.objects.filter(task_id=obj.pk).select_related(
+            'history_user'
+        ).order_by('-revision')
+        paginator = self.get_paginator(request, revisions, self.history_list_per_page)
+        page_obj = paginator.get_page(request.GET.get(PAGE_VAR, 1))
+        diffs = revision_diffs(Task, page_obj.object_list)
+        page_obj.object_list = [
+            RevisionEntry(revision, diffs[revision.revision])
+            for revision in page_obj.object_list
+        ]
+
+        context = {
+            **self.admin_site.each_context(request),
+            "title": self.history_view_title(request, obj),
+            "subtitle": None,
+            "action_list": page_obj,
+            "page_range": paginator.get_elided_page_range(page_obj.number),
+            "page_var": PAGE_VAR,
+            "pagination_required": paginator.count > self.history_list_per_page,
+            "module_name": capfirst(self.opts.verbose_name_plural),
+            "object": obj,
+            "opts": self.opts,
+            "preserved_filters": self.get_preserved_filters(request),
+            **(extra_context or {}),
+        }
+        request.current_app = self.admin_site.name
+        return TemplateResponse(request, "admin/object_history.html", context)
+
     class Media:
         """Кастомные стили для админки"""
         css = {
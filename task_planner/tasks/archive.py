@@ -0,0 +1,313 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core import serializers as django_serializers
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.utils import timezone
+
+from tasks.models import (
+    ArchivedTask,
+    FileAttachment,
+    Link,
+    Task,
+    TaskClosure,
+    TaskLink,
+    TaskRevision,
+)
+from tasks.models.graph_revision import record_graph_change
+from tasks.models.task import COMPLETED_STATUSES
+from tasks.serializers import TaskSerializer, TaskValuesSerializer
+
+# Возраст задачи (дней с последнего изменения), после которого она
+# переносится в архив. Переопределяется settings.TASKS_ARCHIVE_AFTER_DAYS
+ARCHIVE_AFTER_DAYS = 90
+
+# Количество задач, переносимых в архив одной транзакцией
+ARCHIVE_BATCH_SIZE = 500
+
+
+class ArchiveTaskSerializer(TaskSerializer):
+    """Представление задачи для архива: все поля, включая выводимые по ?expand="""
+
+    expandable_fields = ()
+
+
+def archive_cutoff(days=None):
+    """Задачи, изменённые раньше этого момента, подлежат архивации"""
+    if days is None:
+        days = getattr(settings, "TASKS_ARCHIVE_AFTER_DAYS", ARCHIVE_AFTER_DAYS)
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable_tasks(cutoff):
+    """
+    Задачи, которые можно перенести в архив: выполненные, отменённые
+    или удалённые, не менявшиеся с момента cutoff.
+
+    Задачи, от которых прямо или транзитивно зависит задача, остающаяся
+    в основной таблице, не переносятся: иначе у неё изменились бы
+    счётчики и прогресс. Поэтому вместе с задачей переносимы и все
+    зависящие от неё задачи.
+    """
+    finished = Task.all_objects.filter(
+        Q(status__in=COMPLETED_STATUSES) | Q(is_deleted=True),
+        updated_at__lt=cutoff,
+    )
+    staying_dependents = TaskClosure.objects.filter(
+        ancestor_id=OuterRef("pk")
+    ).exclude(descendant_id__in=finished.values("pk"))
+    return finished.filter(~Exists(staying_dependents))
+
+
+def task_snapshots(task_ids):
+    """
+    Снимки задач для возврата из архива.
+
+    Поля и связи ManyToMany берутся сериализатором Django ("python"),
+    без производных полей (Task.DERIVED_FIELDS) - они пересчитываются
+    при возврате. Теги, ссылки и вложения добавляются отдельно.
+
+    Returns:
+        dict: {id задачи: снимок}
+    """
+    tasks = Task.all_objects.filter(pk__in=task_ids).prefetch_related(
+        "dependencies", "categories", "notifications"
+    )
+    snapshots = {}
+    for data in django_serializers.serialize("python", tasks):
+        for name in Task.DERIVED_FIELDS:
+            data["fields"].pop(name, None)
+        snapshots[data["pk"]] = {
+            "task": data,
+            "tags": [],
+            "links": [],
+            "attachments": [],
+        }
+
+    tag_items = Task._meta.get_field("tags").through.objects.filter(
+        content_type=ContentType.objects.get_for_model(Task),
+        object_id__in=task_ids,
+    )
+    for task_id, name in tag_items.values_list("object_id", "tag__name"):
+        snapshots[task_id]["tags"].append(name)
+
+    for link in TaskLink.objects.filter(task_id__in=task_ids).values(
+        "task_id", "link_id", "description"
+    ):
+        snapshots[link.pop("task_id")]["links"].append(link)
+
+    for attachment in FileAttachment.objects.filter(task_id__in=task_ids).values(
+        "id", "task_id", "file", "uploaded_at", "description"
+    ):
+        snapshots[attachment.pop("task_id")]["attachments"].append(attachment)
+    return snapshots
+
+
+def next_archive_batch(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    id следующей пачки задач для архивации. Строки блокируются до конца
+    транзакции, чтобы к ним не добавились зависимости и изменения.
+
+    Пачка состоит из связных групп: задача переносится вместе со всеми
+    (транзитивно) зависящими от неё задачами, поэтому ни одна задача
+    пачки не ждёт зависящих. Группы набираются по возрастанию id, пока
+    пачка не достигнет batch_size; пачка из одной большой группы может
+    быть больше batch_size.
+    """
+    seeds = list(
+        archivable_tasks(cutoff)
+        .select_for_update()
+        .order_by("pk")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+    dependents = defaultdict(set)
+    for ancestor_id, descendant_id in TaskClosure.objects.filter(
+        ancestor_id__in=seeds
+    ).values_list("ancestor_id", "descendant_id"):
+        dependents[ancestor_id].add(descendant_id)
+
+    task_ids = set()
+    for task_id in seeds:
+        if len(task_ids) >= batch_size:
+            break
+        task_ids |= {task_id} | dependents[task_id]
+
+    # Зависящие задачи вне первых batch_size тоже блокируются
+    list(
+        Task.all_objects.select_for_update()
+        .filter(pk__in=task_ids)
+        .values_list("pk", flat=True)
+    )
+    return sorted(task_ids)
+
+
+@transaction.atomic
+def archive_batch(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Переносит в архив одну пачку задач.
+
+    Строки связей и самих задач удаляются пакетными запросами без
+    сигналов удаления: задача не удаляется, а переезжает, поэтому
+    запись удаления в истории (simple_history) не создаётся, а история
+    изменений остаётся доступной по id задачи.
+
+    Returns:
+        list: id перенесённых задач
+    """
+    task_ids = next_archive_batch(cutoff, batch_size)
+    if not task_ids:
+        return []
+
+    snapshots = task_snapshots(task_ids)
+    values_serializer = TaskValuesSerializer(ArchiveTaskSerializer())
+    rows = values_serializer.get_values_queryset(
+        Task.all_objects.filter(pk__in=task_ids).order_by("pk")
+    )
+    representations = {item["id"]: item for item in values_serializer.serialize(list(rows))}
+
+    ArchivedTask.objects.bulk_create([
+        ArchivedTask(
+            id=task_id,
+            title=snapshots[task_id]["task"]["fields"]["title"],
+            status=snapshots[task_id]["task"]["fields"]["status"],
+            is_deleted=snapshots[task_id]["task"]["fields"]["is_deleted"],
+            updated_at=snapshots[task_id]["task"]["fields"]["updated_at"],
+            snapshot=snapshots[task_id],
+            representation=representations[task_id],
+        )
+        for task_id in task_ids
+    ])
+
+    dependencies = Task.dependencies.through.objects.filter(from_task_id__in=task_ids)
+    dependency_ids = list(dependencies.values_list("to_task_id", flat=True).distinct())
+    related_rows = [
+        dependencies,
+        Task.categories.through.objects.filter(task_id__in=task_ids),
+        Task.notifications.through.objects.filter(task_id__in=task_ids),
+        Task._meta.get_field("tags").through.objects.filter(
+            content_type=ContentType.objects.get_for_model(Task),
+            object_id__in=task_ids,
+        ),
+        TaskLink.objects.filter(task_id__in=task_ids),
+        FileAttachment.objects.filter(task_id__in=task_ids),
+        TaskClosure.objects.filter(
+            Q(ancestor_id__in=task_ids) | Q(descendant_id__in=task_ids)
+        ),
+        Task.all_objects.filter(pk__in=task_ids),
+    ]
+    for queryset in related_rows:
+        queryset._raw_delete(queryset.db)
+
+    # У зависимостей меняется список outgoing_dependencies
+    Task.all_objects.filter(pk__in=dependency_ids).bump_version()
+    record_graph_change(task_ids)
+    return task_ids
+
+
+def archive_tasks(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Переносит в архив все подходящие задачи пачками по batch_size,
+    каждая пачка - в своей транзакции.
+
+    Yields:
+        list: id задач каждой перенесённой пачки
+    """
+    while True:
+        task_ids = archive_batch(cutoff, batch_size)
+        if not task_ids:
+            return
+        yield task_ids
+
+
+def archived_representation(archived, serializer):
+    """
+    Представление архивной задачи с полями сериализатора
+    (с учётом ?fields= и ?expand= запроса).
+
+    Args:
+        archived (ArchivedTask): Архивная задача
+        serializer (TaskSerializer): Сериализатор текущего запроса
+    """
+    data = {
+        name: value
+        for name, value in archived.representation.items()
+        if name in serializer.fields
+    }
+    request = serializer.context.get("request")
+    if request is not None:
+        # В архиве хранятся относительные адреса файлов
+        for attachment in data.get("attachments", ()):
+            if attachment.get("file"):
+                attachment["file"] = request.build_absolute_uri(attachment["file"])
+    return data
+
+
+@transaction.atomic
+def restore_archived_task(archived):
+    """
+    Возвращает задачу из архива в основную таблицу с прежним id.
+
+    Связи с объектами, которых больше нет, пропускаются; счётчики
+    зависимостей, замыкание графа и поисковый вектор восстанавливаются
+    обработчиками сигналов сохранения и изменения связей, прогресс
+    зависимостей и готовность пересчитываются по восстановленным счётчикам.
+
+    Raises:
+        ValidationError: Название занято другой задачей или автор удалён
+
+    Returns:
+        Task: Восстановленная задача
+    """
+    snapshot = archived.snapshot
+    data = snapshot["task"]
+    fields = data["fields"]
+
+    if Task.all_objects.filter(title=fields["title"]).exists():
+        raise ValidationError("Задача с таким названием уже существует")
+
+    for field in Task._meta.many_to_many:
+        if field.name in fields:
+            fields[field.name] = list(
+                field.related_model._base_manager.filter(pk__in=fields[field.name])
+                .values_list("pk", flat=True)
+            )
+    for field in Task._meta.concrete_fields:
+        if not field.is_relation or fields.get(field.name) is None:
+            continue
+        if not field.related_model._base_manager.filter(pk=fields[field.name]).exists():
+            if not field.null:
+                raise ValidationError(f"Не найден объект поля «{field.verbose_name}»")
+            fields[field.name] = None
+
+    deserialized = next(django_serializers.deserialize("python", [data]))
+    deserialized.save()
+    task = deserialized.object
+
+    if snapshot["tags"]:
+        task.tags.set(snapshot["tags"])
+
+    link_ids = set(
+        Link.objects.filter(
+            pk__in=[link["link_id"] for link in snapshot["links"]]
+        ).values_list("pk", flat=True)
+    )
+    TaskLink.objects.bulk_create([
+        TaskLink(task=task, **link)
+        for link in snapshot["links"]
+        if link["link_id"] in link_ids
+    ])
+    FileAttachment.objects.bulk_create([
+        FileAttachment(task=task, **attachment)
+        for attachment in snapshot["attachments"]
+    ])
+
+    archived.delete()
+    Task.all_objects.filter(pk=task.pk).recompute_dependency_progress()
+    # Ревизии журнала переживают архивацию: нумерация продолжается после них
+    latest = TaskRevision.objects.filter(task_id=task.pk).aggregate(latest=Max("revision"))
+    Task.all_objects.filter(pk=task.pk).touch(last_revision=latest["latest"] or 0)
+    return task
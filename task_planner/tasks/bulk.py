@@ -0,0 +1,158 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from django.utils import timezone
+
+from tasks.history import record_history
+from tasks.models import Task
+from tasks.models.graph_revision import record_graph_change
+from tasks.models.task import mark_dependency_progress_dirty
+
+# Максимальное количество задач в одном пакетном запросе
+BULK_MAX_ITEMS = 5000
+
+# Количество строк в одной пакетной вставке/обновлении
+BULK_BATCH_SIZE = 1000
+
+
+class RelationChanges:
+    """
+    Изменения связи многие-ко-многим для набора задач.
+
+    Строится одним запросом к промежуточной таблице и применяется
+    одним удалением и пакетной вставкой, без сигналов m2m_changed.
+
+    Args:
+        name (str): Имя поля ManyToMany модели Task
+        wanted (dict): {id задачи: id связанных объектов после изменения}
+
+    Attributes:
+        changed_ids (set): id задач, у которых изменилась связь
+        related_ids (set): id связанных объектов добавленных/удалённых строк
+    """
+
+    def __init__(self, name, wanted):
+        field = Task._meta.get_field(name)
+        self.through = field.remote_field.through
+        self.source = f"{field.m2m_field_name()}_id"
+        self.target = f"{field.m2m_reverse_field_name()}_id"
+
+        wanted = {task_id: set(ids) for task_id, ids in wanted.items()}
+        existing = defaultdict(set)
+        self.removed_pks = []
+        self.changed_ids = set()
+        self.related_ids = set()
+        for pk, task_id, related_id in self.through.objects.filter(
+            **{f"{self.source}__in": wanted}
+        ).values_list("pk", self.source, self.target):
+            existing[task_id].add(related_id)
+            if related_id not in wanted[task_id]:
+                self.removed_pks.append(pk)
+                self.changed_ids.add(task_id)
+                self.related_ids.add(related_id)
+
+        self.added = [
+            (task_id, related_id)
+            for task_id, ids in wanted.items()
+            for related_id in ids - existing[task_id]
+        ]
+        self.changed_ids.update(task_id for task_id, _ in self.added)
+        self.related_ids.update(related_id for _, related_id in self.added)
+
+    def apply(self):
+        if self.removed_pks:
+            self.through.objects.filter(pk__in=self.removed_pks).delete()
+        self.through.objects.bulk_create(
+            (
+                self.through(**{self.source: task_id, self.target: related_id})
+                for task_id, related_id in self.added
+            ),
+            batch_size=BULK_BATCH_SIZE,
+        )
+        return self.changed_ids
+
+
+def set_tags(wanted):
+    """
+    Замена тегов набора задач несколькими общими запросами.
+
+    Новые теги создаются по одному на название (через save, чтобы
+    taggit сформировал slug), привязки - пакетной вставкой.
+
+    Args:
+        wanted (dict): {id задачи: список названий тегов}
+
+    Returns:
+        set: id задач, у которых изменились теги
+    """
+    through = Task._meta.get_field("tags").through
+    tag_model = through.tag_model()
+    content_type = ContentType.objects.get_for_model(Task)
+
+    wanted = {task_id: set(names) for task_id, names in wanted.items()}
+    names = set().union(*wanted.values())
+    tags = {tag.name: tag for tag in tag_model.objects.filter(name__in=names)}
+    for name in names - set(tags):
+        tags[name] = tag_model.objects.create(name=name)
+
+    existing = defaultdict(set)
+    removed_pks = []
+    changed_ids = set()
+    for pk, task_id, name in through.objects.filter(
+        content_type=content_type, object_id__in=wanted
+    ).values_list("pk", "object_id", "tag__name"):
+        existing[task_id].add(name)
+        if name not in wanted[task_id]:
+            removed_pks.append(pk)
+            changed_ids.add(task_id)
+
+    added = [
+        through(tag=tags[name], content_type=content_type, object_id=task_id)
+        for task_id, task_names in wanted.items()
+        for name in task_names - existing[task_id]
+    ]
+    changed_ids.update(item.object_id for item in added)
+
+    if removed_pks:
+        through.objects.filter(pk__in=removed_pks).delete()
+    through.objects.bulk_create(added, batch_size=BULK_BATCH_SIZE)
+    return changed_ids
+
+
+def bulk_soft_delete(task_ids, user=None):
+    """
+    Мягкое удаление набора задач (как Task.delete) пакетными запросами.
+
+    Returns:
+        list: id удалённых задач (уже удалённые пропускаются)
+    """
+    tasks = list(Task.objects.filter(pk__in=task_ids))
+    if not tasks:
+        return []
+
+    now = timezone.now()
+    for task in tasks:
+        task.is_deleted = True
+        task.deleted_at = now
+        task.status = "canceled"
+        task.updated_at = now
+        task.version = F("version") + 1
+        if user is not None:
+            task.last_editor = user
+    Task.all_objects.bulk_update(
+        tasks,
+        ["is_deleted", "deleted_at", "status", "updated_at", "version", "last_editor"],
+        batch_size=BULK_BATCH_SIZE,
+    )
+    record_history(tasks, history_user=user)
+
+    deleted_ids = [task.pk for task in tasks]
+    dependent_ids = Task.dependencies.through.objects.filter(
+        to_task_id__in=deleted_ids
+    ).values_list("from_task_id", flat=True)
+    # Удалённые задачи становятся отменёнными - пересчитываем счётчики зависящих
+    Task.all_objects.dependents_of(deleted_ids).recompute_dependency_counters()
+    mark_dependency_progress_dirty(dependents_of=deleted_ids)
+    record_graph_change(set(deleted_ids) | set(dependent_ids))
+    return deleted_ids
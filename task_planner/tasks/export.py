@@ -0,0 +1,55 @@
+import json
+from itertools import islice
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from tasks.archive import archived_representation
+from tasks.models import ArchivedTask, Task
+from tasks.serializers import TaskValuesSerializer
+
+# Количество строк, читаемых из серверного курсора за один раз
+EXPORT_CHUNK_SIZE = 2000
+
+
+def iter_tasks_ndjson(serializer, queryset=None, archived=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Выгрузка задач в формате NDJSON (одна задача - одна строка JSON).
+
+    Строки читаются через iterator(chunk_size) - на PostgreSQL это
+    серверный курсор, - а связи (зависимости, категории, теги и др.)
+    догружаются общими запросами на каждую пачку. Память не зависит
+    от размера таблицы.
+
+    После задач основной таблицы выгружаются архивные задачи -
+    их сохранённое представление API (см. archived_representation).
+
+    Args:
+        serializer (TaskSerializer): Задаёт набор и формат полей
+        queryset (QuerySet): Выгружаемые задачи (по умолчанию все, включая удалённые)
+        archived (QuerySet): Выгружаемые архивные задачи (по умолчанию
+            все, если не передан queryset, иначе никакие)
+        chunk_size (int): Размер пачки
+
+    Yields:
+        str: Строка NDJSON с завершающим переводом строки
+    """
+    if queryset is None:
+        queryset = Task.all_objects.all()
+        if archived is None:
+            archived = ArchivedTask.objects.all()
+    values_serializer = TaskValuesSerializer(serializer)
+    rows = values_serializer.get_values_queryset(queryset.order_by("pk")).iterator(
+        chunk_size=chunk_size
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        for item in values_serializer.serialize(chunk):
+            yield json.dumps(item, cls=JSONEncoder, ensure_ascii=False) + "\n"
+
+    if archived is None:
+        return
+    for task in archived.order_by("pk").only("representation").iterator(chunk_size=chunk_size):
+        item = archived_representation(task, serializer)
+        yield json.dumps(item, cls=JSONEncoder, ensure_ascii=False) + "\n"
@@ -0,0 +1,72 @@
+from tasks.models import TaskClosure
+
+
+def check_cyclic_dependency(task, dependency):
+    """
+    Проверяет, создаст ли зависимость task -> dependency цикл.
+
+    Цикл возникает, если dependency уже (транзитивно) зависит от task -
+    это одна индексная выборка по таблице замыкания TaskClosure, которая
+    заменяет обход графа рекурсивным CTE по таблице зависимостей:
+    стоимость проверки не зависит от глубины и ширины графа.
+    """
+    if task.id == dependency.id:
+        return True
+    return TaskClosure.objects.is_reachable(task.id, dependency.id)
+
+
+def find_cycle_edge(new_edges):
+    """
+    Проверка пакета новых рёбер зависимостей на циклы одним запросом.
+
+    Любой цикл проходит хотя бы через одно новое ребро, а участки между
+    новыми рёбрами - существующие пути, которые берутся из таблицы
+    замыкания для концов новых рёбер. Рёбра, удаляемые в том же пакете,
+    ещё учитываются - проверка строже необходимой, но не пропускает циклы.
+
+    Args:
+        new_edges: Пары (id задачи, id зависимости)
+
+    Returns:
+        tuple: Новое ребро, замыкающее цикл, или None
+    """
+    new_edges = set(new_edges)
+    for task_id, dependency_id in new_edges:
+        if task_id == dependency_id:
+            return task_id, dependency_id
+
+    nodes = {node for edge in new_edges for node in edge}
+    graph = {node: set() for node in nodes}
+    for task_id, dependency_id in new_edges:
+        graph[task_id].add(dependency_id)
+    for ancestor_id, descendant_id in TaskClosure.objects.filter(
+        ancestor_id__in=nodes, descendant_id__in=nodes
+    ).values_list("ancestor_id", "descendant_id"):
+        graph[descendant_id].add(ancestor_id)
+
+    # Обход в глубину: ребро в вершину из текущего пути замыкает цикл
+    finished = set()
+    for root in sorted(graph):
+        if root in finished:
+            continue
+        path = [root]
+        on_path = {root}
+        stack = [iter(sorted(graph[root]))]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                finished.add(path[-1])
+                on_path.discard(path.pop())
+                continue
+            if node in on_path:
+                cycle = path[path.index(node):] + [node]
+                for edge in zip(cycle, cycle[1:]):
+                    if edge in new_edges:
+                        return edge
+                return path[-1], node
+            if node not in finished:
+                path.append(node)
+                on_path.add(node)
+                stack.append(iter(sorted(graph[node])))
+    return None
@@ -0,0 +1,412 @@
+import copy
+import datetime
+import functools
+import json
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import F, Max, OuterRef, Subquery
+from django.utils import timezone
+from simple_history.models import HistoricalRecords
+
+from tasks.models.task_revision import TaskRevision
+from tasks.transactions import OnCommitQueue
+
+# Полная строка истории (контрольная точка) пишется раз в столько ревизий
+# задачи. Восстановление состояния читает не больше стольких ревизий журнала.
+# Переопределяется settings.TASKS_HISTORY_CHECKPOINT_INTERVAL
+CHECKPOINT_INTERVAL = 20
+
+# Количество ревизий, удаляемых одной транзакцией при очистке по сроку хранения
+PRUNE_BATCH_SIZE = 5000
+
+
+class HistoryQueue(OnCommitQueue):
+    """
+    Изменения задач в рамках транзакции.
+
+    На каждую задачу хранится один снимок - состояние после последнего
+    сохранения. При фиксации транзакции задача получает не больше одной
+    ревизии в журнале TaskRevision (см. write_revisions).
+
+    Attributes:
+        snapshots (dict): {(модель, pk): (снимок объекта, тип записи)}
+    """
+
+    connection_attribute = "_history_queue"
+
+    def __init__(self):
+        self.snapshots = {}
+
+    def add(self, instances, history_type, history_user=None):
+        for instance in instances:
+            key = (type(instance), instance.pk)
+            previous = self.snapshots.get(key)
+            # Объект, созданный в этой же транзакции, остаётся созданным
+            created = previous is not None and previous[1] == "+" and history_type == "~"
+
+            # Отложенные поля загружаются сейчас, как при записи истории в post_save
+            for name in tracked_fields(type(instance)):
+                getattr(instance, name)
+            snapshot = copy.copy(instance)
+            snapshot._history_date = getattr(instance, "_history_date", timezone.now())
+            snapshot._history_user = history_user
+            snapshot._history_values = loaded_values(instance)
+            # Ревизия сравнивается с состоянием до первого сохранения в транзакции
+            snapshot._history_loaded = (
+                previous[0]._history_loaded if previous is not None
+                else getattr(instance, "_loaded_history_values", None)
+            )
+            snapshot._history_instance = instance
+            self.snapshots[key] = (snapshot, "+" if created else history_type)
+
+    def flush(self):
+        snapshots, self.snapshots = self.snapshots, {}
+        entries = defaultdict(list)
+        for (model, _), entry in snapshots.items():
+            entries[model].append(entry)
+
+        with transaction.atomic():
+            for model, model_entries in entries.items():
+                write_revisions(model, model_entries)
+
+        # Следующее сохранение объекта сравнивается с записанным состоянием
+        for snapshot, _ in snapshots.values():
+            snapshot._history_instance._loaded_history_values = snapshot._history_values
+
+
+def history_manager(model):
+    """Менеджер истории модели (HistoryManager)"""
+    return getattr(model, model._meta.simple_history_manager_attribute)
+
+
+@functools.cache
+def tracked_fields(model):
+    """Поля модели, отслеживаемые историей: {attname: поле}"""
+    return {
+        field.attname: field
+        for field in history_manager(model).model.tracked_fields
+    }
+
+
+def loaded_values(instance):
+    """
+    Значения отслеживаемых историей полей объекта {attname: значение}.
+    Значения JSON-полей копируются, чтобы изменение списка или словаря
+    на месте не меняло сохранённое значение.
+
+    Returns:
+        dict: Значения полей; None, если часть полей не загружена (отложена)
+    """
+    values = {}
+    for name, field in tracked_fields(type(instance)).items():
+        if name not in instance.__dict__:
+            return None
+        value = instance.__dict__[name]
+        values[name] = copy.deepcopy(value) if isinstance(field, models.JSONField) else value
+    return values
+
+
+def checkpoint_interval():
+    """Интервал контрольных точек в ревизиях"""
+    return getattr(settings, "TASKS_HISTORY_CHECKPOINT_INTERVAL", CHECKPOINT_INTERVAL)
+
+
+def json_value(field, value):
+    """
+    Значение поля в виде, в котором оно хранится в журнале (JSON).
+    Десятичные числа приводятся к точности поля, время - к UTC, чтобы
+    одинаковые значения из формы и из БД не считались изменением.
+    """
+    if value is None:
+        return None
+    if isinstance(field, models.DecimalField):
+        value = Decimal(value).quantize(Decimal(1).scaleb(-field.decimal_places))
+    elif isinstance(value, datetime.datetime) and timezone.is_aware(value):
+        value = value.astimezone(datetime.timezone.utc)
+    return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+
+
+def field_state(fields, values):
+    """Состояние задачи для журнала из словаря значений {attname: значение}"""
+    return {name: json_value(field, values[name]) for name, field in fields.items()}
+
+
+def latest_checkpoint(model, task_ref, before=None):
+    """
+    Подзапрос: номер ревизии последней контрольной точки задачи task_ref
+    (OuterRef или id), при before - предшествующей ревизии before.
+    """
+    pk_name = model._meta.pk.attname
+    checkpoints = history_manager(model).model.objects.filter(
+        **{pk_name: task_ref}, history_revision__isnull=False
+    )
+    if before is not None:
+        checkpoints = checkpoints.filter(history_revision__lt=before)
+    return checkpoints.order_by("-history_revision").values("history_revision")[:1]
+
+
+def logged_states(model, pks):
+    """
+    Последние записанные в журнал состояния задач: контрольная точка
+    и ревизии после неё (не больше интервала контрольных точек на задачу).
+    Два запроса на все задачи.
+
+    Returns:
+        dict: {pk: состояние}; задачи без контрольной точки не включаются
+    """
+    if not pks:
+        return {}
+    pk_name = model._meta.pk.attname
+    fields = tracked_fields(model)
+    checkpoints = history_manager(model).model.objects.filter(
+        **{f"{pk_name}__in": pks},
+        history_revision=Subquery(latest_checkpoint(model, OuterRef(pk_name))),
+    ).values(*fields)
+    states = {row[pk_name]: field_state(fields, row) for row in checkpoints}
+
+    revisions = TaskRevision.objects.filter(
+        task_id__in=states,
+        revision__gt=Subquery(latest_checkpoint(model, OuterRef("task_id"))),
+    ).order_by("task_id", "revision").values_list("task_id", "changes")
+    for task_id, changes in revisions:
+        states[task_id].update(changes)
+    return states
+
+
+def next_revisions(model, pks):
+    """
+    Номера следующих ревизий задач.
+
+    Счётчик last_revision строк задач увеличивается одним UPDATE,
+    который блокирует строки до конца транзакции - параллельная запись
+    ревизии той же задачи ждёт и получает следующий номер. Для удалённых
+    задач (строки уже нет) номер берётся по последней ревизии журнала.
+
+    Returns:
+        dict: {pk: номер ревизии}
+    """
+    if not pks:
+        return {}
+    rows = model._base_manager.filter(pk__in=pks)
+    rows.update(last_revision=F("last_revision") + 1)
+    numbers = dict(rows.order_by().values_list("pk", "last_revision"))
+    missing = set(pks) - numbers.keys()
+    if missing:
+        latest = dict(
+            TaskRevision.objects.filter(task_id__in=missing)
+            .order_by()
+            .values("task_id")
+            .annotate(latest=Max("revision"))
+            .values_list("task_id", "latest")
+        )
+        numbers.update({pk: latest.get(pk, 0) + 1 for pk in missing})
+    return numbers
+
+
+def write_revisions(model, entries):
+    """
+    Записывает по одной ревизии на задачу.
+
+    Ревизия изменения хранит только поля, отличающиеся от состояния,
+    загруженного из БД до сохранения (для объектов, загруженных не
+    полностью или созданных без загрузки, - от записанного в журнал
+    состояния); изменение одних полей с auto_now (время изменения)
+    ревизии не создаёт. При создании и удалении задачи, раз в интервал
+    контрольных точек и при отсутствии в журнале записанного состояния
+    дополнительно пишется полная строка истории (контрольная точка)
+    с номером ревизии в history_revision.
+
+    Args:
+        entries (list): (снимок задачи, тип записи) для разных задач
+    """
+    historical = history_manager(model).model
+    fields = tracked_fields(model)
+    ignored = {name for name, field in fields.items() if getattr(field, "auto_now", False)}
+    interval = checkpoint_interval()
+    states = logged_states(model, [
+        snapshot.pk for snapshot, history_type in entries
+        if history_type == "~" and snapshot._history_loaded is None
+    ])
+
+    pending = []
+    for snapshot, history_type in entries:
+        changes = {}
+        checkpoint = history_type in ("+", "-")
+        if history_type == "~":
+            values = field_state(fields, snapshot._history_values)
+            if snapshot._history_loaded is not None:
+                state = field_state(fields, snapshot._history_loaded)
+            else:
+                state = states.get(snapshot.pk)
+            if state is None:
+                changes = values
+                checkpoint = True
+            else:
+                changes = {name: value for name, value in values.items() if state.get(name) != value}
+                if not changes.keys() - ignored:
+                    continue
+        pending.append((snapshot, history_type, changes, checkpoint))
+
+    numbers = next_revisions(model, [snapshot.pk for snapshot, *_ in pending])
+    revisions = []
+    checkpoints = []
+    for snapshot, history_type, changes, checkpoint in pending:
+        revision = numbers[snapshot.pk]
+        revisions.append(TaskRevision(
+            task_id=snapshot.pk,
+            revision=revision,
+            history_type=history_type,
+            history_date=snapshot._history_date,
+            history_user_id=getattr(snapshot._history_user, "pk", None),
+            changes=changes,
+        ))
+        if checkpoint or revision % interval == 0:
+            checkpoints.append(historical(
+                **snapshot._history_values,
+                history_type=history_type,
+                history_revision=revision,
+                history_date=snapshot._history_date,
+                history_user_id=getattr(snapshot._history_user, "pk", None),
+            ))
+
+    TaskRevision.objects.bulk_create(revisions)
+    historical.objects.bulk_create(checkpoints)
+
+
+def state_before(model, task_id, revision):
+    """
+    Состояние задачи перед ревизией revision: ближайшая предыдущая
+    контрольная точка и ревизии после неё (меньше интервала контрольных
+    точек). Пустой словарь, если контрольной точки нет.
+    """
+    pk_name = model._meta.pk.attname
+    fields = tracked_fields(model)
+    checkpoint = history_manager(model).model.objects.filter(
+        **{pk_name: task_id},
+        history_revision=Subquery(latest_checkpoint(model, task_id, before=revision)),
+    ).values("history_revision", *fields).first()
+    if checkpoint is None:
+        return {}
+
+    state = field_state(fields, checkpoint)
+    for changes in TaskRevision.objects.filter(
+        task_id=task_id,
+        revision__gt=checkpoint["history_revision"],
+        revision__lt=revision,
+    ).order_by("revision").values_list("changes", flat=True):
+        state.update(changes)
+    return state
+
+
+def revision_diffs(model, revisions):
+    """
+    Изменения полей по ревизиям одной задачи.
+
+    Читаются одна контрольная точка перед первой из revisions, ревизии
+    между ними и контрольные точки созданий - стоимость не зависит от
+    длины истории задачи. id и поля с auto_now не выводятся.
+
+    Args:
+        revisions (list): Ревизии TaskRevision одной задачи в любом порядке
+
+    Returns:
+        dict: {ревизия: {имя поля: {"old": значение, "new": значение}}}
+    """
+    if not revisions:
+        return {}
+    revisions = sorted(revisions, key=lambda revision: revision.revision)
+    task_id = revisions[0].task_id
+    pk_name = model._meta.pk.attname
+    fields = tracked_fields(model)
+    created = {
+        row["history_revision"]: field_state(fields, row)
+        for row in history_manager(model).model.objects.filter(
+            **{pk_name: task_id},
+            history_revision__in=[
+                revision.revision for revision in revisions if revision.history_type == "+"
+            ],
+        ).values("history_revision", *fields)
+    }
+
+    state = state_before(model, task_id, revisions[0].revision)
+    diffs = {}
+    for revision in revisions:
+        if revision.history_type == "+":
+            changes = created.get(revision.revision, {})
+        else:
+            changes = revision.changes
+        diffs[revision.revision] = {
+            fields[name].name: {"old": state.get(name), "new": value}
+            for name, value in changes.items()
+            if name in fields
+            and name != pk_name
+            and not getattr(fields[name], "auto_now", False)
+            and state.get(name) != value
+        }
+        state = {**state, **changes}
+    return diffs
+
+
+def prune_task_revisions(before, batch_size=PRUNE_BATCH_SIZE, using=None):
+    """
+    Удаляет ревизии журнала, записанные раньше before, пачками по
+    batch_size - каждая пачка в своей транзакции, чтобы не держать
+    долгих блокировок.
+
+    Для ревизий после before, чья контрольная точка удалена вместе со
+    старой секцией истории, прежние значения полей неизвестны (None)
+    до следующей контрольной точки задачи (не больше интервала
+    контрольных точек ревизий).
+
+    Returns:
+        int: Количество удалённых ревизий
+    """
+    revisions = TaskRevision.objects.using(using).filter(history_date__lt=before)
+    total = 0
+    while True:
+        with transaction.atomic(using=using):
+            ids = list(revisions.order_by().values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return total
+            TaskRevision.objects.using(using).filter(pk__in=ids).delete()
+        total += len(ids)
+
+
+def record_history(instances, history_type="~", history_user=None, using=None):
+    """
+    Добавляет записи истории объектов в очередь текущей транзакции.
+    Используется пакетными операциями вместо bulk_update_with_history.
+    """
+    HistoryQueue.enqueue(list(instances), history_type, history_user, using=using)
+
+
+class CoalescedHistoricalRecords(HistoricalRecords):
+    """
+    HistoricalRecords, записывающий историю сохранений и удалений при
+    фиксации транзакции через HistoryQueue, а не отдельным INSERT
+    полной строки на каждый save().
+    """
+
+    def post_save(self, instance, created, using=None, **kwargs):
+        if not getattr(settings, "SIMPLE_HISTORY_ENABLED", True):
+            return
+        if hasattr(instance, "skip_history_when_saving") or kwargs.get("raw", False):
+            return
+        record_history(
+            [instance],
+            "+" if created else "~",
+            self.get_history_user(instance),
+            using=using,
+        )
+
+    def post_delete(self, instance, using=None, **kwargs):
+        if self.cascade_delete_history:
+            super().post_delete(instance, using=using, **kwargs)
+            return
+        if not getattr(settings, "SIMPLE_HISTORY_ENABLED", True):
+            return
+        record_history([instance], "-", self.get_history_user(instance), using=using)
@@ -0,0 +1,135 @@
+import re
+from datetime import date
+
+from django.db import connections, transaction
+
+# Таблица истории задач (simple_history), секционированная по месяцам
+# history_date на PostgreSQL (миграция 0012_partition_task_history)
+HISTORY_TABLE = "tasks_historicaltask"
+
+# Секция для строк вне созданных месячных секций
+DEFAULT_PARTITION = f"{HISTORY_TABLE}_default"
+
+# Сколько месяцев истории хранить, переопределяется
+# settings.TASKS_HISTORY_RETENTION_MONTHS
+HISTORY_RETENTION_MONTHS = 24
+
+# На сколько месяцев вперёд создаются пустые секции
+HISTORY_MONTHS_AHEAD = 3
+
+PARTITION_NAME_RE = re.compile(rf"^{HISTORY_TABLE}_p(\d{{4}})_(\d{{2}})$")
+
+
+def supports_partitioning(using):
+    """Поддерживается ли секционирование таблицы истории"""
+    return connections[using].vendor == "postgresql"
+
+
+def month_start(value):
+    """Первый день месяца даты value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    """Первый день месяца через count месяцев от month"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    """Имя секции истории за месяц month"""
+    return f"{HISTORY_TABLE}_p{month:%Y_%m}"
+
+
+def partition_bounds(month):
+    """Границы секции за месяц: [начало месяца, начало следующего) в UTC"""
+    return f"{month:%Y-%m-%d} 00:00:00+00", f"{add_months(month, 1):%Y-%m-%d} 00:00:00+00"
+
+
+def partition_sql(month):
+    """
+    Запросы создания секции истории за месяц month: [(sql, параметры)].
+
+    Строки месяца, уже попавшие в секцию DEFAULT, переносятся в новую
+    таблицу до её присоединения - PostgreSQL не создаёт секцию, в диапазон
+    которой попадают строки DEFAULT. Запросы выполняются в одной транзакции.
+    """
+    name = partition_name(month)
+    start, end = partition_bounds(month)
+    return [
+        (f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE", []),
+        (
+            f"CREATE TABLE {name} "
+            f"(LIKE {HISTORY_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+            [],
+        ),
+        (
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE history_date >= %s AND history_date < %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            [start, end],
+        ),
+        (
+            f"ALTER TABLE {HISTORY_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')",
+            [],
+        ),
+    ]
+
+
+def history_partitions(using="default"):
+    """
+    Месячные секции таблицы истории.
+
+    Returns:
+        list: (первый день месяца, имя секции) по возрастанию месяца
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [HISTORY_TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = PARTITION_NAME_RE.match(name)
+        if match:
+            partitions.append((date(int(match[1]), int(match[2]), 1), name))
+    return sorted(partitions)
+
+
+def create_history_partitions(first_month, last_month, using="default"):
+    """
+    Создаёт недостающие месячные секции с first_month по last_month включительно.
+
+    Returns:
+        list: Месяцы созданных секций
+    """
+    existing = {month for month, _ in history_partitions(using)}
+    months = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if month not in existing:
+            with transaction.atomic(using=using), connections[using].cursor() as cursor:
+                for sql, params in partition_sql(month):
+                    cursor.execute(sql, params)
+            months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def remove_history_partition(name, drop=True, using="default"):
+    """
+    Отсоединяет секцию от таблицы истории и, если drop, удаляет её.
+
+    Отсоединение и удаление секции - изменение каталога, а не DELETE
+    строк: выполняется мгновенно и не оставляет «мёртвых» строк для VACUUM.
+    Отсоединённая секция остаётся обычной таблицей (например, для выгрузки).
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {HISTORY_TABLE} DETACH PARTITION {name}")
+        if drop:
+            cursor.execute(f"DROP TABLE {name}")
@@ -0,0 +1,204 @@
+import hashlib
+import math
+from collections import defaultdict, deque
+
+from django.core.cache import cache
+
+# Геометрия совпадает с настройками макета на странице graph.html
+NODE_WIDTH = 220
+NODE_HEIGHT = 150
+NODE_SEPARATION = 50
+RANK_SEPARATION = 100
+COMPONENT_SEPARATION = 150
+
+# Количество проходов (вниз и вверх) при уменьшении пересечений рёбер
+CROSSING_SWEEPS = 4
+
+LAYOUT_CACHE_PREFIX = "task-layout"
+LAYOUT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _components(node_ids, edges):
+    """Разбиение графа на слабо связные компоненты"""
+    neighbours = defaultdict(set)
+    for source, target in edges:
+        neighbours[source].add(target)
+        neighbours[target].add(source)
+
+    seen = set()
+    components = []
+    for node in node_ids:
+        if node in seen:
+            continue
+        seen.add(node)
+        component = [node]
+        queue = deque([node])
+        while queue:
+            for neighbour in neighbours[queue.popleft()]:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    component.append(neighbour)
+                    queue.append(neighbour)
+        components.append(sorted(component))
+    return components
+
+
+def _assign_layers(nodes, edges):
+    """
+    Распределение по слоям методом длиннейшего пути:
+    задача находится ниже всех своих зависимостей.
+    """
+    children = defaultdict(list)
+    indegree = dict.fromkeys(nodes, 0)
+    for source, target in edges:
+        children[source].append(target)
+        indegree[target] += 1
+
+    layer = dict.fromkeys(nodes, 0)
+    queue = deque(node for node in nodes if indegree[node] == 0)
+    while queue:
+        node = queue.popleft()
+        for child in children[node]:
+            layer[child] = max(layer[child], layer[node] + 1)
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                queue.append(child)
+    return layer
+
+
+def _reduce_crossings(layers, parents, children):
+    """Упорядочивание узлов внутри слоёв методом барицентров"""
+    position = {}
+    for nodes in layers:
+        for index, node in enumerate(nodes):
+            position[node] = index
+
+    def reorder(nodes, neighbours):
+        def barycenter(node):
+            placed = [position[n] for n in neighbours[node] if n in position]
+            return sum(placed) / len(placed) if placed else position[node]
+
+        nodes.sort(key=lambda node: (barycenter(node), position[node]))
+        for index, node in enumerate(nodes):
+            position[node] = index
+
+    for _ in range(CROSSING_SWEEPS):
+        for nodes in layers[1:]:
+            reorder(nodes, parents)
+        for nodes in reversed(layers[:-1]):
+            reorder(nodes, children)
+    return layers
+
+
+def _layout_component(nodes, edges):
+    """
+    Послойный (Sugiyama) макет одной компоненты связности.
+
+    Returns:
+        tuple: ({id: [x, y]} относительно левого верхнего угла, ширина компоненты)
+    """
+    layer = _assign_layers(nodes, edges)
+    parents = defaultdict(list)
+    children = defaultdict(list)
+    for source, target in edges:
+        parents[target].append(source)
+        children[source].append(target)
+
+    layers = [[] for _ in range(max(layer.values()) + 1)]
+    for node in nodes:
+        layers[layer[node]].append(node)
+    layers = _reduce_crossings(layers, parents, children)
+
+    step = NODE_WIDTH + NODE_SEPARATION
+    width = max(len(nodes) for nodes in layers) * step - NODE_SEPARATION
+    positions = {}
+    for depth, layer_nodes in enumerate(layers):
+        offset = (width - (len(layer_nodes) * step - NODE_SEPARATION)) / 2
+        for index, node in enumerate(layer_nodes):
+            positions[node] = [
+                offset + index * step,
+                depth * (NODE_HEIGHT + RANK_SEPARATION),
+            ]
+    return positions, width
+
+
+def _layout_isolated(nodes):
+    """Задачи без связей раскладываются сеткой, близкой к квадратной"""
+    columns = max(1, math.ceil(math.sqrt(len(nodes))))
+    positions = {}
+    for index, node in enumerate(nodes):
+        row, column = divmod(index, columns)
+        positions[node] = [
+            column * (NODE_WIDTH + NODE_SEPARATION),
+            row * (NODE_HEIGHT + RANK_SEPARATION),
+        ]
+    width = min(columns, len(nodes)) * (NODE_WIDTH + NODE_SEPARATION) - NODE_SEPARATION
+    return positions, width
+
+
+def _cache_key(nodes, edges):
+    """Ключ кэша по структуре компоненты: меняется только при её изменении"""
+    digest = hashlib.sha1(
+        repr((nodes, sorted(edges))).encode()
+    ).hexdigest()
+    return f"{LAYOUT_CACHE_PREFIX}:{digest}"
+
+
+def compute_layout(node_ids, edges):
+    """
+    Вычисляет координаты узлов графа задач с кэшированием по компонентам.
+
+    После изменения графа пересчитываются только компоненты, чья
+    структура изменилась: остальные берутся из кэша одним запросом.
+
+    Args:
+        node_ids (list): id задач графа
+        edges (list): Пары (id зависимости, id зависящей задачи)
+
+    Returns:
+        dict: {id задачи: [x, y]} - левый верхний угол узла
+    """
+    node_set = set(node_ids)
+    edges = [
+        (source, target) for source, target in edges
+        if source in node_set and target in node_set and source != target
+    ]
+    edges_by_node = defaultdict(list)
+    for edge in edges:
+        edges_by_node[edge[0]].append(edge)
+
+    isolated = []
+    blocks = []
+    for component in _components(node_ids, edges):
+        if len(component) == 1:
+            isolated.append(component[0])
+            continue
+        component_edges = [
+            edge for node in component for edge in edges_by_node[node]
+        ]
+        blocks.append((component, component_edges))
+    if isolated:
+        blocks.append((sorted(isolated), []))
+
+    keys = [_cache_key(nodes, block_edges) for nodes, block_edges in blocks]
+    cached = cache.get_many(keys)
+    missing = {}
+
+    layout = {}
+    offset = 0
+    for key, (nodes, block_edges) in zip(keys, blocks):
+        if key in cached:
+            positions, width = cached[key]
+        else:
+            if block_edges:
+                positions, width = _layout_component(nodes, block_edges)
+            else:
+                positions, width = _layout_isolated(nodes)
+            missing[key] = (positions, width)
+        for node, (x, y) in positions.items():
+            layout[node] = [x + offset, y]
+        offset += width + COMPONENT_SEPARATION
+
+    if missing:
+        cache.set_many(missing, LAYOUT_CACHE_TIMEOUT)
+    return layout
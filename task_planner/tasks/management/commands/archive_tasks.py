@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from tasks.archive import (
+    ARCHIVE_BATCH_SIZE,
+    archivable_tasks,
+    archive_cutoff,
+    archive_tasks,
+)
+
+
+class Command(BaseCommand):
+    """Перенос давно завершённых и удалённых задач в архив"""
+
+    help = (
+        "Переносит выполненные, отменённые и удалённые задачи, не менявшиеся "
+        "дольше заданного срока, из основной таблицы в архив (ArchivedTask)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            help="Возраст задачи в днях (по умолчанию TASKS_ARCHIVE_AFTER_DAYS или 90)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help="Количество задач, переносимых в одной транзакции",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать количество задач, готовых к переносу",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options["older_than_days"])
+
+        if options["dry_run"]:
+            count = archivable_tasks(cutoff).count()
+            self.stdout.write(f"Задач, готовых к переносу в архив: {count}")
+            return
+
+        total = 0
+        for task_ids in archive_tasks(cutoff, options["batch_size"]):
+            total += len(task_ids)
+            self.stdout.write(f"Перенесено в архив: {total}")
+
+        self.stdout.write(self.style.SUCCESS(f"Всего перенесено задач в архив: {total}"))
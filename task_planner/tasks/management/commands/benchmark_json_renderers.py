@@ -0,0 +1,98 @@
+import json
+import timeit
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from tasks.renderers import ORJSONRenderer
+
+
+def build_payload(count, serialized=True):
+    """
+    Синтетический список задач в формате TaskSerializer (без обращения к БД).
+
+    Args:
+        count (int): Количество задач
+        serialized (bool): Значения уже приведены полями DRF к строкам;
+            иначе datetime, Decimal и timedelta передаются рендереру как есть
+    """
+    now = timezone.now()
+    payload = []
+    for i in range(count):
+        created_at = now - timedelta(minutes=i)
+        deadline = now + timedelta(days=i % 30)
+        estimated_time = timedelta(hours=i % 12 + 1)
+        budget = Decimal(i * 125) / 100
+        payload.append({
+            "id": i + 1,
+            "title": f"Задача {i}",
+            "description": "Описание задачи " * 4,
+            "priority": i % 10 + 1,
+            "status": ("waiting", "progress", "done")[i % 3],
+            "progress": i % 101,
+            "progress_dependencies": 100,
+            "created_at": created_at.isoformat().replace("+00:00", "Z") if serialized else created_at,
+            "updated_at": created_at.isoformat().replace("+00:00", "Z") if serialized else created_at,
+            "deadline": deadline.isoformat().replace("+00:00", "Z") if serialized else deadline,
+            "dependencies": list(range(max(1, i - 3), i + 1)),
+            "categories": [i % 7 + 1],
+            "author": {"id": 1, "username": "admin", "email": "admin@example.com"},
+            "assignee": i % 5 + 1,
+            "is_ready": bool(i % 2),
+            "estimated_time": str(estimated_time) if serialized else estimated_time,
+            "budget": f"{budget:.2f}" if serialized else budget,
+            "time_intervals": [{"start": "09:00", "end": "18:00"}],
+            "tags": ["срочно", f"тег-{i % 20}"],
+            "category_names": [f"Категория {i % 7}"],
+            "is_overdue": False,
+        })
+    return payload
+
+
+class Command(BaseCommand):
+    """Сравнение скорости ORJSONRenderer и стандартного JSONRenderer"""
+
+    help = "Измеряет время рендеринга списка задач стандартным и orjson-рендерером"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tasks",
+            type=int,
+            default=10000,
+            help="Количество задач в ответе",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Количество повторов (берётся лучшее время)",
+        )
+
+    def handle(self, *args, **options):
+        renderers = [JSONRenderer(), ORJSONRenderer()]
+        for serialized in (True, False):
+            payload = build_payload(options["tasks"], serialized=serialized)
+            title = "сериализованные значения" if serialized else "datetime/Decimal/timedelta"
+            self.stdout.write(f"{options['tasks']} задач, {title}:")
+
+            outputs = [renderer.render(payload) for renderer in renderers]
+            if json.loads(outputs[0]) != json.loads(outputs[1]):
+                self.stderr.write("Результаты рендереров различаются")
+
+            timings = []
+            for renderer in renderers:
+                best = min(timeit.repeat(
+                    lambda renderer=renderer, payload=payload: renderer.render(payload),
+                    number=1,
+                    repeat=options["repeat"],
+                ))
+                timings.append(best)
+                self.stdout.write(
+                    f"  {type(renderer).__name__:<16} {best * 1000:8.1f} мс"
+                )
+            self.stdout.write(
+                self.style.SUCCESS(f"  Ускорение: x{timings[0] / timings[1]:.1f}")
+            )
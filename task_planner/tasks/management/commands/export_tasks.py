@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from tasks.export import EXPORT_CHUNK_SIZE, iter_tasks_ndjson
+from tasks.serializers import TaskSerializer
+
+
+class Command(BaseCommand):
+    """Потоковая выгрузка всех задач в NDJSON"""
+
+    help = "Выгружает все задачи (включая удалённые и архивные) в формате NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            "-o",
+            help="Файл для записи (по умолчанию стандартный вывод)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help="Количество задач, читаемых из курсора за один раз",
+        )
+
+    def handle(self, *args, **options):
+        lines = iter_tasks_ndjson(TaskSerializer(), chunk_size=options["chunk_size"])
+
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        count = 0
+        with open(options["output"], "w", encoding="utf-8") as output:
+            for line in lines:
+                output.write(line)
+                count += 1
+        self.stdout.write(
+            self.style.SUCCESS(f"Выгружено задач: {count} в {options['output']}")
+        )
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tasks.models import GraphChange
+from tasks.models.graph_revision import (
+    GRAPH_CHANGES_PRUNE_BATCH_SIZE,
+    GRAPH_CHANGES_RETENTION_DAYS,
+    prune_graph_changes,
+)
+
+
+class Command(BaseCommand):
+    """Удаление старых записей журнала изменений графа"""
+
+    help = (
+        "Удаляет записи журнала изменений графа задач (GraphChange) старше "
+        "срока хранения. Клиенты с ревизией из удалённого диапазона получают "
+        "в ленте изменений требование загрузить граф заново"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            help="Сколько дней хранить журнал "
+                 "(по умолчанию TASKS_GRAPH_CHANGES_RETENTION_DAYS или 30)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=GRAPH_CHANGES_PRUNE_BATCH_SIZE,
+            help="Количество записей, удаляемых в одной транзакции",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать количество записей старше срока хранения",
+        )
+
+    def handle(self, *args, **options):
+        keep_days = options["keep_days"]
+        if keep_days is None:
+            keep_days = getattr(
+                settings, "TASKS_GRAPH_CHANGES_RETENTION_DAYS", GRAPH_CHANGES_RETENTION_DAYS
+            )
+        if keep_days < 0:
+            raise CommandError("--keep-days не может быть отрицательным")
+        before = timezone.now() - timedelta(days=keep_days)
+
+        if options["dry_run"]:
+            count = GraphChange.objects.filter(created_at__lt=before).count()
+            self.stdout.write(f"Записей журнала графа старше {keep_days} дн.: {count}")
+            return
+
+        total = prune_graph_changes(before, options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Удалено записей журнала графа: {total}"))
@@ -0,0 +1,110 @@
+from datetime import datetime, time
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from tasks.history import prune_task_revisions
+from tasks.history_partitions import (
+    HISTORY_MONTHS_AHEAD,
+    HISTORY_RETENTION_MONTHS,
+    add_months,
+    create_history_partitions,
+    history_partitions,
+    month_start,
+    remove_history_partition,
+    supports_partitioning,
+)
+from tasks.models import TaskRevision
+
+
+class Command(BaseCommand):
+    """Обслуживание секций таблицы истории задач"""
+
+    help = (
+        "Отсоединяет или удаляет месячные секции истории задач старше срока "
+        "хранения, удаляет ревизии журнала изменений (TaskRevision) старше "
+        "того же срока и создаёт секции на ближайшие месяцы (только PostgreSQL)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-months",
+            type=int,
+            help="Сколько месяцев истории хранить, включая текущий "
+                 "(по умолчанию TASKS_HISTORY_RETENTION_MONTHS или 24)",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=HISTORY_MONTHS_AHEAD,
+            help="На сколько месяцев вперёд создать пустые секции",
+        )
+        parser.add_argument(
+            "--detach-only",
+            action="store_true",
+            help="Только отсоединить старые секции, оставив их отдельными таблицами; "
+                 "ревизии журнала удаляются следующим запуском без этого флага",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать секции, которые будут отсоединены",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Алиас базы данных",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        if not supports_partitioning(using):
+            raise CommandError("Секционирование истории поддерживается только PostgreSQL")
+
+        keep_months = options["keep_months"]
+        if keep_months is None:
+            keep_months = getattr(
+                settings, "TASKS_HISTORY_RETENTION_MONTHS", HISTORY_RETENTION_MONTHS
+            )
+        if keep_months < 1:
+            raise CommandError("--keep-months должен быть не меньше 1")
+
+        current_month = month_start(timezone.now())
+        oldest_kept = add_months(current_month, 1 - keep_months)
+        expired = [
+            name for month, name in history_partitions(using) if month < oldest_kept
+        ]
+        # Граница секций - начало месяца в UTC (см. partition_bounds)
+        revisions_before = datetime.combine(oldest_kept, time.min, tzinfo=dt_timezone.utc)
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Секций истории старше {oldest_kept:%Y-%m}: {len(expired)}"
+            )
+            for name in expired:
+                self.stdout.write(f"  {name}")
+            revisions = TaskRevision.objects.using(using).filter(
+                history_date__lt=revisions_before
+            ).count()
+            self.stdout.write(f"Ревизий журнала старше {oldest_kept:%Y-%m}: {revisions}")
+            return
+
+        create_history_partitions(
+            current_month, add_months(current_month, options["months_ahead"]), using
+        )
+        for name in expired:
+            remove_history_partition(name, drop=not options["detach_only"], using=using)
+            self.stdout.write(
+                f"{'Отсоединена' if options['detach_only'] else 'Удалена'} секция {name}"
+            )
+
+        if not options["detach_only"]:
+            revisions = prune_task_revisions(revisions_before, using=using)
+            self.stdout.write(f"Удалено ревизий журнала: {revisions}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Обработано секций истории: {len(expired)}")
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from tasks.models import TaskClosure
+
+
+class Command(BaseCommand):
+    """Полная перестройка таблицы транзитивного замыкания зависимостей"""
+
+    help = "Перестраивает таблицу TaskClosure по текущим зависимостям задач"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Количество строк в одной пакетной вставке",
+        )
+
+    def handle(self, *args, **options):
+        count = TaskClosure.objects.rebuild(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Таблица замыкания перестроена: {count} пар")
+        )
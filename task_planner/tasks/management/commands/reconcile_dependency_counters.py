@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from tasks.models import Task
+from tasks.models.graph_revision import record_graph_change
+
+
+class Command(BaseCommand):
+    """Сверка счётчиков зависимостей задач с таблицей зависимостей"""
+
+    help = (
+        "Находит задачи, у которых dependencies_count/completed_dependencies_count "
+        "расходятся с фактическими зависимостями, и исправляет их"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Количество задач, исправляемых в одной транзакции",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только показать количество расхождений, ничего не меняя",
+        )
+
+    def handle(self, *args, **options):
+        drifted_ids = list(
+            Task.all_objects.with_actual_dependency_counts()
+            .exclude(
+                Q(dependencies_count=F("actual_total"))
+                & Q(completed_dependencies_count=F("actual_completed"))
+            )
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(f"Задач с расхождением счётчиков: {len(drifted_ids)}")
+            return
+
+        batch_size = options["batch_size"]
+        for start in range(0, len(drifted_ids), batch_size):
+            batch = drifted_ids[start:start + batch_size]
+            with transaction.atomic():
+                Task.all_objects.filter(pk__in=batch).recompute_dependency_counters()
+                Task.objects.filter(pk__in=batch).recompute_dependency_progress()
+                record_graph_change(batch)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Исправлено счётчиков зависимостей: {len(drifted_ids)}")
+        )
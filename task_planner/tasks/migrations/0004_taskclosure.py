@@ -0,0 +1,116 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def iter_closure_pairs(edges):
+    """
+    Транзитивное замыкание по рёбрам (task_id, dependency_id).
+
+    Копия функции на момент миграции: миграция не зависит от кода моделей.
+
+    Yields:
+        tuple: (ancestor_id, descendant_id)
+    """
+    dependencies_map = {}
+    for task_id, dependency_id in edges:
+        dependencies_map.setdefault(task_id, []).append(dependency_id)
+
+    ancestors_map = {}
+    in_progress = set()
+    for root in dependencies_map:
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in ancestors_map:
+                continue
+            if expanded:
+                ancestors = set()
+                for dep in dependencies_map.get(node, ()):
+                    ancestors.add(dep)
+                    ancestors |= ancestors_map.get(dep, set())
+                ancestors_map[node] = ancestors
+                in_progress.discard(node)
+                continue
+            if node in in_progress:
+                continue
+            in_progress.add(node)
+            stack.append((node, True))
+            for dep in dependencies_map.get(node, ()):
+                if dep in dependencies_map and dep not in ancestors_map:
+                    stack.append((dep, False))
+
+    for task_id, ancestors in ancestors_map.items():
+        for ancestor_id in ancestors:
+            yield ancestor_id, task_id
+
+
+def build_closure(apps, schema_editor):
+    """Заполняет замыкание по уже существующим зависимостям"""
+    Task = apps.get_model("tasks", "Task")
+    TaskClosure = apps.get_model("tasks", "TaskClosure")
+    edges = Task.dependencies.through.objects.values_list("from_task_id", "to_task_id")
+    TaskClosure.objects.bulk_create(
+        [
+            TaskClosure(ancestor_id=ancestor_id, descendant_id=descendant_id)
+            for ancestor_id, descendant_id in iter_closure_pairs(edges)
+        ],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0003_historicaltask_progress_dependencies_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskClosure",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="tasks.task",
+                        verbose_name="Предок",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="tasks.task",
+                        verbose_name="Потомок",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Транзитивная зависимость",
+                "verbose_name_plural": "Транзитивные зависимости",
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "ancestor"],
+                        name="tasks_taskc_descend_63a27b_idx",
+                    )
+                ],
+                "unique_together": {("ancestor", "descendant")},
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
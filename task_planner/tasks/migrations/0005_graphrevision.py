@@ -0,0 +1,47 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_revision(apps, schema_editor):
+    """Создаёт единственную строку счётчика ревизий"""
+    GraphRevision = apps.get_model("tasks", "GraphRevision")
+    GraphRevision.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0004_taskclosure"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GraphRevision",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.BigIntegerField(default=0, verbose_name="Ревизия")),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Дата обновления",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ревизия графа задач",
+                "verbose_name_plural": "Ревизии графа задач",
+            },
+        ),
+        migrations.RunPython(create_revision, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0005_graphrevision"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GraphChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "revision",
+                    models.BigIntegerField(db_index=True, verbose_name="Ревизия"),
+                ),
+                ("task_id", models.BigIntegerField(verbose_name="ID задачи")),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата изменения"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Изменение графа задач",
+                "verbose_name_plural": "Изменения графа задач",
+                "ordering": ("revision",),
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:50
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    """Заполняет счётчики зависимостей по уже существующим связям"""
+    Task = apps.get_model("tasks", "Task")
+    through = Task.dependencies.through
+
+    def count_subquery(**filters):
+        counts = (
+            through.objects.filter(from_task_id=OuterRef("pk"), **filters)
+            .values("from_task_id")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+    Task.objects.update(
+        dependencies_count=count_subquery(),
+        completed_dependencies_count=count_subquery(
+            to_task__status__in=["done", "canceled"]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0006_graphchange"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="completed_dependencies_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Количество выполненных или отменённых зависимостей",
+                verbose_name="Выполнено зависимостей",
+            ),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="dependencies_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Количество прямых зависимостей задачи",
+                verbose_name="Количество зависимостей",
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:55
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+
+def task_search_vector():
+    """Поисковый вектор задачи на момент миграции (см. tasks.search)"""
+    return (
+        SearchVector("title", weight="A", config="russian")
+        + SearchVector("description", weight="B", config="russian")
+    )
+
+
+SEARCH_INDEXES = [
+    django.contrib.postgres.indexes.GinIndex(
+        fields=["search_vector"], name="task_search_vector_gin"
+    ),
+    django.contrib.postgres.indexes.GinIndex(
+        fields=["title"], name="task_title_trgm_gin", opclasses=["gin_trgm_ops"]
+    ),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    """Заполняет поисковый вектор и создаёт GIN-индексы (только PostgreSQL)"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Task = apps.get_model("tasks", "Task")
+    Task.objects.update(search_vector=task_search_vector())
+    for index in SEARCH_INDEXES:
+        schema_editor.add_index(Task, index)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    Task = apps.get_model("tasks", "Task")
+    for index in SEARCH_INDEXES:
+        schema_editor.remove_index(Task, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+        ("tasks", "0007_task_dependency_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # На других СУБД расширение не создаётся
+        TrigramExtension(),
+        migrations.AddField(
+            model_name="task",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True, verbose_name="Поисковый вектор"
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name="task", index=index)
+                for index in SEARCH_INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_indexes, drop_search_indexes),
+            ],
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:57
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+TITLE_PREFIX_INDEX = models.Index(
+    django.contrib.postgres.indexes.OpClass(
+        django.db.models.functions.text.Upper("title"),
+        name="text_pattern_ops",
+    ),
+    condition=models.Q(("is_deleted", False)),
+    name="task_title_prefix_idx",
+)
+
+
+def create_prefix_index(apps, schema_editor):
+    """Классы операторов поддерживаются только PostgreSQL"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.add_index(apps.get_model("tasks", "Task"), TITLE_PREFIX_INDEX)
+
+
+def drop_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.remove_index(apps.get_model("tasks", "Task"), TITLE_PREFIX_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+        ("tasks", "0008_task_search"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name="task", index=TITLE_PREFIX_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(create_prefix_index, drop_prefix_index),
+            ],
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:05
+
+import django.db.models.manager
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "taggit",
+            "0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx",
+        ),
+        ("tasks", "0009_task_title_prefix_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="task",
+            options={
+                "base_manager_name": "all_objects",
+                "default_manager_name": "all_objects",
+                "ordering": ["-created_at"],
+                "permissions": [
+                    ("can_approve_task", "Может подтверждать завершение задач"),
+                    ("can_assign_task", "Может назначать задачи другим пользователям"),
+                    ("can_restore_task", "Может восстанавливать удаленные задачи"),
+                ],
+                "verbose_name": "Задача",
+                "verbose_name_plural": "Задачи",
+            },
+        ),
+        migrations.AlterModelManagers(
+            name="task",
+            managers=[
+                ("all_objects", django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_deadlin_736196_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_priorit_a900d4_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_assigne_a1ddb3_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_task_is_read_6eef1c_idx",
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["deadline"],
+                name="task_live_deadline_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["priority"],
+                name="task_live_priority_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["assignee"],
+                name="task_live_assignee_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["is_ready"],
+                name="task_live_is_ready_idx",
+            ),
+        ),
+    ]
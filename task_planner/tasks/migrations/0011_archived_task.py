@@ -0,0 +1,57 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:09
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0010_task_live_partial_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedTask",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(
+                        primary_key=True, serialize=False, verbose_name="ID задачи"
+                    ),
+                ),
+                ("title", models.CharField(max_length=200, verbose_name="Название")),
+                ("status", models.CharField(max_length=20, verbose_name="Статус")),
+                (
+                    "is_deleted",
+                    models.BooleanField(default=False, verbose_name="Удалена"),
+                ),
+                ("updated_at", models.DateTimeField(verbose_name="Дата изменения")),
+                (
+                    "archived_at",
+                    models.DateTimeField(
+                        auto_now_add=True, db_index=True, verbose_name="Дата архивации"
+                    ),
+                ),
+                (
+                    "snapshot",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="Снимок задачи",
+                    ),
+                ),
+                (
+                    "representation",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="Представление API",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Архивная задача",
+                "verbose_name_plural": "Архивные задачи",
+                "ordering": ("-archived_at",),
+            },
+        ),
+    ]
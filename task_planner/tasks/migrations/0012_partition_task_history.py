@@ -0,0 +1,146 @@
+from datetime import date
+
+from django.db import migrations
+from django.utils import timezone
+
+# Константы и функции секций на момент миграции: миграция не зависит
+# от текущего кода tasks.history_partitions
+HISTORY_TABLE = "tasks_historicaltask"
+DEFAULT_PARTITION = f"{HISTORY_TABLE}_default"
+HISTORY_MONTHS_AHEAD = 3
+UNPARTITIONED_TABLE = f"{HISTORY_TABLE}_unpartitioned"
+HISTORY_ID_SEQUENCE = f"{HISTORY_TABLE}_history_id_seq"
+
+
+def month_start(value):
+    """Первый день месяца даты value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    """Первый день месяца через count месяцев от month"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_sql(month):
+    """CREATE TABLE секции истории за месяц month (границы - начала месяцев в UTC)"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {HISTORY_TABLE}_p{month:%Y_%m} PARTITION OF {HISTORY_TABLE} "
+        f"FOR VALUES FROM ('{month:%Y-%m-%d} 00:00:00+00') "
+        f"TO ('{add_months(month, 1):%Y-%m-%d} 00:00:00+00')"
+    )
+
+
+def table_definitions(cursor, table):
+    """Определения индексов (кроме первичного ключа) и внешних ключей таблицы"""
+    cursor.execute(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+        "WHERE indrelid = %s::regclass AND NOT indisprimary",
+        [table],
+    )
+    definitions = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    definitions += [
+        f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}"
+        for name, definition in cursor.fetchall()
+    ]
+    return definitions
+
+
+def partition_history(apps, schema_editor):
+    """
+    Пересоздаёт tasks_historicaltask как таблицу, секционированную
+    по месяцам history_date (только PostgreSQL).
+
+    Первичный ключ секционированной таблицы должен включать ключ
+    секционирования, поэтому он становится (history_id, history_date);
+    Django по-прежнему считает ключом history_id, значения которого
+    выдаёт общая последовательность.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        definitions = table_definitions(cursor, HISTORY_TABLE)
+        cursor.execute(f"SELECT MIN(history_date) FROM {HISTORY_TABLE}")
+        first_date = cursor.fetchone()[0]
+
+    last_month = add_months(month_start(timezone.now()), HISTORY_MONTHS_AHEAD)
+    first_month = month_start(first_date) if first_date else month_start(timezone.now())
+
+    schema_editor.execute(f"ALTER TABLE {HISTORY_TABLE} RENAME TO {UNPARTITIONED_TABLE}")
+    schema_editor.execute(
+        f"CREATE TABLE {HISTORY_TABLE} "
+        f"(LIKE {UNPARTITIONED_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        f"PARTITION BY RANGE (history_date)"
+    )
+    month = first_month
+    while month <= last_month:
+        schema_editor.execute(partition_sql(month))
+        month = add_months(month, 1)
+    schema_editor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {HISTORY_TABLE} DEFAULT")
+
+    schema_editor.execute(f"INSERT INTO {HISTORY_TABLE} SELECT * FROM {UNPARTITIONED_TABLE}")
+    # Вместе со старой таблицей удаляется и её identity-последовательность
+    schema_editor.execute(f"DROP TABLE {UNPARTITIONED_TABLE}")
+
+    schema_editor.execute(
+        f"CREATE SEQUENCE {HISTORY_ID_SEQUENCE} OWNED BY {HISTORY_TABLE}.history_id"
+    )
+    schema_editor.execute(
+        f"ALTER TABLE {HISTORY_TABLE} ALTER COLUMN history_id "
+        f"SET DEFAULT nextval('{HISTORY_ID_SEQUENCE}')"
+    )
+    schema_editor.execute(
+        f"SELECT setval('{HISTORY_ID_SEQUENCE}', "
+        f"COALESCE((SELECT MAX(history_id) FROM {HISTORY_TABLE}), 0) + 1, false)"
+    )
+    schema_editor.execute(
+        f"ALTER TABLE {HISTORY_TABLE} ADD CONSTRAINT {HISTORY_TABLE}_pkey "
+        f"PRIMARY KEY (history_id, history_date)"
+    )
+    for definition in definitions:
+        schema_editor.execute(definition)
+
+
+def unpartition_history(apps, schema_editor):
+    """Возвращает обычную (несекционированную) таблицу истории"""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        definitions = table_definitions(cursor, HISTORY_TABLE)
+
+    schema_editor.execute(
+        f"CREATE TABLE {UNPARTITIONED_TABLE} "
+        f"(LIKE {HISTORY_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    schema_editor.execute(f"INSERT INTO {UNPARTITIONED_TABLE} SELECT * FROM {HISTORY_TABLE}")
+    schema_editor.execute(
+        f"ALTER SEQUENCE {HISTORY_ID_SEQUENCE} OWNED BY {UNPARTITIONED_TABLE}.history_id"
+    )
+    # Секции удаляются вместе с секционированной таблицей
+    schema_editor.execute(f"DROP TABLE {HISTORY_TABLE}")
+    schema_editor.execute(f"ALTER TABLE {UNPARTITIONED_TABLE} RENAME TO {HISTORY_TABLE}")
+    schema_editor.execute(
+        f"ALTER TABLE {HISTORY_TABLE} ADD CONSTRAINT {HISTORY_TABLE}_pkey "
+        f"PRIMARY KEY (history_id)"
+    )
+    for definition in definitions:
+        schema_editor.execute(definition)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0011_archived_task"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_history, unpartition_history),
+    ]
@@ -0,0 +1,157 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:18
+
+import datetime
+import json
+from decimal import Decimal
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models
+from django.utils import timezone
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def json_value(field, value):
+    """Значение поля в журнале (копия tasks.history.json_value на момент миграции)"""
+    if value is None:
+        return None
+    if isinstance(field, models.DecimalField):
+        value = Decimal(value).quantize(Decimal(1).scaleb(-field.decimal_places))
+    elif isinstance(value, datetime.datetime) and timezone.is_aware(value):
+        value = value.astimezone(datetime.timezone.utc)
+    return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+
+
+def backfill_revisions(apps, schema_editor):
+    """
+    Нумерует существующие строки истории как ревизии журнала.
+
+    Каждая строка остаётся контрольной точкой; ревизия изменения хранит
+    поля, отличающиеся от предыдущей строки истории задачи.
+    """
+    HistoricalTask = apps.get_model("tasks", "HistoricalTask")
+    TaskRevision = apps.get_model("tasks", "TaskRevision")
+    fields = {
+        field.attname: field
+        for field in HistoricalTask._meta.concrete_fields
+        if not field.name.startswith("history_")
+    }
+    rows = HistoricalTask.objects.order_by("id", "history_date", "history_id").values(
+        "history_id", "history_type", "history_date", "history_user_id", *fields
+    )
+
+    checkpoints, revisions = [], []
+
+    def write():
+        HistoricalTask.objects.bulk_update(checkpoints, ["history_revision"])
+        TaskRevision.objects.bulk_create(revisions)
+        checkpoints.clear()
+        revisions.clear()
+
+    task_id, revision, state = None, 0, None
+    for row in rows.iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        if row["id"] != task_id:
+            task_id, revision, state = row["id"], 0, None
+        revision += 1
+        values = {name: json_value(field, row[name]) for name, field in fields.items()}
+        changes = {}
+        if row["history_type"] == "~":
+            changes = {
+                name: value for name, value in values.items()
+                if state is None or state.get(name) != value
+            }
+        state = values
+
+        checkpoints.append(HistoricalTask(history_id=row["history_id"], history_revision=revision))
+        revisions.append(TaskRevision(
+            task_id=task_id,
+            revision=revision,
+            history_type=row["history_type"],
+            history_date=row["history_date"],
+            history_user_id=row["history_user_id"],
+            changes=changes,
+        ))
+        if len(revisions) >= BACKFILL_BATCH_SIZE:
+            write()
+    if revisions:
+        write()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0012_partition_task_history"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="historicaltask",
+            name="history_revision",
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name="Ревизия"
+            ),
+        ),
+        migrations.CreateModel(
+            name="TaskRevision",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("task_id", models.BigIntegerField(verbose_name="ID задачи")),
+                ("revision", models.PositiveIntegerField(verbose_name="Ревизия")),
+                (
+                    "history_type",
+                    models.CharField(
+                        choices=[
+                            ("+", "Создание"),
+                            ("~", "Изменение"),
+                            ("-", "Удаление"),
+                        ],
+                        max_length=1,
+                        verbose_name="Тип изменения",
+                    ),
+                ),
+                ("history_date", models.DateTimeField(verbose_name="Дата изменения")),
+                (
+                    "changes",
+                    models.JSONField(
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="Изменённые поля",
+                    ),
+                ),
+                (
+                    "history_user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Автор изменения",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ревизия задачи",
+                "verbose_name_plural": "Ревизии задач",
+                "ordering": ("task_id", "-revision"),
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("task_id", "revision"), name="task_revision_unique"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_revisions, migrations.RunPython.noop),
+    ]
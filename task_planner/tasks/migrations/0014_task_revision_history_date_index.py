@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0013_task_revisions"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="taskrevision",
+            name="history_date",
+            field=models.DateTimeField(db_index=True, verbose_name="Дата изменения"),
+        ),
+    ]
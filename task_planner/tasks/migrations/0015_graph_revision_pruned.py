@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0014_task_revision_history_date_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="graphrevision",
+            name="pruned_revision",
+            field=models.BigIntegerField(
+                default=0, verbose_name="Журнал удалён по ревизию"
+            ),
+        ),
+    ]
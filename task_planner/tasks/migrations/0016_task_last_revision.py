@@ -0,0 +1,83 @@
+# Generated by Django 5.2.1 on 2026-10-17 08:01
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def last_revision_field():
+    field = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Последняя ревизия журнала"
+    )
+    field.set_attributes_from_name("last_revision")
+    return field
+
+
+def add_last_revision(apps, schema_editor):
+    """
+    SQLite добавляет NOT NULL столбец пересозданием таблицы со всеми
+    индексами, включая индекс с классом операторов PostgreSQL (0009),
+    поэтому там столбец добавляется ALTER TABLE со значением по умолчанию
+    """
+    Task = apps.get_model("tasks", "Task")
+    field = last_revision_field()
+    if schema_editor.connection.vendor != "sqlite":
+        schema_editor.add_field(Task, field)
+        return
+    definition, params = schema_editor.column_sql(Task, field, include_default=True)
+    schema_editor.execute(
+        f"ALTER TABLE {schema_editor.quote_name(Task._meta.db_table)} "
+        f"ADD COLUMN {schema_editor.quote_name(field.column)} {definition}",
+        params,
+    )
+
+
+def remove_last_revision(apps, schema_editor):
+    Task = apps.get_model("tasks", "Task")
+    field = last_revision_field()
+    if schema_editor.connection.vendor != "sqlite":
+        schema_editor.remove_field(Task, field)
+        return
+    schema_editor.execute(
+        f"ALTER TABLE {schema_editor.quote_name(Task._meta.db_table)} "
+        f"DROP COLUMN {schema_editor.quote_name(field.column)}"
+    )
+
+
+def fill_last_revision(apps, schema_editor):
+    """Заполняет счётчик ревизий по уже записанному журналу изменений"""
+    Task = apps.get_model("tasks", "Task")
+    TaskRevision = apps.get_model("tasks", "TaskRevision")
+    latest = (
+        TaskRevision.objects.filter(task_id=OuterRef("pk"))
+        .order_by()
+        .values("task_id")
+        .annotate(latest=Max("revision"))
+        .values("latest")
+    )
+    Task._default_manager.update(last_revision=Coalesce(Subquery(latest), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0015_graph_revision_pruned"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name="task",
+                    name="last_revision",
+                    field=models.PositiveIntegerField(
+                        default=0, editable=False, verbose_name="Последняя ревизия журнала"
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(add_last_revision, remove_last_revision),
+            ],
+        ),
+        migrations.RunPython(fill_last_revision, migrations.RunPython.noop),
+    ]
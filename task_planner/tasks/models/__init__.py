@@ -3,6 +3,11 @@ from tasks.models.notification_method import NotificationMethod as NotificationM
 from tasks.models.location import Location as Location
 from tasks.models.link import Link as Link
 from tasks.models.task import Task as Task
+from tasks.models.task_closure import TaskClosure as TaskClosure
 from tasks.models.task_link import TaskLink as TaskLink
 from tasks.models.file_attachment import FileAttachment as FileAttachment
-from tasks.models.userProfile import UserProfile as UserProfile
\ No newline at end of file
+from tasks.models.userProfile import UserProfile as UserProfile
+from tasks.models.graph_revision import GraphRevision as GraphRevision
+from tasks.models.graph_revision import GraphChange as GraphChange
+from tasks.models.archived_task import ArchivedTask as ArchivedTask
+from tasks.models.task_revision import TaskRevision as TaskRevision
@@ -0,0 +1,64 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class ArchivedTask(models.Model):
+    """
+    Задача, перенесённая из основной таблицы в холодный архив.
+
+    Выполненные, отменённые и удалённые задачи переносятся командой
+    archive_tasks (см. tasks.archive) и хранятся одной строкой: снимок
+    полей и связей для возврата в основную таблицу и готовое
+    представление API для чтения без восстановления.
+
+    Attributes:
+        id (BigIntegerField): id задачи (сохраняется при возврате из архива)
+        title (CharField): Название задачи
+        status (CharField): Статус на момент архивации
+        is_deleted (BooleanField): Задача была мягко удалена
+        updated_at (DateTimeField): Время последнего изменения задачи
+        archived_at (DateTimeField): Время переноса в архив
+        snapshot (JSONField): Поля и связи задачи (см. tasks.archive.task_snapshots)
+        representation (JSONField): Полное представление TaskSerializer
+    """
+
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name="ID задачи",
+    )
+    title = models.CharField(
+        max_length=200,
+        verbose_name="Название",
+    )
+    status = models.CharField(
+        max_length=20,
+        verbose_name="Статус",
+    )
+    is_deleted = models.BooleanField(
+        default=False,
+        verbose_name="Удалена",
+    )
+    updated_at = models.DateTimeField(
+        verbose_name="Дата изменения",
+    )
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name="Дата архивации",
+    )
+    snapshot = models.JSONField(
+        encoder=DjangoJSONEncoder,
+        verbose_name="Снимок задачи",
+    )
+    representation = models.JSONField(
+        encoder=DjangoJSONEncoder,
+        verbose_name="Представление API",
+    )
+
+    def __str__(self):
+        return f"{self.title} (в архиве)"
+
+    class Meta:
+        verbose_name = "Архивная задача"
+        verbose_name_plural = "Архивные задачи"
+        ordering = ("-archived_at",)
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.core.exceptions import ValidationError
 from tasks.models.task import Task
 import os
@@ -97,3 +99,10 @@ class FileAttachment(models.Model):
         verbose_name = "Файловое вложение"
         verbose_name_plural = "Файловые вложения"
         ordering = ("-uploaded_at",)
+
+
+@receiver(post_save, sender=FileAttachment)
+@receiver(post_delete, sender=FileAttachment)
+def touch_task_on_attachment_change(sender, instance, **kwargs):
+    """Увеличивает версию задачи при изменении её вложений"""
+    Task.all_objects.filter(pk=instance.task_id).touch()
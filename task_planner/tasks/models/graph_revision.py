@@ -0,0 +1,259 @@
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from tasks.transactions import OnCommitQueue
+
+TASK_MODEL = "tasks.Task"
+
+# Модели, изменение которых меняет ответы API задач и графа, и задачи,
+# которых касается изменение объекта. Изменения самих задач записываются
+# обработчиками в models/task.py
+REVISION_TRACKED_MODELS = {
+    "tasks.TaskCategory": lambda category: category.tasks.values_list("pk", flat=True),
+    "tasks.TaskLink": lambda task_link: [task_link.task_id],
+    "tasks.FileAttachment": lambda attachment: [attachment.task_id],
+    "tasks.Link": lambda link: link.link_tasks.values_list("task_id", flat=True),
+    "taggit.Tag": lambda tag: tag.taggit_taggeditem_items.filter(
+        content_type__app_label="tasks", content_type__model="task"
+    ).values_list("object_id", flat=True),
+}
+
+# Сколько дней хранится журнал изменений графа (GraphChange).
+# Переопределяется settings.TASKS_GRAPH_CHANGES_RETENTION_DAYS
+GRAPH_CHANGES_RETENTION_DAYS = 30
+
+# Количество записей журнала, удаляемых одной транзакцией
+GRAPH_CHANGES_PRUNE_BATCH_SIZE = 5000
+
+
+class GraphRevisionManager(models.Manager):
+    """Чтение и увеличение счётчика ревизий"""
+
+    def current(self):
+        """Текущая ревизия (одна выборка по однострочной таблице)"""
+        row = self.filter(pk=GraphRevision.SINGLETON_ID).values_list(
+            "value", "updated_at"
+        ).first()
+        return row or (0, None)
+
+    def bump(self):
+        """
+        Увеличивает ревизию на единицу и возвращает новое значение.
+
+        Блокировка строки до конца короткой транзакции гарантирует,
+        что ревизии выдаются в порядке фиксации изменений.
+        """
+        with transaction.atomic():
+            updated = self.filter(pk=GraphRevision.SINGLETON_ID).update(
+                value=F("value") + 1, updated_at=timezone.now()
+            )
+            if not updated:
+                self.get_or_create(pk=GraphRevision.SINGLETON_ID)
+                self.filter(pk=GraphRevision.SINGLETON_ID).update(
+                    value=F("value") + 1, updated_at=timezone.now()
+                )
+            return self.filter(pk=GraphRevision.SINGLETON_ID).values_list(
+                "value", flat=True
+            ).get()
+
+    def pruned(self):
+        """Ревизия, по которую включительно журнал изменений удалён"""
+        return self.filter(pk=GraphRevision.SINGLETON_ID).values_list(
+            "pruned_revision", flat=True
+        ).first() or 0
+
+
+class GraphRevision(models.Model):
+    """
+    Монотонный счётчик ревизий данных задач и графа зависимостей.
+
+    Увеличивается при сохранении, мягком удалении задачи и изменении её
+    связей. Позволяет отвечать на условные запросы (ETag) без обращения
+    к таблицам задач.
+
+    Attributes:
+        value (BigIntegerField): Номер текущей ревизии
+        updated_at (DateTimeField): Время последнего увеличения
+        pruned_revision (BigIntegerField): Записи журнала GraphChange по эту
+            ревизию включительно удалены по сроку хранения
+    """
+
+    SINGLETON_ID = 1
+
+    value = models.BigIntegerField(
+        default=0,
+        verbose_name="Ревизия",
+    )
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Дата обновления",
+    )
+    pruned_revision = models.BigIntegerField(
+        default=0,
+        verbose_name="Журнал удалён по ревизию",
+    )
+
+    objects = GraphRevisionManager()
+
+    def __str__(self):
+        return f"Ревизия {self.value}"
+
+    class Meta:
+        verbose_name = "Ревизия графа задач"
+        verbose_name_plural = "Ревизии графа задач"
+
+
+class GraphChange(models.Model):
+    """
+    Журнал изменений графа задач (только добавление записей).
+
+    Запись означает, что к ревизии revision изменилась задача task_id:
+    её атрибуты, зависимости или видимость. Актуальное состояние задачи
+    берётся из таблицы задач при чтении ленты изменений.
+
+    Записи старше срока хранения удаляются командой prune_graph_changes;
+    клиент с ревизией из удалённого диапазона загружает граф заново.
+
+    Attributes:
+        revision (BigIntegerField): Ревизия, в которой произошло изменение
+        task_id (BigIntegerField): id задачи (без внешнего ключа - задача могла быть удалена)
+        created_at (DateTimeField): Время записи
+    """
+
+    revision = models.BigIntegerField(
+        db_index=True,
+        verbose_name="Ревизия",
+    )
+    task_id = models.BigIntegerField(
+        verbose_name="ID задачи",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата изменения",
+    )
+
+    def __str__(self):
+        return f"Задача {self.task_id} в ревизии {self.revision}"
+
+    class Meta:
+        verbose_name = "Изменение графа задач"
+        verbose_name_plural = "Изменения графа задач"
+        ordering = ("revision",)
+
+
+class GraphChangeQueue(OnCommitQueue):
+    """
+    Изменения графа в рамках транзакции.
+
+    После фиксации транзакции ревизия увеличивается один раз, и все
+    изменённые задачи записываются в журнал с этой ревизией в той же
+    короткой транзакции - порядок ревизий совпадает с порядком записей.
+    """
+
+    connection_attribute = "_graph_change_queue"
+
+    def __init__(self):
+        self.task_ids = set()
+
+    def add(self, task_ids=()):
+        self.task_ids.update(task_ids)
+
+    def flush(self):
+        task_ids, self.task_ids = self.task_ids, set()
+        with transaction.atomic():
+            revision = GraphRevision.objects.bump()
+            GraphChange.objects.bulk_create(
+                GraphChange(revision=revision, task_id=task_id)
+                for task_id in task_ids
+            )
+
+
+def record_graph_change(task_ids=(), using=None):
+    """Отмечает изменение задач и увеличение ревизии при фиксации транзакции"""
+    GraphChangeQueue.enqueue(task_ids, using=using)
+
+
+def prune_graph_changes(before, batch_size=GRAPH_CHANGES_PRUNE_BATCH_SIZE):
+    """
+    Удаляет записи журнала изменений графа, сделанные раньше before,
+    пачками по batch_size.
+
+    Сначала запоминается последняя удаляемая ревизия (pruned_revision):
+    с этого момента лента изменений с более ранней ревизии отвечает
+    требованием загрузить граф заново.
+
+    Returns:
+        int: Количество удалённых записей
+    """
+    pruned_revision = GraphChange.objects.filter(created_at__lt=before).order_by(
+        "-revision"
+    ).values_list("revision", flat=True).first()
+    if pruned_revision is None:
+        return 0
+    GraphRevision.objects.get_or_create(pk=GraphRevision.SINGLETON_ID)
+    GraphRevision.objects.filter(
+        pk=GraphRevision.SINGLETON_ID, pruned_revision__lt=pruned_revision
+    ).update(pruned_revision=pruned_revision)
+
+    changes = GraphChange.objects.filter(revision__lte=pruned_revision)
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(changes.order_by().values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return total
+            GraphChange.objects.filter(pk__in=ids).delete()
+        total += len(ids)
+
+
+@receiver(post_save)
+@receiver(pre_delete)
+def bump_revision_on_model_change(sender, instance, **kwargs):
+    """
+    Записывает в журнал задачи, связанные с сохранённым или удаляемым
+    объектом отслеживаемой модели (например, все задачи переименованной
+    категории). При удалении связанные задачи читаются до каскадного
+    удаления связей.
+    """
+    task_ids = REVISION_TRACKED_MODELS.get(sender._meta.label)
+    if task_ids is not None:
+        record_graph_change(
+            [pk for pk in task_ids(instance) if pk is not None],
+            using=kwargs.get("using"),
+        )
+
+
+def related_task_ids(through, tasks_model, instance):
+    """id задач, связанных с объектом instance через промежуточную модель through"""
+    field = next(
+        field for field in tasks_model._meta.many_to_many
+        if getattr(field.remote_field, "through", None) is through
+    )
+    return set(
+        tasks_model._base_manager.filter(**{field.name: instance.pk}).values_list("pk", flat=True)
+    )
+
+
+@receiver(m2m_changed)
+def bump_revision_on_relation_change(sender, instance, action, model, reverse=False, pk_set=None, **kwargs):
+    """
+    Записывает в журнал задачи, у которых изменились связи
+    (зависимости, категории, уведомления, теги)
+    """
+    using = kwargs.get("using")
+    if not reverse:
+        if instance._meta.label == TASK_MODEL and action.startswith("post_"):
+            record_graph_change([instance.pk], using=using)
+        return
+    if model._meta.label != TASK_MODEL:
+        return
+    if action == "pre_clear":
+        # После очистки pk_set не передаётся - запоминаем затронутые задачи
+        instance._graph_cleared_task_ids = related_task_ids(sender, model, instance)
+    elif action == "post_clear":
+        record_graph_change(instance.__dict__.pop("_graph_cleared_task_ids", ()), using=using)
+    elif action.startswith("post_"):
+        record_graph_change(pk_set or (), using=using)
@@ -4,18 +4,187 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from taggit.managers import TaggableManager
-from simple_history.models import HistoricalRecords
 from tasks.models.task_category import TaskCategory
 from tasks.models.location import Location
 from tasks.models.notification_method import NotificationMethod
 from tasks.models.link import Link
 import json
+import operator
+from functools import reduce
+from django.contrib.contenttypes.models import ContentType
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.db.models.signals import m2m_changed
-from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery, Value, Case, When
+from django.db.models.functions import Coalesce, Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from tasks.search import supports_search, task_search_vector
+from tasks.history import CoalescedHistoricalRecords, loaded_values
+from tasks.models.task_revision import HistoricalCheckpoint
+from tasks.transactions import OnCommitQueue
+from tasks.models.graph_revision import record_graph_change
 User = get_user_model()
 
+# Статусы, при которых задача не блокирует зависящие от неё задачи
+COMPLETED_STATUSES = ["done", "canceled"]
+
+
+def has_categories(category_ids=None, match_all=False):
+    """
+    Условие «задача входит в категории» - коррелированный EXISTS
+    по промежуточной таблице, без JOIN и DISTINCT во внешнем запросе.
+    Условия объединяются через &, | и ~.
+
+    Args:
+        category_ids (list): id категорий (None - любая категория)
+        match_all (bool): Задача должна входить во все категории, а не в любую
+    """
+    links = Task.categories.through.objects.filter(task_id=OuterRef("pk"))
+    if category_ids is None:
+        return Q(Exists(links))
+    if match_all:
+        return reduce(operator.and_, (
+            Q(Exists(links.filter(taskcategory_id=category_id)))
+            for category_id in category_ids
+        ), Q())
+    return Q(Exists(links.filter(taskcategory_id__in=category_ids)))
+
+
+def has_tags(names, match_all=False):
+    """
+    Условие «у задачи есть теги» - коррелированный EXISTS по TaggedItem.
+
+    Args:
+        names (list): Названия тегов
+        match_all (bool): У задачи должны быть все теги, а не любой
+    """
+    items = Task._meta.get_field("tags").through.objects.filter(
+        content_type=ContentType.objects.get_for_model(Task),
+        object_id=OuterRef("pk"),
+    )
+    if match_all:
+        return reduce(operator.and_, (
+            Q(Exists(items.filter(tag__name=name))) for name in names
+        ), Q())
+    return Q(Exists(items.filter(tag__name__in=names)))
+
+
+class TaskQuerySet(models.QuerySet):
+    """Набор запросов для задач с операциями над графом зависимостей"""
+
+    def dependents_of(self, task_ids):
+        """Задачи, напрямую зависящие от любой из task_ids"""
+        through = Task.dependencies.through
+        return self.filter(
+            pk__in=through.objects.filter(to_task_id__in=task_ids).values("from_task_id")
+        )
+
+    def touch(self, **fields):
+        """
+        UPDATE задач выборки с увеличением version и updated_at.
+
+        Через этот метод (или bump_version) проходят все set-based
+        изменения, видимые в представлении задачи, - иначе закэшированный
+        ответ (по id и version) останется прежним.
+        """
+        return self.bump_version(updated_at=timezone.now(), **fields)
+
+    def bump_version(self, **fields):
+        """
+        UPDATE задач выборки с увеличением только version - для
+        производных изменений (счётчики и прогресс зависимостей, списки
+        зависящих задач, названия категорий). Сами задачи не изменялись,
+        поэтому updated_at (Last-Modified, срок переноса в архив) прежний.
+        """
+        return self.update(version=F("version") + 1, **fields)
+
+    def with_actual_dependency_counts(self):
+        """
+        Аннотирует фактическое количество зависимостей (actual_total)
+        и выполненных зависимостей (actual_completed) подзапросами
+        к таблице зависимостей.
+        """
+        edges = (
+            Task.dependencies.through.objects
+            .filter(from_task_id=OuterRef("pk"))
+            .order_by()
+            .values("from_task_id")
+        )
+        total = edges.annotate(count=Count("*")).values("count")
+        completed = (
+            edges.filter(to_task__status__in=COMPLETED_STATUSES)
+            .annotate(count=Count("*"))
+            .values("count")
+        )
+        return self.annotate(
+            actual_total=Coalesce(Subquery(total), 0),
+            actual_completed=Coalesce(Subquery(completed), 0),
+        )
+
+    def recompute_dependency_counters(self):
+        """
+        Пересчитывает счётчики зависимостей задач выборки по таблице
+        зависимостей одним UPDATE с подзапросами. Значения вычисляются
+        в БД, а не дельтами от загруженного статуса, который мог устареть,
+        поэтому счётчики не расходятся с фактическими зависимостями.
+        """
+        counted = self.model.all_objects.with_actual_dependency_counts().filter(
+            pk=OuterRef("pk")
+        )
+        return self.bump_version(
+            dependencies_count=Subquery(counted.values("actual_total")),
+            completed_dependencies_count=Subquery(counted.values("actual_completed")),
+        )
+
+    def update_search_vector(self):
+        """
+        Пересчитывает поисковый вектор задач выборки одним UPDATE.
+        Вне PostgreSQL поисковый вектор не используется.
+        """
+        if not supports_search(self.db):
+            return 0
+        return self.update(search_vector=task_search_vector())
+
+    def recompute_dependency_progress(self):
+        """
+        Пересчитывает progress_dependencies и is_ready для всех задач выборки
+        по счётчикам зависимостей двумя UPDATE-запросами, без загрузки
+        объектов и без сигналов сохранения.
+
+        Returns:
+            int: Количество обновлённых задач
+        """
+        # Без зависимостей прогресс считается полным
+        progress = Case(
+            When(dependencies_count=0, then=Value(100)),
+            default=F("completed_dependencies_count") * 100 / F("dependencies_count"),
+            output_field=models.IntegerField(),
+        )
+
+        updated = self.bump_version(progress_dependencies=progress)
+        if updated:
+            # Целочисленный процент равен 100 только если выполнены все зависимости
+            self.update(
+                is_ready=Case(
+                    When(progress_dependencies=100, then=Value(True)),
+                    default=Value(False),
+                )
+            )
+        return updated
+
+
+class LiveTaskManager(models.Manager.from_queryset(TaskQuerySet)):
+    """
+    Менеджер неудалённых задач (Task.objects).
+
+    Условие is_deleted=False добавляется ко всем запросам и совпадает
+    с условием частичных индексов задачи.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
 
 class Task(models.Model):
     """
@@ -101,6 +270,28 @@ class Task(models.Model):
         verbose_name="Прогресс выполнения зависимостей"
     )
 
+    # Счётчики зависимостей: при изменении связей и статусов пересчитываются
+    # для затронутых задач по таблице зависимостей (recompute_dependency_counters)
+    dependencies_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Количество прямых зависимостей задачи",
+        verbose_name="Количество зависимостей"
+    )
+    completed_dependencies_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Количество выполненных или отменённых зависимостей",
+        verbose_name="Выполнено зависимостей"
+    )
+
+    # Поисковый вектор по названию и описанию (обновляется UPDATE-запросом)
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name="Поисковый вектор"
+    )
+
     # Временные параметры
     created_at = models.DateTimeField(
         auto_now_add=True,
@@ -262,6 +453,12 @@ class Task(models.Model):
         help_text="Версия объекта (инкрементируется при изменениях)",
         verbose_name="Версия"
     )
+    # Номер последней ревизии журнала изменений (см. tasks.history.next_revisions)
+    last_revision = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Последняя ревизия журнала"
+    )
 
     # Финансовые и системные атрибуты
     budget = models.DecimalField(
@@ -313,8 +510,15 @@ class Task(models.Model):
         help_text="Гибкая система тегов для категоризации задач",
         verbose_name="Теги"
     )
-    history = HistoricalRecords(
-        excluded_fields=["version", "is_deleted", "deleted_at"],
+    # История пишется при фиксации транзакции: одна ревизия на задачу,
+    # полные строки истории - только контрольные точки (см. tasks.history)
+    history = CoalescedHistoricalRecords(
+        bases=[HistoricalCheckpoint],
+        excluded_fields=[
+            "version", "is_deleted", "deleted_at",
+            "dependencies_count", "completed_dependencies_count",
+            "search_vector", "last_revision",
+        ],
         inherit=True,
         verbose_name="История изменений"
     )
@@ -335,9 +539,40 @@ class Task(models.Model):
         verbose_name="Ссылки"
     )
 
+    # Task.objects - только неудалённые задачи, Task.all_objects - все,
+    # включая мягко удалённые (менеджер по умолчанию для связей, админки
+    # и служебных операций Django)
+    objects = LiveTaskManager()
+    all_objects = TaskQuerySet.as_manager()
+
+    # Поля, изменяемые только set-based запросами
+    DERIVED_FIELDS = (
+        "dependencies_count", "completed_dependencies_count",
+        "progress_dependencies", "is_ready", "search_vector", "last_revision",
+    )
+
+    # Поля, из которых строится поисковый вектор
+    SEARCH_FIELDS = ("title", "description")
+
+    # Статус, признак удаления, текст для поиска и поля истории на момент
+    # загрузки из БД (для отслеживания изменений)
+    _loaded_status = None
+    _loaded_is_deleted = None
+    _loaded_search_text = None
+    _loaded_history_values = None
+
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get("status")
+        instance._loaded_is_deleted = instance.__dict__.get("is_deleted")
+        instance._loaded_search_text = instance.get_search_text()
+        instance._loaded_history_values = loaded_values(instance)
+        return instance
+
     def clean(self):
         """Валидация данных перед сохранением"""
         super().clean()
@@ -383,6 +618,9 @@ class Task(models.Model):
         """
         Полное удаление задачи из БД.
         """
+        # Отвязываем зависимости через M2M, чтобы обновилось замыкание графа
+        self.dependencies.clear()
+        self.dependent_tasks.clear()
         super().delete(*args, **kwargs)
 
     def restore(self):
@@ -398,7 +636,6 @@ class Task(models.Model):
         Переопределенный метод сохранения с автоматическим:
         1. Заполнением автора (при создании)
         2. Обновлением последнего редактора
-        3. Автоматическим расчетом progress_dependencies
         """
         # Автоматическое заполнение автора и редактора
         user = kwargs.pop('user', None)  # Пользователь должен передаваться из view
@@ -409,25 +646,74 @@ class Task(models.Model):
         else:
             if user:
                 self.last_editor = user
-        
-        super().save(*args, **kwargs)
 
-        old_status = None
-        if self.id:
-            old_status = Task.objects.filter(id=self.id).values_list('status', flat=True).first()
+        updating = not self._state.adding and not kwargs.get('force_insert')
+        if updating and kwargs.get('update_fields') is None and self.get_deferred_fields():
+            # Django сохранит только загруженные поля, перечислив их в
+            # update_fields; производные поля при этом не перечислены явно
+            kwargs['update_fields'] = {
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname in self.__dict__
+                and field.attname not in self.DERIVED_FIELDS
+            }
+        if updating and kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version', 'updated_at'}
 
         super().save(*args, **kwargs)
 
-        if old_status != self.status and self.status in ['done', 'canceled']:
-            for dependent_task in self.outgoing_dependencies.all():
-                all_deps_completed = True
-                for dep in dependent_task.dependencies.all():
-                    if dep.status not in ['done', 'canceled']:
-                        all_deps_completed = False
-                        break
-                if all_deps_completed and not dependent_task.is_ready:
-                    dependent_task.is_ready = True
-                    dependent_task.save()
+        if updating:
+            # Новое значение версии загрузится из БД при первом обращении
+            self.__dict__.pop('version', None)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        """
+        UPDATE сохраняемой загруженной задачи.
+
+        Счётчики и прогресс зависимостей, готовность и поисковый вектор
+        меняются только set-based запросами: загруженные значения не
+        перезаписывают их, если поля не перечислены в update_fields явно. Версия
+        увеличивается в БД, а не по загруженному значению, чтобы
+        параллельные сохранения не получили одинаковую версию.
+        Если строки уже нет, Django выполнит INSERT со значениями объекта.
+        """
+        if not self._state.adding:
+            explicit = set(update_fields or ())
+            values = [
+                (field, model, F('version') + 1 if field.attname == 'version' else value)
+                for field, model, value in values
+                if field.attname not in self.DERIVED_FIELDS or field.attname in explicit
+            ]
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+    def get_search_text(self):
+        """Значения полей поискового вектора (None, если не загружены)"""
+        if any(name not in self.__dict__ for name in self.SEARCH_FIELDS):
+            return None
+        return tuple(self.__dict__[name] for name in self.SEARCH_FIELDS)
+
+    def search_text_changed(self, update_fields=None):
+        """Изменились ли поля поискового вектора относительно загруженных из БД"""
+        if update_fields is not None and not set(update_fields) & set(self.SEARCH_FIELDS):
+            return False
+        return (
+            self._loaded_search_text is None
+            or self._loaded_search_text != self.get_search_text()
+        )
+
+    def completion_changed(self, update_fields=None):
+        """
+        Меняется ли статус между «выполнена» и «не выполнена»
+        относительно загруженного из БД значения.
+        """
+        if update_fields is not None and 'status' not in update_fields:
+            return False
+        if self._loaded_status is None:
+            return True
+        return (
+            (self._loaded_status in COMPLETED_STATUSES)
+            != (self.status in COMPLETED_STATUSES)
+        )
 
     def update_dependencies_progress(self):
         """
@@ -436,20 +722,8 @@ class Task(models.Model):
         - Обновляет поле progress_dependencies
         - Автоматически обновляет is_ready
         """
-        dependencies = self.dependencies.all()
-        total_count = dependencies.count()
-        
-        if total_count == 0:
-            self.progress_dependencies = 100
-            self.is_ready = True
-        else:
-            completed_count = dependencies.filter(
-                status__in=['done', 'canceled']
-            ).count()
-            self.progress_dependencies = int((completed_count / total_count) * 100)
-            self.is_ready = (completed_count == total_count)
-        
-        self.save(update_fields=[
+        Task.all_objects.filter(pk=self.pk).recompute_dependency_progress()
+        self.refresh_from_db(fields=[
             'progress_dependencies',
             'is_ready',
             'updated_at'
@@ -477,17 +751,48 @@ class Task(models.Model):
         verbose_name = "Задача"
         verbose_name_plural = "Задачи"
         ordering = ["-created_at"]
+        default_manager_name = "all_objects"
+        base_manager_name = "all_objects"
         indexes = [
             # Составной индекс для фильтрации по статусу и удалённым задачам
             models.Index(fields=["is_deleted", "status"]),
 
-            # Индекс для быстрого поиска по дедлайну
-            models.Index(fields=["deadline"]),
-
-            # Дополнительные индексы для частых запросов
-            models.Index(fields=["priority"]),
-            models.Index(fields=["assignee"]),
-            models.Index(fields=["is_ready"]),
+            # Частичные индексы по неудалённым задачам (условие Task.objects)
+            models.Index(
+                fields=["deadline"],
+                condition=models.Q(is_deleted=False),
+                name="task_live_deadline_idx",
+            ),
+            models.Index(
+                fields=["priority"],
+                condition=models.Q(is_deleted=False),
+                name="task_live_priority_idx",
+            ),
+            models.Index(
+                fields=["assignee"],
+                condition=models.Q(is_deleted=False),
+                name="task_live_assignee_idx",
+            ),
+            models.Index(
+                fields=["is_ready"],
+                condition=models.Q(is_deleted=False),
+                name="task_live_is_ready_idx",
+            ),
+
+            # Полнотекстовый поиск и нечёткий поиск по названию (PostgreSQL)
+            GinIndex(fields=["search_vector"], name="task_search_vector_gin"),
+            GinIndex(
+                fields=["title"],
+                opclasses=["gin_trgm_ops"],
+                name="task_title_trgm_gin",
+            ),
+
+            # Подсказки по началу названия (title__istartswith, PostgreSQL)
+            models.Index(
+                OpClass(Upper("title"), name="text_pattern_ops"),
+                condition=models.Q(is_deleted=False),
+                name="task_title_prefix_idx",
+            ),
         ]
 
         permissions = [
@@ -496,52 +801,185 @@ class Task(models.Model):
             ("can_restore_task", "Может восстанавливать удаленные задачи"),
         ]
 
+class DependencyProgressQueue(OnCommitQueue):
+    """
+    Очередь задач на пересчёт прогресса зависимостей в рамках транзакции.
+
+    Собирает id задач со всех изменений и при фиксации транзакции
+    пересчитывает каждую задачу один раз одним пакетным запросом.
+
+    Attributes:
+        task_ids (set): Задачи, чей прогресс нужно пересчитать
+        dependency_ids (set): Задачи, у зависящих от которых нужно пересчитать прогресс
+    """
+
+    connection_attribute = "_dependency_progress_queue"
+
+    def __init__(self):
+        self.task_ids = set()
+        self.dependency_ids = set()
+
+    def add(self, task_ids=(), dependents_of=()):
+        self.task_ids.update(task_ids)
+        self.dependency_ids.update(dependents_of)
+
+    def flush(self):
+        task_ids, self.task_ids = self.task_ids, set()
+        dependency_ids, self.dependency_ids = self.dependency_ids, set()
+
+        queryset = Task.all_objects.none()
+        if task_ids:
+            queryset = queryset | Task.all_objects.filter(pk__in=task_ids)
+        if dependency_ids:
+            queryset = queryset | Task.objects.dependents_of(dependency_ids)
+        if task_ids or dependency_ids:
+            recomputed_ids = list(queryset.values_list('pk', flat=True))
+            Task.all_objects.filter(pk__in=recomputed_ids).recompute_dependency_progress()
+            # Прогресс зависимостей виден на графе - отмечаем задачи в журнале
+            record_graph_change(recomputed_ids)
+
+
+def mark_dependency_progress_dirty(task_ids=(), dependents_of=(), using=None):
+    """
+    Откладывает пересчёт прогресса зависимостей до фиксации транзакции.
+
+    Args:
+        task_ids: Задачи, чей прогресс нужно пересчитать
+        dependents_of: Задачи, у зависящих от которых нужно пересчитать прогресс
+        using: Алиас базы данных
+    """
+    DependencyProgressQueue.enqueue(task_ids, dependents_of, using=using)
+
+
 @receiver(post_save, sender=Task)
-def update_dependencies_on_status_change(sender, instance, **kwargs):
+def update_dependencies_on_status_change(sender, instance, created, **kwargs):
     """
-    Обновляет прогресс зависимостей родительских задач при:
-    - Изменении статуса текущей задачи
-    - Создании/изменении зависимостей
+    Обновляет прогресс зависимостей и готовность задач, зависящих от текущей,
+    когда она становится выполненной/отменённой или перестаёт быть таковой.
     """
-    update_fields = kwargs.get('update_fields', []) or []
-    
-    # Проверяем изменение статуса или создание новой задачи
-    if kwargs.get('created') or 'status' in update_fields:
-        # Обновляем все задачи, где текущая является зависимостью
-        for parent_task in instance.outgoing_dependencies.all():
-            parent_task.update_dependencies_progress()
+    # У новой задачи ещё нет зависящих от неё задач
+    if not created and instance.completion_changed(kwargs.get('update_fields')):
+        Task.all_objects.dependents_of([instance.pk]).recompute_dependency_counters()
+        mark_dependency_progress_dirty(dependents_of=[instance.pk])
+    instance._loaded_status = instance.status
+
+
 @receiver(post_save, sender=Task)
-def update_dependent_tasks(sender, instance, **kwargs):
+def record_task_graph_change(sender, instance, created, **kwargs):
     """
-    Обновляет прогресс выполнения для всех задач, которые зависят от текущей
+    Записывает изменение задачи в журнал графа (GraphChange).
+
+    При мягком удалении или восстановлении меняется видимость связей
+    задачи, поэтому в журнал попадают и зависящие от неё задачи.
     """
-    # Получаем все задачи, где текущая задача является зависимостью
-    dependent_tasks = Task.objects.filter(
-        dependencies=instance,
-        is_deleted=False
-    ).prefetch_related('dependencies').distinct()
-    
-    # Обновляем прогресс для каждой зависимой задачи
-    for task in dependent_tasks:
-        task.update_dependencies_progress()
+    task_ids = [instance.pk]
+    if not created and instance._loaded_is_deleted != instance.is_deleted:
+        task_ids += list(instance.dependent_tasks.values_list('id', flat=True))
+    record_graph_change(task_ids, using=kwargs.get('using'))
+    instance._loaded_is_deleted = instance.is_deleted
+
+
+@receiver(post_save, sender=Task)
+def update_task_search_vector(sender, instance, created, **kwargs):
+    """Пересчитывает поисковый вектор при изменении названия или описания"""
+    if created or instance.search_text_changed(kwargs.get('update_fields')):
+        Task.all_objects.using(kwargs.get('using')).filter(pk=instance.pk).update_search_vector()
+    instance._loaded_search_text = instance.get_search_text()
+
+
+@receiver(post_delete, sender=Task)
+def record_task_graph_removal(sender, instance, **kwargs):
+    """Записывает полное удаление задачи в журнал графа"""
+    record_graph_change([instance.pk], using=kwargs.get('using'))
 
 
 @receiver(m2m_changed, sender=Task.dependencies.through)
-def update_dependencies_on_change(sender, instance, action, **kwargs):
+def update_dependencies_on_change(sender, instance, action, reverse=False, pk_set=None, **kwargs):
     """
     Обрабатывает изменения в зависимостях:
     - При добавлении/удалении зависимостей
     - При очистке зависимостей
+    - Поддерживает таблицу транзитивного замыкания (TaskClosure)
+
+    При reverse=True изменение сделано со стороны dependent_tasks:
+    instance - зависимость, pk_set - зависящие от неё задачи.
     """
-    if action in ['post_add', 'post_remove', 'post_clear']:
-        # Отложенное обновление через транзакцию
-        transaction.on_commit(
-            lambda: instance.update_dependencies_progress()
+    related = instance.dependent_tasks if reverse else instance.dependencies
+    if action == 'pre_clear':
+        # После очистки pk_set не передаётся - запоминаем затронутые задачи
+        instance._cleared_dependency_ids = set(related.values_list('id', flat=True))
+        return
+    if action == 'pre_remove':
+        # В pk_set могут быть и несвязанные задачи - запоминаем реально удаляемые
+        instance._removed_dependency_ids = set(
+            related.filter(pk__in=pk_set).values_list('id', flat=True)
         )
-        
-        # Если добавляются новые зависимости
-        if action == 'post_add' and kwargs.get('pk_set'):
-            # Обновляем задачи, которые были добавлены как зависимости
-            for dep_pk in kwargs['pk_set']:
-                dep_task = Task.objects.get(pk=dep_pk)
-                dep_task.update_dependencies_progress()
\ No newline at end of file
+        return
+
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_dependency_ids', set())
+    if action == 'post_remove':
+        pk_set = instance.__dict__.pop('_removed_dependency_ids', set())
+
+    if action not in ['post_add', 'post_remove', 'post_clear'] or not pk_set:
+        return
+
+    update_dependency_counters(instance, action, reverse, pk_set)
+    update_dependency_closure(instance, action, reverse, pk_set)
+    # У зависимостей меняется список outgoing_dependencies (и версия)
+    Task.all_objects.filter(pk__in=[instance.pk] if reverse else pk_set).bump_version()
+    # Прогресс и набор входящих рёбер меняются у задачи, чьи зависимости изменились
+    changed_ids = pk_set if reverse else [instance.pk]
+    mark_dependency_progress_dirty(task_ids=changed_ids)
+    record_graph_change(changed_ids, using=kwargs.get('using'))
+
+
+@receiver(m2m_changed, sender=Task.categories.through)
+@receiver(m2m_changed, sender=Task.notifications.through)
+@receiver(m2m_changed, sender=Task.tags.through)
+def touch_tasks_on_relation_change(sender, instance, action, reverse=False, pk_set=None, **kwargs):
+    """Увеличивает версию задач при изменении категорий, уведомлений и тегов"""
+    if action not in ['post_add', 'post_remove', 'post_clear']:
+        return
+    if not reverse:
+        # Модель тегов общая для всех моделей с TaggableManager
+        if isinstance(instance, Task):
+            Task.all_objects.filter(pk=instance.pk).touch()
+    elif pk_set:
+        Task.all_objects.filter(pk__in=pk_set).touch()
+
+
+@receiver(post_save, sender=TaskCategory)
+@receiver(pre_delete, sender=TaskCategory)
+def bump_versions_on_category_change(sender, instance, created=False, **kwargs):
+    """
+    Увеличивает версию задач категории при её изменении или удалении:
+    название категории входит в представление задачи (category_names),
+    а сами задачи при этом не сохраняются.
+    """
+    if not created:
+        Task.all_objects.filter(categories=instance).bump_version()
+
+
+def update_dependency_counters(instance, action, reverse, pk_set):
+    """
+    Пересчитывает счётчики зависимостей задач, у которых изменился
+    набор зависимостей: instance при reverse=False, задачи pk_set
+    при reverse=True.
+    """
+    task_ids = pk_set if reverse else [instance.pk]
+    Task.all_objects.filter(pk__in=task_ids).recompute_dependency_counters()
+
+
+def update_dependency_closure(instance, action, reverse, pk_set):
+    """Синхронизирует TaskClosure с изменением рёбер зависимостей"""
+    from tasks.models.task_closure import TaskClosure
+
+    if action == 'post_add':
+        for pk in pk_set:
+            if reverse:
+                TaskClosure.objects.add_edge(pk, instance.pk)
+            else:
+                TaskClosure.objects.add_edge(instance.pk, pk)
+    else:
+        TaskClosure.objects.refresh_descendants(pk_set if reverse else {instance.pk})
@@ -0,0 +1,224 @@
+from itertools import islice
+
+from django.db import models, transaction
+
+from tasks.models.task import Task
+
+
+def compute_ancestors(dependencies_map, known_ancestors=None):
+    """
+    Вычисляет транзитивные зависимости (предков) для задач графа.
+
+    Args:
+        dependencies_map (dict): {id задачи: итерируемое id прямых зависимостей}
+        known_ancestors (dict): Уже известные предки задач вне dependencies_map
+
+    Returns:
+        dict: {id задачи: set id всех её предков} для каждого ключа dependencies_map
+    """
+    known_ancestors = known_ancestors or {}
+    result = {}
+    in_progress = set()
+
+    for root in dependencies_map:
+        if root in result:
+            continue
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node in result:
+                continue
+            if expanded:
+                ancestors = set()
+                for dep in dependencies_map.get(node, ()):
+                    ancestors.add(dep)
+                    if dep in result:
+                        ancestors |= result[dep]
+                    else:
+                        ancestors |= known_ancestors.get(dep, set())
+                result[node] = ancestors
+                in_progress.discard(node)
+                continue
+            if node in in_progress:
+                # Защита от зацикливания при повреждённом графе
+                continue
+            in_progress.add(node)
+            stack.append((node, True))
+            for dep in dependencies_map.get(node, ()):
+                if dep in dependencies_map and dep not in result:
+                    stack.append((dep, False))
+    return result
+
+
+def iter_closure_pairs(edges):
+    """
+    Строит транзитивное замыкание по списку рёбер (task_id, dependency_id).
+
+    Yields:
+        tuple: (ancestor_id, descendant_id)
+    """
+    dependencies_map = {}
+    for task_id, dependency_id in edges:
+        dependencies_map.setdefault(task_id, []).append(dependency_id)
+
+    for task_id, ancestors in compute_ancestors(dependencies_map).items():
+        for ancestor_id in ancestors:
+            yield ancestor_id, task_id
+
+
+class TaskClosureManager(models.Manager):
+    """Запросы и сопровождение таблицы транзитивного замыкания"""
+
+    def _bulk_insert(self, pairs, batch_size, ignore_conflicts=False):
+        """Пакетная вставка пар (ancestor_id, descendant_id) без материализации списка"""
+        pairs = iter(pairs)
+        total = 0
+        while True:
+            batch = [
+                self.model(ancestor_id=ancestor_id, descendant_id=descendant_id)
+                for ancestor_id, descendant_id in islice(pairs, batch_size)
+            ]
+            if not batch:
+                return total
+            self.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+            total += len(batch)
+
+    def ancestor_ids(self, task_id):
+        """Все задачи, от которых транзитивно зависит задача"""
+        return set(
+            self.filter(descendant_id=task_id).values_list("ancestor_id", flat=True)
+        )
+
+    def descendant_ids(self, task_id):
+        """Все задачи, транзитивно зависящие от задачи"""
+        return set(
+            self.filter(ancestor_id=task_id).values_list("descendant_id", flat=True)
+        )
+
+    def is_reachable(self, ancestor_id, descendant_id):
+        """Зависит ли descendant_id (транзитивно) от ancestor_id"""
+        return self.filter(
+            ancestor_id=ancestor_id, descendant_id=descendant_id
+        ).exists()
+
+    def add_edge(self, task_id, dependency_id, batch_size=5000):
+        """
+        Учитывает новое ребро task -> dependency:
+        все предки dependency становятся предками task и всех её потомков.
+        """
+        ancestors = self.ancestor_ids(dependency_id) | {dependency_id}
+        descendants = self.descendant_ids(task_id) | {task_id}
+        self._bulk_insert(
+            (
+                (ancestor_id, descendant_id)
+                for ancestor_id in ancestors
+                for descendant_id in descendants
+            ),
+            batch_size,
+            ignore_conflicts=True,
+        )
+
+    def refresh_descendants(self, task_ids, batch_size=5000):
+        """
+        Пересчитывает замыкание для задач и всех их потомков.
+
+        Используется после удаления рёбер: в DAG нельзя просто вычесть
+        пары, так как к предку может вести другой путь.
+        """
+        task_ids = set(task_ids)
+        if not task_ids:
+            return
+        affected = task_ids | set(
+            self.filter(ancestor_id__in=task_ids).values_list("descendant_id", flat=True)
+        )
+
+        through = Task.dependencies.through
+        dependencies_map = {task_id: [] for task_id in affected}
+        for task_id, dependency_id in through.objects.filter(
+            from_task_id__in=affected
+        ).values_list("from_task_id", "to_task_id"):
+            dependencies_map[task_id].append(dependency_id)
+
+        # Предки внешних зависимостей не меняются - берём их из таблицы
+        external = {
+            dep for deps in dependencies_map.values() for dep in deps
+        } - affected
+        known_ancestors = {dep: set() for dep in external}
+        for ancestor_id, descendant_id in self.filter(
+            descendant_id__in=external
+        ).values_list("ancestor_id", "descendant_id"):
+            known_ancestors[descendant_id].add(ancestor_id)
+
+        ancestors_map = compute_ancestors(dependencies_map, known_ancestors)
+
+        with transaction.atomic():
+            self.filter(descendant_id__in=affected).delete()
+            self._bulk_insert(
+                (
+                    (ancestor_id, task_id)
+                    for task_id, ancestors in ancestors_map.items()
+                    for ancestor_id in ancestors
+                ),
+                batch_size,
+            )
+
+    def rebuild(self, batch_size=5000):
+        """Полностью перестраивает таблицу по текущим зависимостям"""
+        edges = Task.dependencies.through.objects.values_list(
+            "from_task_id", "to_task_id"
+        )
+        with transaction.atomic():
+            self.all().delete()
+            return self._bulk_insert(
+                iter_closure_pairs(edges.iterator()), batch_size
+            )
+
+
+class TaskClosure(models.Model):
+    """
+    Транзитивное замыкание графа зависимостей задач.
+
+    Строка (ancestor, descendant) означает, что descendant прямо или
+    через цепочку задач зависит от ancestor. Позволяет одним индексным
+    запросом получать всех предков/потомков и проверять достижимость.
+
+    Attributes:
+        ancestor (ForeignKey): Задача, которую нужно выполнить раньше
+        descendant (ForeignKey): Задача, зависящая от ancestor
+    """
+
+    ancestor = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name="descendant_links",
+        db_index=False,
+        verbose_name="Предок",
+    )
+    descendant = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name="ancestor_links",
+        db_index=False,
+        verbose_name="Потомок",
+    )
+
+    objects = TaskClosureManager()
+
+    def __str__(self):
+        return f"{self.ancestor_id} → {self.descendant_id}"
+
+    class Meta:
+        """
+        Метаданные модели TaskClosure.
+
+        Attributes:
+            unique_together (tuple): Пара задач хранится один раз
+            indexes (list): Обратный индекс для поиска предков
+        """
+
+        unique_together = ("ancestor", "descendant")
+        verbose_name = "Транзитивная зависимость"
+        verbose_name_plural = "Транзитивные зависимости"
+        indexes = [
+            models.Index(fields=["descendant", "ancestor"]),
+        ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from tasks.models.task import Task
 from tasks.models.link import Link
 
@@ -62,3 +64,10 @@ class TaskLink(models.Model):
             models.Index(fields=["created_at"]),
         ]
         ordering = ("-created_at",)
+
+
+@receiver(post_save, sender=TaskLink)
+@receiver(post_delete, sender=TaskLink)
+def touch_task_on_link_change(sender, instance, **kwargs):
+    """Увеличивает версию задачи при изменении её ссылок"""
+    Task.all_objects.filter(pk=instance.task_id).touch()
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class HistoricalCheckpoint(models.Model):
+    """
+    Базовый класс модели истории задач (HistoricalTask).
+
+    Полная строка истории пишется не на каждое изменение, а как
+    контрольная точка: при создании и удалении задачи и раз в
+    CHECKPOINT_INTERVAL ревизий (см. tasks.history). Страница истории
+    задачи в админке выводит ревизии журнала TaskRevision, а не эти строки.
+
+    Attributes:
+        history_revision (PositiveIntegerField): Номер ревизии TaskRevision,
+            состояние после которой хранит строка
+    """
+
+    history_revision = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Ревизия",
+    )
+
+    class Meta:
+        abstract = True
+
+
+class TaskRevision(models.Model):
+    """
+    Ревизия задачи в журнале изменений.
+
+    Хранит только изменившиеся поля задачи. Состояние на любую ревизию
+    восстанавливается от ближайшей предыдущей контрольной точки
+    (HistoricalTask с history_revision) применением изменений после неё.
+
+    Ревизии не ссылаются на задачу внешним ключом и переживают её
+    перенос в архив. Ревизии старше срока хранения истории удаляются
+    командой prune_task_history вместе с секциями контрольных точек.
+
+    Attributes:
+        task_id (BigIntegerField): id задачи
+        revision (PositiveIntegerField): Номер ревизии задачи, начиная с 1
+        history_type (CharField): Тип изменения: "+", "~" или "-"
+        history_date (DateTimeField): Время изменения
+        history_user (ForeignKey): Автор изменения
+        changes (JSONField): Новые значения изменившихся полей {attname: значение}
+    """
+
+    HISTORY_TYPES = (
+        ("+", "Создание"),
+        ("~", "Изменение"),
+        ("-", "Удаление"),
+    )
+
+    task_id = models.BigIntegerField(
+        verbose_name="ID задачи",
+    )
+    revision = models.PositiveIntegerField(
+        verbose_name="Ревизия",
+    )
+    history_type = models.CharField(
+        max_length=1,
+        choices=HISTORY_TYPES,
+        verbose_name="Тип изменения",
+    )
+    history_date = models.DateTimeField(
+        db_index=True,
+        verbose_name="Дата изменения",
+    )
+    history_user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Автор изменения",
+    )
+    changes = models.JSONField(
+        encoder=DjangoJSONEncoder,
+        default=dict,
+        verbose_name="Изменённые поля",
+    )
+
+    def __str__(self):
+        return f"Задача {self.task_id}, ревизия {self.revision}"
+
+    class Meta:
+        verbose_name = "Ревизия задачи"
+        verbose_name_plural = "Ревизии задач"
+        ordering = ("task_id", "-revision")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("task_id", "revision"),
+                name="task_revision_unique",
+            ),
+        ]
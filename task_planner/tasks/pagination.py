@@ -0,0 +1,246 @@
+import json
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+# Значения по умолчанию переопределяются в settings.TASKS_PAGINATION
+PAGINATION_DEFAULTS = {
+    "PAGE_SIZE": 50,
+    "MAX_PAGE_SIZE": 500,
+    "STREAM_CHUNK_SIZE": 500,
+}
+
+
+def pagination_setting(name):
+    """Настройка постраничного вывода задач с учётом settings.TASKS_PAGINATION"""
+    return getattr(settings, "TASKS_PAGINATION", {}).get(
+        name, PAGINATION_DEFAULTS[name]
+    )
+
+
+def keyset_filter(name, value, pk, descending, nullable, before=False):
+    """
+    Условие keyset по (поле name, id): строки после позиции (value, pk)
+    в порядке пагинации или, при before, перед ней. NULL в поле идут
+    после всех значений в обоих направлениях сортировки.
+    """
+    after = "lt" if descending else "gt"
+    lookup = ({"gt": "lt", "lt": "gt"}[after]) if before else after
+    if value is None:
+        if before:
+            return Q(**{f"{name}__isnull": False}) | Q(
+                **{f"{name}__isnull": True, f"id__{lookup}": pk}
+            )
+        return Q(**{f"{name}__isnull": True, f"id__{lookup}": pk})
+
+    condition = Q(**{f"{name}__{lookup}": value}) | Q(**{name: value, f"id__{lookup}": pk})
+    if nullable and not before:
+        condition |= Q(**{f"{name}__isnull": True})
+    return condition
+
+
+class TaskCursorPagination(CursorPagination):
+    """
+    Курсорная keyset-пагинация списка задач по (поле сортировки, id),
+    по умолчанию (-created_at, -id).
+
+    Курсор хранит значения обоих полей последней (или, для ссылки назад,
+    первой) строки страницы; следующая страница выбирается условием
+    (поле, id) > (значение, id) без OFFSET, поэтому глубокие страницы
+    стоят столько же, сколько первая, в том числе при сортировке по
+    полю с частыми повторами (priority, progress). Из ?ordering=
+    используется первое поле, id - второй ключ в том же направлении.
+    NULL (deadline) идут последними. Размер страницы ограничен сверху
+    max_page_size.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+
+    def __init__(self):
+        self.page_size = pagination_setting("PAGE_SIZE")
+        self.max_page_size = pagination_setting("MAX_PAGE_SIZE")
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Ключ пагинации: (первое поле сортировки, id). При поиске без
+        явного ?ordering= - сначала наиболее релевантные.
+        """
+        if (
+            "search_rank" in queryset.query.annotations
+            and not request.query_params.get(api_settings.ORDERING_PARAM)
+        ):
+            first = "-search_rank"
+        else:
+            first = super().get_ordering(request, queryset, view)[0]
+        if first.lstrip("-") in ("id", "pk"):
+            return (first.replace("pk", "id"),)
+        return (first, "-id" if first.startswith("-") else "id")
+
+    def order_expressions(self, reverse=False):
+        """Выражения ORDER BY ключа; NULL - в конце прямого порядка"""
+        expressions = []
+        for name in self.ordering:
+            descending = name.startswith("-") != reverse
+            field = F(name.lstrip("-"))
+            if reverse:
+                expressions.append(
+                    field.desc(nulls_first=True) if descending else field.asc(nulls_first=True)
+                )
+            else:
+                expressions.append(
+                    field.desc(nulls_last=True) if descending else field.asc(nulls_last=True)
+                )
+        return expressions
+
+    def key_field(self, queryset):
+        """Поле модели первого ключа (None - аннотация, например search_rank)"""
+        name = self.ordering[0].lstrip("-")
+        if name in queryset.query.annotations:
+            return None
+        return queryset.model._meta.get_field(name)
+
+    def encode_position(self, item):
+        """Позиция строки страницы для курсора: JSON [значение поля, id]"""
+        values = []
+        for name in self.ordering:
+            name = name.lstrip("-")
+            value = item[name] if isinstance(item, dict) else getattr(item, name)
+            if hasattr(value, "isoformat"):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            values.append(value)
+        return json.dumps(values)
+
+    def decode_position(self, position, queryset):
+        """(значение поля, id) из позиции курсора"""
+        try:
+            values = json.loads(position)
+            if len(values) != len(self.ordering):
+                raise ValueError
+            field = self.key_field(queryset)
+            if len(values) == 1:
+                return None, int(values[0])
+            value, pk = values
+            if field is not None and value is not None:
+                value = field.to_python(value)
+            return value, int(pk)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message) from None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        queryset = queryset.order_by(*self.order_expressions(reverse))
+        if self.cursor is not None and self.cursor.position is not None:
+            value, pk = self.decode_position(self.cursor.position, queryset)
+            if len(self.ordering) == 1:
+                lookup = "lt" if self.ordering[0].startswith("-") != reverse else "gt"
+                queryset = queryset.filter(**{f"id__{lookup}": pk})
+            else:
+                field = self.key_field(queryset)
+                queryset = queryset.filter(keyset_filter(
+                    self.ordering[0].lstrip("-"),
+                    value,
+                    pk,
+                    descending=self.ordering[0].startswith("-"),
+                    nullable=field is not None and field.null,
+                    before=reverse,
+                ))
+
+        # Лишняя строка показывает, есть ли страница дальше
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        if self.has_next and self.page:
+            self.next_position = self.encode_position(self.page[-1])
+        if self.has_previous and self.page:
+            self.previous_position = self.encode_position(self.page[0])
+        self.has_next = self.has_next and bool(self.page)
+        self.has_previous = self.has_previous and bool(self.page)
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
+
+
+class OverdueTaskCursorPagination(TaskCursorPagination):
+    """Просроченные задачи: сначала наиболее давно просроченные"""
+
+    ordering = ("deadline", "id")
+
+
+class TaskHistoryCursorPagination(TaskCursorPagination):
+    """История изменений задачи: сначала последние ревизии"""
+
+    ordering = ("-revision",)
+
+
+def is_stream_requested(request):
+    """Запрошен ли потоковый вывод всего списка (?stream=true)"""
+    return request.query_params.get("stream") in ("true", "1")
+
+
+def stream_json_array(queryset, serialize, chunk_size=None):
+    """
+    Потоковый JSON-массив по всему queryset.
+
+    Объекты читаются серверным курсором (iterator) пачками по chunk_size
+    и сериализуются попачечно, поэтому память не растёт с размером выборки.
+
+    Args:
+        queryset (QuerySet): Выборка в нужном порядке
+        serialize (callable): Функция list объектов -> list словарей
+        chunk_size (int): Размер пачки (по умолчанию STREAM_CHUNK_SIZE)
+
+    Returns:
+        StreamingHttpResponse: Ответ application/json
+    """
+    chunk_size = chunk_size or pagination_setting("STREAM_CHUNK_SIZE")
+
+    def generate():
+        objects = queryset.iterator(chunk_size=chunk_size)
+        separator = "["
+        while True:
+            chunk = list(islice(objects, chunk_size))
+            if not chunk:
+                break
+            for item in serialize(chunk):
+                yield separator + json.dumps(item, cls=JSONEncoder, ensure_ascii=False)
+                separator = ","
+        yield "[]" if separator == "[" else "]"
+
+    return StreamingHttpResponse(generate(), content_type="application/json")
@@ -0,0 +1,76 @@
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson подключается по желанию
+    orjson = None
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def require_orjson():
+    """Проверка, что пакет orjson установлен"""
+    if orjson is None:
+        raise ImproperlyConfigured(
+            "Для ORJSONRenderer/ORJSONParser требуется пакет orjson"
+        )
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson.
+
+    datetime сериализуется orjson без Python-кода (UTC как "Z"),
+    Decimal, timedelta и прочие типы - тем же JSONEncoder, что и у
+    стандартного рендерера, поэтому ответ совпадает по содержанию.
+    Если orjson не может представить значение (например, целое больше
+    64 бит), используется стандартный рендерер.
+
+    Подключается в REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"].
+    """
+
+    encoder = JSONEncoder()
+
+    def __init__(self, *args, **kwargs):
+        require_orjson()
+        super().__init__(*args, **kwargs)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type or "", renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+
+        try:
+            return orjson.dumps(data, default=self.encoder.default, option=option)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class ORJSONParser(JSONParser):
+    """
+    Разбор тела запроса JSON на orjson.
+
+    Подключается в REST_FRAMEWORK["DEFAULT_PARSER_CLASSES"].
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def __init__(self, *args, **kwargs):
+        require_orjson()
+        super().__init__(*args, **kwargs)
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", "utf-8")
+        body = stream.read()
+        if encoding.lower().replace("-", "") != "utf8":
+            body = body.decode(encoding)
+        try:
+            return orjson.loads(body)
+        except (orjson.JSONDecodeError, UnicodeDecodeError) as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,138 @@
+from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db import connections
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
+from rest_framework import filters
+
+# Конфигурация полнотекстового поиска PostgreSQL (морфология русского языка)
+SEARCH_CONFIG = "russian"
+
+# Количество подсказок по названию задачи: по умолчанию и максимум
+TYPEAHEAD_LIMIT = 10
+TYPEAHEAD_MAX_LIMIT = 50
+
+# Поля задачи в ответе подсказок
+TYPEAHEAD_FIELDS = ("id", "title", "status")
+
+
+def task_search_vector():
+    """
+    Выражение поискового вектора задачи: название с весом A,
+    описание с весом B. Хранится в Task.search_vector.
+    """
+    return (
+        SearchVector("title", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+    )
+
+
+def supports_search(using):
+    """Доступен ли полнотекстовый и триграммный поиск PostgreSQL"""
+    return connections[using].vendor == "postgresql"
+
+
+def search_tasks(queryset, text, extra=None):
+    """
+    Поиск задач по тексту.
+
+    На PostgreSQL задача находится, если текст совпадает с поисковым
+    вектором (GIN-индекс по search_vector), нечётко совпадает с названием
+    (триграммный GIN-индекс по title) или равен логину исполнителя.
+    Выборка аннотируется релевантностью search_rank: ранг полнотекстового
+    совпадения плюс триграммная близость названия.
+
+    На других СУБД используется поиск подстроки (icontains) без ранжирования.
+
+    Args:
+        queryset (QuerySet): Выборка задач
+        text (str): Поисковая строка
+        extra (Q): Дополнительное условие, объединяемое по ИЛИ
+
+    Returns:
+        QuerySet: Найденные задачи
+    """
+    text = text.strip()
+    if not text:
+        return queryset
+
+    extra = extra or Q()
+
+    if not supports_search(queryset.db):
+        return queryset.filter(
+            Q(title__icontains=text)
+            | Q(description__icontains=text)
+            | Q(assignee__username__icontains=text)
+            | extra
+        )
+
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+    assignees = get_user_model().objects.filter(username__iexact=text).values("pk")
+    return queryset.annotate(
+        # У задач без поискового вектора (NULL) ранг совпадения равен нулю
+        search_rank=Coalesce(SearchRank(F("search_vector"), query), 0.0)
+        + TrigramWordSimilarity(text, "title")
+    ).filter(
+        Q(search_vector=query)
+        | Q(title__trigram_word_similar=text)
+        | Q(assignee__in=assignees)
+        | extra
+    )
+
+
+def typeahead_tasks(queryset, text, limit=TYPEAHEAD_LIMIT):
+    """
+    Подсказки по названию задачи для полей выбора с автодополнением.
+
+    Сначала берутся задачи, название которых начинается с text
+    (диапазон по индексу UPPER(title) text_pattern_ops), в алфавитном
+    порядке. Если их меньше limit, список дополняется нечёткими
+    совпадениями по триграммному индексу (на других СУБД - по подстроке).
+
+    Args:
+        queryset (QuerySet): Задачи, среди которых ищутся подсказки
+        text (str): Введённая часть названия
+        limit (int): Максимальное количество подсказок
+
+    Returns:
+        list: Словари с полями TYPEAHEAD_FIELDS
+    """
+    text = text.strip()
+    if not text:
+        return []
+
+    matches = list(
+        queryset.filter(title__istartswith=text)
+        .order_by("title")
+        .values(*TYPEAHEAD_FIELDS)[:limit]
+    )
+    if len(matches) >= limit:
+        return matches
+
+    rest = queryset.exclude(pk__in=[match["id"] for match in matches])
+    if supports_search(queryset.db):
+        rest = rest.filter(title__trigram_word_similar=text).order_by(
+            TrigramWordSimilarity(text, "title").desc(), "title"
+        )
+    else:
+        rest = rest.filter(title__icontains=text).order_by("title")
+    return matches + list(rest.values(*TYPEAHEAD_FIELDS)[:limit - len(matches)])
+
+
+class TaskSearchFilter(filters.SearchFilter):
+    """
+    Поиск задач по ?search= через search_tasks вместо ILIKE
+    по search_fields. Слова запроса объединяются в одну строку
+    (синтаксис websearch: кавычки, "or", "-").
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return search_tasks(queryset, " ".join(terms))
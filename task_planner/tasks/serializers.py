@@ -1,4 +1,4 @@
-from rest_framework import serializers
+from rest_framework import permissions, serializers
 
 from tasks.models import (
     TaskCategory,
@@ -8,8 +8,24 @@ from tasks.models import (
     Task,
     TaskLink,
     FileAttachment,
+    TaskRevision,
 )
+import copy
+from collections import defaultdict
+from types import SimpleNamespace
+
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.validators import UniqueValidator
+
+from tasks.bulk import BULK_BATCH_SIZE, RelationChanges, set_tags
+from tasks.graph import find_cycle_edge
+from tasks.history import record_history
+from tasks.models.graph_revision import record_graph_change
+from tasks.models.task import mark_dependency_progress_dirty
+from tasks.models.task_closure import TaskClosure
 
 User = get_user_model()
 
@@ -67,53 +83,338 @@ class FileAttachmentSerializer(serializers.ModelSerializer):
         read_only_fields = ["uploaded_at", "task"]
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class RelatedNamesField(serializers.Field):
+    """
+    Список значений атрибута связанных объектов (только чтение).
+
+    Читает manager.all(), поэтому использует кэш prefetch_related
+    и не выполняет запрос на каждую строку списка.
+    """
+
+    def __init__(self, attribute="name", **kwargs):
+        self.attribute = attribute
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, manager):
+        return [getattr(obj, self.attribute) for obj in manager.all()]
+
+
+class PreloadedObjects:
+    """
+    Объекты, загруженные одним запросом, с интерфейсом queryset.get(pk=...).
+
+    Позволяет PrimaryKeyRelatedField проверять ссылки всего пакета
+    без запроса на каждое значение.
+    """
+
+    def __init__(self, queryset, pks):
+        self.model = queryset.model
+        self.objects = queryset.in_bulk(pks)
+
+    def get(self, pk):
+        try:
+            return self.objects[int(pk)]
+        except KeyError:
+            raise self.model.DoesNotExist
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField, использующий объекты, предзагруженные пакетным сериализатором"""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return self.context.get("preloaded_objects", {}).get(queryset.model, queryset)
+
+
+def parse_field_list(value):
+    """Разбор параметра вида "a,b,c" в множество имён"""
+    return {name.strip() for name in (value or "").split(",") if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """
+    Ограничение набора выводимых полей параметрами запроса.
+
+    ?fields=id,title выводит только перечисленные поля, ?expand=links
+    добавляет поля к выбранным. Поля из expandable_fields выводятся
+    только по ?expand=. Параметры учитываются в запросах на чтение.
+    """
+
+    expandable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.get_selected_field_names()
+        if selected is not None:
+            for name in list(self.fields):
+                if name not in selected:
+                    self.fields.pop(name)
+
+    def get_selected_field_names(self):
+        """
+        Имена полей для вывода или None, если набор полей не меняется.
+
+        Raises:
+            ValidationError: Если запрошены неизвестные поля
+        """
+        request = self.context.get("request")
+        fields = expand = set()
+        if request is not None and request.method in permissions.SAFE_METHODS:
+            fields = parse_field_list(request.query_params.get("fields"))
+            expand = parse_field_list(request.query_params.get("expand"))
+        if not fields and not expand and not self.expandable_fields:
+            return None
+
+        unknown = (fields | expand) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError(
+                {"fields": f"Неизвестные поля: {', '.join(sorted(unknown))}"}
+            )
+
+        if not fields:
+            fields = set(self.fields) - set(self.expandable_fields)
+        return fields | expand
+
+
+class BulkTaskListSerializer(serializers.ListSerializer):
+    """
+    Пакетное создание и обновление задач.
+
+    Ссылки на связанные объекты и уникальность названий проверяются
+    для всего пакета несколькими общими запросами. Задачи сохраняются
+    bulk_create/bulk_update (с записью истории), связи - пакетными
+    вставками в промежуточные таблицы. Циклы проверяются один раз
+    для всех новых зависимостей, пересчёт прогресса выполняется один
+    раз при фиксации транзакции.
+
+    Для обновления instance - список задач в порядке элементов data.
+    """
+
+    RELATION_FIELDS = ("dependencies", "categories", "notifications")
+
+    def preload_related(self, data):
+        """Загрузка всех объектов, на которые ссылается пакет, по запросу на модель"""
+        pks = defaultdict(set)
+        querysets = {}
+        for name, field in self.child.fields.items():
+            if field.read_only:
+                continue
+            if isinstance(field, serializers.ManyRelatedField):
+                field = field.child_relation
+            elif not isinstance(field, serializers.PrimaryKeyRelatedField):
+                continue
+            queryset = serializers.PrimaryKeyRelatedField.get_queryset(field)
+            querysets[queryset.model] = queryset
+            for item in data:
+                value = item.get(name) if isinstance(item, dict) else None
+                for pk in value if isinstance(value, list) else [value]:
+                    if isinstance(pk, int) or (isinstance(pk, str) and pk.isdigit()):
+                        pks[queryset.model].add(int(pk))
+
+        self.context["preloaded_objects"] = {
+            model: PreloadedObjects(queryset, pks[model])
+            for model, queryset in querysets.items()
+        }
+
+    def to_internal_value(self, data):
+        # Уникальность названий проверяется для всего пакета в validate():
+        # поле названия один раз заменяется копией без UniqueValidator
+        fields = self.child.fields
+        if "title" in fields and any(
+            isinstance(validator, UniqueValidator) for validator in fields["title"].validators
+        ):
+            title = copy.deepcopy(fields["title"])
+            title.validators = [
+                validator for validator in fields["title"].validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+            fields["title"] = title
+        if isinstance(data, list):
+            self.preload_related(data)
+        self._child_index = 0
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        # Задача, к которой относится элемент (для проверок с учётом instance)
+        if self.instance is not None:
+            self.child.instance = self.instance[self._child_index]
+        self._child_index += 1
+        return super().run_child_validation(data)
+
+    def validate(self, attrs):
+        """Уникальность названий внутри пакета и среди существующих задач"""
+        titles = [item["title"] for item in attrs if "title" in item]
+        duplicates = {title for title in titles if titles.count(title) > 1}
+        if len(titles) != len(set(titles)):
+            raise serializers.ValidationError(
+                {"title": f"Повторяющиеся названия в пакете: {', '.join(sorted(duplicates))}"}
+            )
+
+        existing = Task.all_objects.filter(title__in=titles)
+        if self.instance is not None:
+            existing = existing.exclude(pk__in=[task.pk for task in self.instance])
+        taken = sorted(existing.values_list("title", flat=True))
+        if taken:
+            raise serializers.ValidationError(
+                {"title": f"Задачи с такими названиями уже существуют: {', '.join(taken)}"}
+            )
+        return attrs
+
+    def pop_relations(self, items):
+        """Отделяет значения связей от полей модели"""
+        relations = []
+        for item in items:
+            relations.append({
+                name: item.pop(name)
+                for name in (*self.RELATION_FIELDS, "tag_list")
+                if name in item
+            })
+        return relations
+
+    def save_relations(self, tasks, relations):
+        """
+        Пакетная запись связей задач.
+
+        Returns:
+            set: id задач, у которых изменились зависимости
+        """
+        changes = {}
+        for name in self.RELATION_FIELDS:
+            wanted = {
+                task.pk: [obj.pk for obj in values[name]]
+                for task, values in zip(tasks, relations)
+                if name in values
+            }
+            if wanted:
+                changes[name] = RelationChanges(name, wanted)
+
+        dependencies = changes.get("dependencies")
+        if dependencies is not None:
+            cycle = find_cycle_edge(dependencies.added)
+            if cycle:
+                raise serializers.ValidationError(
+                    {"dependencies": f"Обнаружена циклическая зависимость: {cycle[0]} → {cycle[1]}"}
+                )
+
+        changed = {name: change.apply() for name, change in changes.items()}
+        if dependencies is not None:
+            # У зависимостей меняется список outgoing_dependencies
+            Task.all_objects.filter(pk__in=dependencies.related_ids).bump_version()
+        set_tags({
+            task.pk: values["tag_list"]
+            for task, values in zip(tasks, relations)
+            if "tag_list" in values
+        })
+
+        changed_dependencies = changed.get("dependencies", set())
+        Task.all_objects.filter(pk__in=changed_dependencies).recompute_dependency_counters()
+        TaskClosure.objects.refresh_descendants(changed_dependencies)
+        return changed_dependencies
+
+    @transaction.atomic
+    def create(self, validated_data):
+        user = self.context["request"].user
+        relations = self.pop_relations(validated_data)
+
+        tasks = [
+            Task(**{"author": user, "last_editor": user, **data})
+            for data in validated_data
+        ]
+        tasks = Task.all_objects.bulk_create(tasks, batch_size=BULK_BATCH_SIZE)
+        record_history(tasks, "+", history_user=user)
+
+        Task.all_objects.filter(pk__in=[task.pk for task in tasks]).update_search_vector()
+
+        changed_dependencies = self.save_relations(tasks, relations)
+        mark_dependency_progress_dirty(task_ids=changed_dependencies)
+        record_graph_change([task.pk for task in tasks])
+        return tasks
+
+    @transaction.atomic
+    def update(self, instances, validated_data):
+        user = self.context["request"].user
+        relations = self.pop_relations(validated_data)
+
+        now = timezone.now()
+        fields = {"last_editor", "updated_at", "version"}
+        for task, data in zip(instances, validated_data):
+            for attr, value in data.items():
+                setattr(task, attr, value)
+            task.last_editor = user
+            task.updated_at = now
+            task.version = F("version") + 1
+            fields.update(data)
+
+        completed_changed = [task.pk for task in instances if task.completion_changed()]
+        search_changed = [task.pk for task in instances if task.search_text_changed()]
+        Task.all_objects.bulk_update(instances, sorted(fields), batch_size=BULK_BATCH_SIZE)
+        record_history(instances, history_user=user)
+        for task in instances:
+            task._loaded_status = task.status
+            task._loaded_search_text = task.get_search_text()
+            # Новое значение версии загрузится из БД при первом обращении
+            del task.version
+        if completed_changed:
+            Task.all_objects.dependents_of(completed_changed).recompute_dependency_counters()
+        if search_changed:
+            Task.all_objects.filter(pk__in=search_changed).update_search_vector()
+
+        changed_dependencies = self.save_relations(instances, relations)
+        mark_dependency_progress_dirty(
+            task_ids=changed_dependencies, dependents_of=completed_changed
+        )
+        record_graph_change([task.pk for task in instances])
+        return instances
+
+
+class TaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    # Счётчики зависимостей выводятся только по ?expand=
+    expandable_fields = ("total_dependencies", "completed_dependencies")
+
     # Убрана явная валидация progress - она уже есть в модели
     # is_ready сделано read_only (вычисляется автоматически)
-    category_names = serializers.SerializerMethodField(
+    category_names = RelatedNamesField(
+        source="categories",
         help_text="Названия категорий задачи"
     )
 
-    def get_category_names(self, obj):
-        """Возвращает список названий категорий"""
-        return list(obj.categories.values_list('name', flat=True))
-
     author = UserSerializer(read_only=True)
     last_editor = UserSerializer(read_only=True)
     
-    assignee = serializers.PrimaryKeyRelatedField(
+    assignee = BulkPrimaryKeyRelatedField(
         queryset=User.objects.all(),
         allow_null=True,
         required=False,
         help_text="ID исполнителя задачи"
     )
     
-    location = serializers.PrimaryKeyRelatedField(
+    location = BulkPrimaryKeyRelatedField(
         queryset=Location.objects.all(),
         allow_null=True,
         required=False,
         help_text="ID местоположения"
     )
 
-    dependencies = serializers.PrimaryKeyRelatedField(
+    dependencies = BulkPrimaryKeyRelatedField(
         many=True,
-        queryset=Task.objects.only('id'),
+        queryset=Task.all_objects.only('id'),
         required=False
     )
     
-    categories = serializers.PrimaryKeyRelatedField(
+    categories = BulkPrimaryKeyRelatedField(
         many=True,
         queryset=TaskCategory.objects.only('id'),
         required=False
     )
     
-    notifications = serializers.PrimaryKeyRelatedField(
+    notifications = BulkPrimaryKeyRelatedField(
         many=True,
         queryset=NotificationMethod.objects.only('id'),
         required=False
     )
     
-    links = TaskLinkSerializer(many=True, read_only=True)
+    links = TaskLinkSerializer(source="task_links", many=True, read_only=True)
     attachments = FileAttachmentSerializer(many=True, read_only=True)
 
     status = serializers.ChoiceField(
@@ -132,10 +433,7 @@ class TaskSerializer(serializers.ModelSerializer):
         help_text="Прогресс выполнения зависимостей в %"
     )
     
-    tags = serializers.SerializerMethodField(help_text="Список тегов задачи")
-
-    def get_tags(self, obj):
-        return list(obj.tags.names())
+    tags = RelatedNamesField(help_text="Список тегов задачи")
 
     tag_list = serializers.ListField(
         child=serializers.CharField(max_length=50),
@@ -149,14 +447,28 @@ class TaskSerializer(serializers.ModelSerializer):
         help_text="Просрочена ли задача"
     )
     
+    # Менеджер dependent_tasks (а не свойство модели) использует кэш prefetch_related
     outgoing_dependencies = serializers.PrimaryKeyRelatedField(
+        source="dependent_tasks",
         many=True,
         read_only=True,
         help_text="ID задач, зависящих от этой"
     )
 
+    total_dependencies = serializers.IntegerField(
+        source="dependencies_count",
+        read_only=True,
+        help_text="Количество зависимостей (только по ?expand=)"
+    )
+    completed_dependencies = serializers.IntegerField(
+        source="completed_dependencies_count",
+        read_only=True,
+        help_text="Количество завершённых зависимостей (только по ?expand=)"
+    )
+
     class Meta:
         model = Task
+        list_serializer_class = BulkTaskListSerializer
         fields = [
             "id",
             "title",
@@ -202,6 +514,8 @@ class TaskSerializer(serializers.ModelSerializer):
             "outgoing_dependencies",
             "is_deleted",
             "deleted_at",
+            "total_dependencies",
+            "completed_dependencies",
         ]
         read_only_fields = [
             "id",
@@ -221,8 +535,14 @@ class TaskSerializer(serializers.ModelSerializer):
             "is_deleted",
         ]
 
+    @transaction.atomic
     def create(self, validated_data):
-        """Создание задачи с обработкой связей и тегов"""
+        """
+        Создание задачи с обработкой связей и тегов.
+
+        Выполняется в транзакции, чтобы пересчёт прогресса зависимостей
+        от всех изменений связей выполнился один раз при фиксации.
+        """
         dependencies = validated_data.pop("dependencies", [])
         categories = validated_data.pop("categories", [])
         notifications = validated_data.pop("notifications", [])
@@ -230,11 +550,9 @@ class TaskSerializer(serializers.ModelSerializer):
 
         user = self.context['request'].user
         
-        task = Task.objects.create(
-            **validated_data,
-            author=user,
-            last_editor=user
-        )
+        validated_data.setdefault("author", user)
+        validated_data.setdefault("last_editor", user)
+        task = Task.objects.create(**validated_data)
         
         task.dependencies.set(dependencies)
         task.categories.set(categories)
@@ -245,8 +563,9 @@ class TaskSerializer(serializers.ModelSerializer):
             
         return task
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Обновление задачи с обработкой связей и тегов"""
+        """Обновление задачи с обработкой связей и тегов (в одной транзакции)"""
         dependencies = validated_data.pop("dependencies", None)
         categories = validated_data.pop("categories", None)
         notifications = validated_data.pop("notifications", None)
@@ -271,7 +590,193 @@ class TaskSerializer(serializers.ModelSerializer):
         return instance
 
 
+class TaskValuesSerializer:
+    """
+    Быстрое представление списка задач без создания экземпляров Task.
+
+    Строки читаются через QuerySet.values(), связи - несколькими общими
+    запросами на страницу. Результат совпадает с TaskSerializer до байта:
+    набор и порядок полей берутся из его экземпляра, нетривиальные
+    значения (даты, Decimal, интервалы, вложенные объекты) преобразуются
+    его же полями.
+
+    Args:
+        serializer (TaskSerializer): Сериализатор с учётом ?fields=/?expand=
+    """
+
+    # Поля, значения которых JSON-совместимы без преобразования
+    PLAIN_FIELDS = (
+        serializers.IntegerField,
+        serializers.CharField,
+        serializers.BooleanField,
+        serializers.ChoiceField,
+        serializers.JSONField,
+        serializers.PrimaryKeyRelatedField,
+    )
+
+    # Столбцы, по которым вычисляются свойства модели
+    PROPERTY_COLUMNS = {
+        "is_overdue": ("deadline", "is_deleted", "status"),
+    }
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.fields = [
+            (name, field)
+            for name, field in serializer.fields.items()
+            if not field.write_only
+        ]
+
+    def _relation_lookup(self, source):
+        """Модель связи и имя обратного поля к задаче"""
+        relation = self.model._meta.get_field(source)
+        if relation.concrete:
+            return relation.related_model, relation.related_query_name()
+        return relation.related_model, relation.field.name
+
+    def columns(self):
+        """Столбцы values(), необходимые для выбранных полей"""
+        columns = {"pk"}
+        for name, field in self.fields:
+            if name in self.PROPERTY_COLUMNS:
+                columns.update(self.PROPERTY_COLUMNS[name])
+            elif isinstance(field, (serializers.ManyRelatedField, serializers.ListSerializer)):
+                continue
+            elif isinstance(field, RelatedNamesField):
+                continue
+            else:
+                columns.add(field.source)
+        return columns
+
+    def get_values_queryset(self, queryset, ordering=()):
+        """
+        Выборка словарей для сериализации.
+
+        Args:
+            queryset (QuerySet): Выборка задач
+            ordering (tuple): Порядок пагинации - его поля нужны курсору
+        """
+        columns = self.columns() | {name.lstrip("-") for name in ordering}
+        return queryset.prefetch_related(None).values(*columns)
+
+    def _related_values(self, source, attributes, task_ids):
+        """
+        {атрибут: {id задачи: [значения]}} для связи многие-ко-многим
+        одним запросом на все нужные атрибуты связанной модели.
+        """
+        model, back = self._relation_lookup(source)
+        attributes = sorted(attributes)
+        result = {attribute: defaultdict(list) for attribute in attributes}
+        for task_id, *values in model._default_manager.filter(
+            **{f"{back}__in": task_ids}
+        ).values_list(back, *attributes):
+            for attribute, value in zip(attributes, values):
+                result[attribute][task_id].append(value)
+        return result
+
+    def _related_objects(self, source, task_ids):
+        """{id задачи: [объекты]} для обратного внешнего ключа одним запросом"""
+        model, back = self._relation_lookup(source)
+        attname = model._meta.get_field(back).attname
+        result = defaultdict(list)
+        for obj in model._default_manager.filter(**{f"{back}__in": task_ids}):
+            result[getattr(obj, attname)].append(obj)
+        return result
+
+    def _nested_objects(self, field, rows):
+        """{id: представление} для вложенного сериализатора внешнего ключа"""
+        ids = {row[field.source] for row in rows} - {None}
+        model = self.model._meta.get_field(field.source).related_model
+        return {
+            pk: field.to_representation(obj)
+            for pk, obj in model._default_manager.in_bulk(ids).items()
+        }
+
+    def _related_attributes(self):
+        """Атрибуты связанных моделей для полей многие-ко-многим: {source: set}"""
+        attributes = defaultdict(set)
+        for name, field in self.fields:
+            if isinstance(field, serializers.ManyRelatedField):
+                attributes[field.source].add("pk")
+            elif isinstance(field, RelatedNamesField):
+                attributes[field.source].add(field.attribute)
+        return attributes
+
+    def _converter(self, name, field, rows, task_ids, related):
+        """Функция строка -> значение поля"""
+        if name in self.PROPERTY_COLUMNS:
+            getter = getattr(self.model, field.source).fget
+            columns = self.PROPERTY_COLUMNS[name]
+            return lambda row: getter(SimpleNamespace(**{c: row[c] for c in columns}))
+
+        if isinstance(field, serializers.ManyRelatedField):
+            values = related[field.source]["pk"]
+            return lambda row: values.get(row["pk"], [])
+
+        if isinstance(field, RelatedNamesField):
+            values = related[field.source][field.attribute]
+            return lambda row: values.get(row["pk"], [])
+
+        if isinstance(field, serializers.ListSerializer):
+            objects = self._related_objects(field.source, task_ids)
+            return lambda row: field.to_representation(objects.get(row["pk"], []))
+
+        if isinstance(field, serializers.Serializer):
+            nested = self._nested_objects(field, rows)
+            return lambda row: nested.get(row[field.source])
+
+        source = field.source
+        if isinstance(field, self.PLAIN_FIELDS):
+            return lambda row: row[source]
+
+        def convert(row):
+            value = row[source]
+            return None if value is None else field.to_representation(value)
+        return convert
+
+    def serialize(self, rows):
+        """
+        Представление строк values() в формате TaskSerializer.
+
+        Returns:
+            list: Словари с полями в порядке TaskSerializer
+        """
+        rows = list(rows)
+        task_ids = [row["pk"] for row in rows]
+        # Связь с ids и названиями (categories и category_names) читается одним запросом
+        related = {
+            source: self._related_values(source, attributes, task_ids)
+            for source, attributes in self._related_attributes().items()
+        }
+        converters = [
+            (name, self._converter(name, field, rows, task_ids, related))
+            for name, field in self.fields
+        ]
+        return [
+            {name: convert(row) for name, convert in converters}
+            for row in rows
+        ]
+
+
 class TaskListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ["id", "title", "status", "progress", "deadline"]
+
+
+class TaskRevisionSerializer(serializers.ModelSerializer):
+    """
+    Ревизия истории задачи с изменёнными полями.
+
+    Изменения полей передаются в context["diffs"] - их восстанавливает
+    сразу для всей страницы ревизий tasks.history.revision_diffs.
+    """
+
+    changes = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TaskRevision
+        fields = ["revision", "history_type", "history_date", "history_user", "changes"]
+
+    def get_changes(self, revision):
+        return self.context["diffs"].get(revision.revision, {})
@@ -0,0 +1,26 @@
+'use strict';
+// Автодополнение задач в админке через /api/tasks/typeahead/
+{
+    const $ = django.jQuery;
+
+    $(function() {
+        $('.task-typeahead').not('[name*=__prefix__]').each(function(i, element) {
+            $(element).select2({
+                minimumInputLength: 1,
+                ajax: {
+                    data: (params) => {
+                        return {
+                            q: params.term,
+                            exclude: element.dataset.exclude
+                        };
+                    },
+                    processResults: (tasks) => {
+                        return {
+                            results: tasks.map((task) => ({id: task.id, text: task.title}))
+                        };
+                    }
+                }
+            });
+        });
+    });
+}
@@ -0,0 +1,1107 @@
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from tasks.archive import archive_cutoff, archive_tasks
+from tasks.graph import check_cyclic_dependency
+from tasks.history import HistoryQueue, prune_task_revisions, write_revisions
+from tasks.history_partitions import (
+    DEFAULT_PARTITION,
+    add_months,
+    month_start,
+    partition_bounds,
+    partition_name,
+    partition_sql,
+)
+from tasks.models import (
+    ArchivedTask,
+    FileAttachment,
+    GraphChange,
+    GraphRevision,
+    Link,
+    Task,
+    TaskCategory,
+    TaskClosure,
+    TaskLink,
+    TaskRevision,
+)
+from tasks.renderers import ORJSONParser, ORJSONRenderer, orjson
+from tasks.serializers import TaskSerializer, TaskValuesSerializer
+from tasks.transactions import OnCommitQueue
+from tasks.views import TaskViewSet
+
+User = get_user_model()
+
+# Файлы, загруженные тестами, пишутся во временный каталог, а не в MEDIA_ROOT проекта
+TEST_MEDIA_ROOT = tempfile.mkdtemp(prefix="tasks-media-")
+media_root_override = override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+
+
+def setUpModule():
+    media_root_override.enable()
+
+
+def tearDownModule():
+    media_root_override.disable()
+    shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Бюджет SQL-запросов для эндпоинтов задач.
+
+    Количество запросов не должно зависеть от числа задач в ответе:
+    связанные данные читаются через prefetch_related, а не построчно.
+    """
+
+    # Максимальное число запросов на один ответ
+    QUERY_BUDGETS = {
+        "/api/tasks/": 10,
+        "/api/tasks/?fields=id,title,category_names,tags": 4,
+        "/api/tasks/?stream=true": 10,
+        "/api/tasks/overdue/": 10,
+        "/api/tasks/categories/": 2,
+        "/api/tasks/graph/": 5,
+        "/api/tasks/graph/changes/?since=0": 6,
+    }
+    DETAIL_BUDGET = 10
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="budget")
+        cls.categories = [
+            TaskCategory.objects.create(name=f"Категория {i}") for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def create_tasks(self, count, prefix="Задача"):
+        """Просроченные задачи с категориями, тегами и цепочкой зависимостей"""
+        tasks = []
+        for i in range(count):
+            task = Task.objects.create(
+                title=f"{prefix} {i}",
+                author=self.user,
+                deadline=timezone.now() - timedelta(days=i + 1),
+            )
+            task.categories.set(self.categories[: i % 3 + 1])
+            task.tags.add("срочно", f"тег-{i % 2}")
+            if tasks:
+                task.dependencies.add(tasks[-1])
+            tasks.append(task)
+        return tasks
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, url)
+        return len(context)
+
+    def test_list_endpoints_within_budget(self):
+        self.create_tasks(15)
+        for url, budget in self.QUERY_BUDGETS.items():
+            with self.subTest(url=url):
+                self.assertLessEqual(self.count_queries(url), budget)
+
+    def test_detail_within_budget(self):
+        task = self.create_tasks(3)[-1]
+        self.assertLessEqual(
+            self.count_queries(f"/api/tasks/{task.id}/"), self.DETAIL_BUDGET
+        )
+
+    def test_query_count_does_not_grow_with_tasks(self):
+        self.create_tasks(3)
+        small = {url: self.count_queries(url) for url in self.QUERY_BUDGETS}
+        self.create_tasks(20, prefix="Ещё задача")
+        for url, queries in small.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), queries)
+
+    def test_names_read_from_prefetch(self):
+        self.create_tasks(2)
+        results = self.client.get("/api/tasks/?fields=title,category_names,tags").json()[
+            "results"
+        ]
+        last = next(item for item in results if item["title"] == "Задача 1")
+        self.assertEqual(sorted(last["category_names"]), ["Категория 0", "Категория 1"])
+        self.assertEqual(sorted(last["tags"]), ["срочно", "тег-1"])
+
+
+class TaskValuesSerializerTests(TestCase):
+    """Быстрое представление списка совпадает с TaskSerializer до байта"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="values", email="values@example.com")
+        category = TaskCategory.objects.create(name="Работа")
+        first = Task.objects.create(
+            title="Первая",
+            author=user,
+            last_editor=user,
+            budget=Decimal("12.5"),
+            estimated_time=timedelta(hours=3),
+            deadline=timezone.now() - timedelta(days=1),
+            time_intervals=[{"start": "09:00", "end": "18:00"}],
+        )
+        second = Task.objects.create(title="Вторая", author=user, assignee=user)
+        second.dependencies.add(first)
+        first.categories.add(category)
+        first.tags.add("срочно", "отчёт")
+        TaskLink.objects.create(
+            task=first,
+            link=Link.objects.create(url="https://example.com"),
+            description="Спецификация",
+        )
+
+    def render_both(self, url):
+        request = Request(APIRequestFactory().get(url))
+        serializer = TaskSerializer(context={"request": request})
+        queryset = Task.objects.prefetch_related(
+            "dependencies", "categories", "tags", "notifications",
+            "task_links", "attachments", "dependent_tasks",
+        ).order_by("-created_at", "-id")
+
+        expected = JSONRenderer().render(
+            TaskSerializer(queryset, many=True, context={"request": request}).data
+        )
+        values_serializer = TaskValuesSerializer(serializer)
+        actual = JSONRenderer().render(
+            values_serializer.serialize(values_serializer.get_values_queryset(queryset))
+        )
+        return expected, actual
+
+    def test_full_representation_is_identical(self):
+        expected, actual = self.render_both("/api/tasks/")
+        self.assertEqual(actual, expected)
+
+    def test_sparse_representation_is_identical(self):
+        expected, actual = self.render_both(
+            "/api/tasks/?fields=id,is_overdue,author,tags,links"
+        )
+        self.assertEqual(actual, expected)
+
+
+@unittest.skipIf(orjson is None, "orjson не установлен")
+class ORJSONTests(SimpleTestCase):
+    """JSON-рендерер и парсер на orjson"""
+
+    def test_renderer_matches_standard(self):
+        payload = {
+            "created_at": timezone.now(),
+            "budget": Decimal("12.50"),
+            "duration": timedelta(hours=2),
+            "title": "Задача",
+            "ids": [1, 2],
+            1: None,
+        }
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(payload)),
+            json.loads(JSONRenderer().render(payload)),
+        )
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+        # Целое больше 64 бит orjson не сериализует - отвечает стандартный рендерер
+        self.assertEqual(json.loads(ORJSONRenderer().render({"id": 2 ** 70})), {"id": 2 ** 70})
+
+    def test_renderer_indent(self):
+        rendered = ORJSONRenderer().render(
+            {"id": 1}, "application/json; indent=4", {}
+        )
+        self.assertIn(b"\n", rendered)
+
+    def test_parser(self):
+        parser = ORJSONParser()
+        self.assertEqual(
+            parser.parse(BytesIO('{"title": "Задача"}'.encode())), {"title": "Задача"}
+        )
+        self.assertEqual(
+            parser.parse(
+                BytesIO('{"title": "Задача"}'.encode("cp1251")),
+                parser_context={"encoding": "cp1251"},
+            ),
+            {"title": "Задача"},
+        )
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b"{"))
+
+
+class TaskPaginationTests(TestCase):
+    """Keyset-пагинация списка задач по (поле сортировки, id)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="pages")
+        now = timezone.now()
+        cls.tasks = Task.all_objects.bulk_create([
+            Task(
+                title=f"Задача {i}",
+                author=user,
+                priority=i % 3 + 1,
+                deadline=None if i % 4 == 0 else now + timedelta(days=i % 5),
+            )
+            for i in range(30)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def walk(self, params, direction="next", url="/api/tasks/"):
+        ids, queries = [], []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                data = self.client.get(url, params).json()
+            queries.append(context.captured_queries)
+            ids += [item["id"] for item in data["results"]]
+            url, params = data[direction], None
+        return ids, data, queries
+
+    def expected(self, name, descending):
+        """id в порядке (поле, id) с NULL в конце"""
+        tasks = sorted(self.tasks, key=lambda task: task.pk, reverse=descending)
+        filled = [task for task in tasks if getattr(task, name) is not None]
+        filled.sort(key=lambda task: getattr(task, name), reverse=descending)
+        return [task.pk for task in filled + [
+            task for task in tasks if getattr(task, name) is None
+        ]]
+
+    def test_duplicate_heavy_ordering_has_no_offset(self):
+        for ordering in ("priority", "-priority", "deadline", "-deadline"):
+            with self.subTest(ordering=ordering):
+                name, descending = ordering.lstrip("-"), ordering.startswith("-")
+                ids, last_page, queries = self.walk({"ordering": ordering, "page_size": 4})
+                self.assertEqual(ids, self.expected(name, descending))
+
+                # Последняя страница выбирается условием по ключу, без OFFSET
+                sql = " ".join(query["sql"] for query in queries[-1]).upper()
+                self.assertNotIn("OFFSET", sql)
+
+                # По ссылкам назад возвращаются те же страницы в обратном порядке
+                back_ids, _, _ = self.walk(None, "previous", last_page["previous"])
+                pages = [ids[start:start + 4] for start in range(0, 28, 4)]
+                self.assertEqual(back_ids, [pk for page in reversed(pages) for pk in page])
+
+
+class RelationFilterTests(TestCase):
+    """
+    Фильтры по категориям и тегам: семантика И/ИЛИ/НЕ и план запроса.
+
+    Условия строятся коррелированными EXISTS, поэтому выборка не
+    размножается JOIN-ами и не дедуплицируется (DISTINCT) целиком.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username="filters")
+        cls.work = TaskCategory.objects.create(name="Работа")
+        cls.home = TaskCategory.objects.create(name="Дом")
+
+        def create_task(title, categories=(), tags=()):
+            task = Task.objects.create(title=title, author=user)
+            task.categories.set(categories)
+            task.tags.add(*tags)
+            return task
+
+        create_task("Обе категории", [cls.work, cls.home], ["срочно", "отчёт"])
+        create_task("Работа", [cls.work], ["срочно"])
+        create_task("Дом", [cls.home], ["отчёт"])
+        create_task("Без категории", tags=["срочно"])
+
+    def titles(self, **params):
+        response = self.client.get(
+            "/api/tasks/", {"fields": "title", "page_size": 100, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return {item["title"] for item in response.json()["results"]}
+
+    def test_filter_semantics(self):
+        work, home = self.work.pk, self.home.pk
+        cases = [
+            ({"categories": f"{work}"}, {"Обе категории", "Работа"}),
+            ({"categories": f"{work},{home}"}, {"Обе категории", "Работа", "Дом"}),
+            (
+                {"categories": f"{work},{home}", "categories_match": "all"},
+                {"Обе категории"},
+            ),
+            (
+                {"categories": f"{work}", "include_no_category": "true"},
+                {"Обе категории", "Работа", "Без категории"},
+            ),
+            ({"include_no_category": "true"}, {"Без категории"}),
+            ({"exclude_categories": f"{home}"}, {"Работа", "Без категории"}),
+            ({"tags": "срочно,отчёт", "tags_match": "all"}, {"Обе категории"}),
+            ({"categories": f"{work}", "exclude_tags": "отчёт"}, {"Работа"}),
+            ({"tags": "срочно", "include_no_category": "true"}, {"Без категории"}),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(self.titles(**params), expected)
+
+    def test_filtered_query_plan_has_no_deduplication(self):
+        request = Request(APIRequestFactory().get("/api/tasks/graph/", {
+            "categories": f"{self.work.pk},{self.home.pk}",
+            "include_no_category": "true",
+            "tags": "срочно",
+            "exclude_tags": "архив",
+        }))
+        view = TaskViewSet(request=request, action="graph", format_kwarg=None)
+        queryset = view.filter_by_relations(Task.objects.all())
+
+        self.assertIn("EXISTS", str(queryset.query))
+        self.assertNotIn("DISTINCT", str(queryset.query))
+
+        plan = queryset.explain()
+        if connection.vendor == "postgresql":
+            # Верхний узел плана не должен дедуплицировать всю выборку
+            plan = plan.splitlines()[0]
+        for marker in ("Unique", "HashAggregate", "DISTINCT"):
+            self.assertNotIn(marker, plan)
+
+
+class TaskSearchTests(TestCase):
+    """Поиск задач по ?search= (на SQLite - поиск подстроки)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="search")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_search_by_title_description_and_assignee(self):
+        assignee = User.objects.create_user(username="milkman")
+        by_title = Task.objects.create(title="купить молоко", author=self.user)
+        by_description = Task.objects.create(
+            title="Магазин", description="хлеб и молоко", author=self.user
+        )
+        by_assignee = Task.objects.create(title="Доставка", author=self.user, assignee=assignee)
+        Task.objects.create(title="Отчёт", author=self.user)
+
+        def found(text):
+            response = self.client.get("/api/tasks/", {"search": text})
+            return {item["id"] for item in response.json()["results"]}
+
+        self.assertEqual(found("молоко"), {by_title.pk, by_description.pk})
+        self.assertEqual(found("milkman"), {by_assignee.pk})
+        self.assertEqual(found("   "), set(Task.objects.values_list("pk", flat=True)))
+
+
+class TaskDetailCacheTests(TestCase):
+    """Кэш представления задачи по id и версии, ETag/Last-Modified"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="detail")
+        self.task = Task.objects.create(title="Задача", author=self.user)
+        self.url = f"/api/tasks/{self.task.pk}/"
+        self.client = APIClient()
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_until_version_changes(self):
+        body = self.client.get(self.url).content
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).content, body)
+
+        version = Task.objects.get(pk=self.task.pk).version
+        dependency = Task.objects.create(title="Зависимость", author=self.user)
+        self.task.tags.add("срочно")
+        self.task.dependencies.add(dependency)
+        self.assertGreater(Task.objects.get(pk=self.task.pk).version, version)
+
+        data = self.client.get(self.url).json()
+        self.assertEqual(data["tags"], ["срочно"])
+        self.assertEqual(data["dependencies"], [dependency.pk])
+        self.assertEqual(
+            self.client.get(f"/api/tasks/{dependency.pk}/").json()["outgoing_dependencies"],
+            [self.task.pk],
+        )
+
+
+    def test_list_etag_expires_when_deadline_passes(self):
+        Task.objects.filter(pk=self.task.pk).update(
+            deadline=timezone.now() + timedelta(seconds=30)
+        )
+        response = self.client.get("/api/tasks/")
+        self.assertFalse(response.json()["results"][0]["is_overdue"])
+        etag = response["ETag"]
+        self.assertEqual(
+            self.client.get("/api/tasks/", HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+        later = timezone.now() + timedelta(minutes=2)
+        with mock.patch("django.utils.timezone.now", return_value=later):
+            response = self.client.get("/api/tasks/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["results"][0]["is_overdue"])
+
+    def test_task_form_uses_detail_json(self):
+        url = reverse("task-form", args=[self.task.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        # Задача удалена между проверкой и чтением представления
+        with mock.patch.object(TaskViewSet, "detail_json", return_value=None):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_derived_changes_keep_last_modified(self):
+        dependency = Task.objects.create(title="Зависимость", author=self.user)
+        self.task.dependencies.add(dependency)
+        before = Task.objects.get(pk=self.task.pk)
+
+        dependency.status = "done"
+        dependency.save()
+        after = Task.objects.get(pk=self.task.pk)
+        self.assertEqual(after.completed_dependencies_count, 1)
+        self.assertGreater(after.version, before.version)
+        self.assertEqual(after.updated_at, before.updated_at)
+
+    def test_category_rename_invalidates_cache(self):
+        category = TaskCategory.objects.create(name="Работа")
+        self.task.categories.add(category)
+        self.assertEqual(self.client.get(self.url).json()["category_names"], ["Работа"])
+
+        category.name = "Дом"
+        category.save()
+        self.assertEqual(self.client.get(self.url).json()["category_names"], ["Дом"])
+
+        category.delete()
+        self.assertEqual(self.client.get(self.url).json()["category_names"], [])
+
+class DependencyCounterTests(TestCase):
+    """Счётчики зависимостей задачи и их сверка с таблицей зависимостей"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="counters")
+        self.task = Task.objects.create(title="Задача", author=self.user)
+        self.first = Task.objects.create(title="Первая", author=self.user)
+        self.second = Task.objects.create(title="Вторая", author=self.user, status="done")
+
+    def assertCounters(self, task, total, completed):
+        task = Task.all_objects.get(pk=task.pk)
+        self.assertEqual(
+            (task.dependencies_count, task.completed_dependencies_count),
+            (total, completed),
+        )
+
+    def test_counters_follow_dependency_changes(self):
+        self.task.dependencies.add(self.first, self.second)
+        self.assertCounters(self.task, 2, 1)
+
+        self.first.dependent_tasks.remove(self.task)
+        self.assertCounters(self.task, 1, 1)
+
+        self.first.dependent_tasks.add(self.task)
+        self.task.dependencies.clear()
+        self.assertCounters(self.task, 0, 0)
+
+    def test_stale_status_does_not_drift(self):
+        self.task.dependencies.add(self.first)
+        stale = Task.objects.get(pk=self.first.pk)
+        for instance in (Task.objects.get(pk=self.first.pk), stale):
+            instance.status = "done"
+            instance.save()
+        self.assertCounters(self.task, 1, 1)
+
+        stale.status = "waiting"
+        stale.save()
+        stale.status = "waiting"
+        stale.save()
+        self.assertCounters(self.task, 1, 0)
+
+    def test_save_keeps_counters_and_inserts_missing_row(self):
+        loaded = Task.objects.get(pk=self.task.pk)
+        self.task.dependencies.add(self.second)
+        loaded.title = "Новое название"
+        loaded.save()
+        self.assertCounters(self.task, 1, 1)
+        self.assertEqual(loaded.version, 3)
+
+        Task.all_objects.filter(pk=self.first.pk)._raw_delete(connection.alias)
+        self.first.save()
+        self.assertTrue(Task.all_objects.filter(pk=self.first.pk).exists())
+
+    def prepare_hub(self, dependents):
+        """Загруженная задача, от которой зависят dependents задач, со статусом «выполнена»"""
+        hub = Task.objects.create(title=f"Узел {dependents}", author=self.user)
+        tasks = Task.objects.bulk_create(
+            Task(title=f"Зависимая {dependents}-{i}", author=self.user)
+            for i in range(dependents)
+        )
+        through = Task.dependencies.through
+        through.objects.bulk_create(
+            through(from_task_id=task.pk, to_task_id=hub.pk) for task in tasks
+        )
+        Task.all_objects.filter(pk__in=[task.pk for task in tasks]).recompute_dependency_counters()
+        hub = Task.objects.get(pk=hub.pk)
+        hub.status = "done"
+        return hub, [task.pk for task in tasks]
+
+    def complete_hub(self, hub):
+        with self.captureOnCommitCallbacks(execute=True):
+            hub.save()
+
+    def test_hub_completion_cost_does_not_grow_with_dependents(self):
+        hub, _ = self.prepare_hub(5)
+        with CaptureQueriesContext(connection) as small:
+            self.complete_hub(hub)
+
+        hub, dependents = self.prepare_hub(50)
+        with self.assertNumQueries(len(small)):
+            self.complete_hub(hub)
+        self.assertEqual(
+            set(Task.all_objects.filter(pk__in=dependents).values_list(
+                "completed_dependencies_count", "progress_dependencies", "is_ready"
+            )),
+            {(1, 100, True)},
+        )
+
+        # Повторное сохранение загруженной задачи не перезаписывает пересчитанный прогресс
+        dependent = Task.objects.get(pk=dependents[0])
+        Task.all_objects.filter(pk=hub.pk).update(status="waiting")
+        Task.all_objects.filter(pk=dependent.pk).recompute_dependency_counters()
+        Task.all_objects.filter(pk=dependent.pk).recompute_dependency_progress()
+        dependent.title = "Переименованная"
+        dependent.save()
+        dependent = Task.objects.get(pk=dependent.pk)
+        self.assertEqual((dependent.progress_dependencies, dependent.is_ready), (0, False))
+
+    def test_reconcile_dependency_counters(self):
+        self.task.dependencies.add(self.first, self.second)
+        Task.all_objects.filter(pk=self.task.pk).update(
+            dependencies_count=5, completed_dependencies_count=0
+        )
+
+        out = StringIO()
+        call_command("reconcile_dependency_counters", "--dry-run", stdout=out)
+        self.assertIn("Задач с расхождением счётчиков: 1", out.getvalue())
+        self.assertCounters(self.task, 5, 0)
+
+        call_command("reconcile_dependency_counters", stdout=StringIO())
+        self.assertCounters(self.task, 2, 1)
+
+
+class TaskClosureTests(TestCase):
+    """Сопровождение таблицы транзитивного замыкания зависимостей"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="closure")
+        self.a, self.b, self.c, self.d = (
+            Task.objects.create(title=title, author=self.user) for title in "abcd"
+        )
+
+    def pairs(self):
+        return set(TaskClosure.objects.values_list("ancestor_id", "descendant_id"))
+
+    def test_add_edge_joins_ancestors_and_descendants(self):
+        # Цепочка c -> b -> a: после ребра b -> a задача c зависит и от a
+        self.c.dependencies.add(self.b)
+        self.b.dependencies.add(self.a)
+        a, b, c = self.a.pk, self.b.pk, self.c.pk
+        self.assertEqual(self.pairs(), {(b, c), (a, b), (a, c)})
+
+        TaskClosure.objects.add_edge(c, b)
+        self.assertEqual(len(self.pairs()), 3)
+
+    def test_refresh_descendants_keeps_other_paths(self):
+        # Ромб: d зависит от b и c, обе - от a
+        self.b.dependencies.add(self.a)
+        self.c.dependencies.add(self.a)
+        self.d.dependencies.add(self.b, self.c)
+        self.assertTrue(TaskClosure.objects.is_reachable(self.a.pk, self.d.pk))
+
+        self.d.dependencies.remove(self.b)
+        self.assertTrue(TaskClosure.objects.is_reachable(self.a.pk, self.d.pk))
+        self.assertFalse(TaskClosure.objects.is_reachable(self.b.pk, self.d.pk))
+
+        self.c.dependencies.remove(self.a)
+        self.assertEqual(TaskClosure.objects.ancestor_ids(self.d.pk), {self.c.pk})
+
+    def test_single_edge_cycle_rejection(self):
+        # Цепочка c -> b -> a: ребро a -> c замкнуло бы цикл
+        self.c.dependencies.add(self.b)
+        self.b.dependencies.add(self.a)
+        with self.assertNumQueries(1):
+            self.assertTrue(check_cyclic_dependency(self.a, self.c))
+        self.assertFalse(check_cyclic_dependency(self.d, self.c))
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f"/api/tasks/{self.a.pk}/add_dependency/"
+        response = client.post(url, {"dependency_id": self.c.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Обнаружена циклическая зависимость"})
+        self.assertFalse(self.a.dependencies.exists())
+
+        response = client.post(url, {"dependency_id": self.d.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(TaskClosure.objects.is_reachable(self.d.pk, self.c.pk))
+
+    def test_rebuild_matches_incremental_maintenance(self):
+        self.b.dependencies.add(self.a)
+        self.c.dependencies.add(self.b)
+        self.d.dependencies.add(self.c, self.a)
+        expected = self.pairs()
+
+        TaskClosure.objects.filter(descendant_id=self.d.pk).delete()
+        TaskClosure.objects.create(ancestor_id=self.d.pk, descendant_id=self.a.pk)
+        self.assertEqual(TaskClosure.objects.rebuild(batch_size=2), len(expected))
+        self.assertEqual(self.pairs(), expected)
+
+
+class BulkTaskApiTests(TransactionTestCase):
+    """Пакетное создание, изменение и удаление задач (/api/tasks/bulk/)"""
+
+    url = "/api/tasks/bulk/"
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="bulk")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.done = Task.objects.create(title="Готово", author=self.user, status="done")
+
+    def assertCounters(self, pk, total, completed):
+        task = Task.all_objects.get(pk=pk)
+        self.assertEqual(
+            (task.dependencies_count, task.completed_dependencies_count),
+            (total, completed),
+        )
+
+    def create(self, *items):
+        response = self.client.post(self.url, list(items), format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()["ids"]
+
+    def test_bulk_create(self):
+        first, second = self.create(
+            {"title": "Первая"},
+            {"title": "Вторая", "dependencies": [self.done.pk], "tag_list": ["пакет"]},
+        )
+        self.assertCounters(first, 0, 0)
+        self.assertCounters(second, 1, 1)
+        self.assertTrue(
+            TaskClosure.objects.filter(ancestor=self.done, descendant_id=second).exists()
+        )
+        self.assertEqual(list(Task.objects.get(pk=second).tags.names()), ["пакет"])
+        for pk in (first, second):
+            revision = TaskRevision.objects.get(task_id=pk)
+            self.assertEqual((revision.history_type, revision.history_user_id), ("+", self.user.pk))
+            self.assertEqual(Task.history.filter(id=pk, history_revision=1).count(), 1)
+
+    def test_bulk_create_checks_titles(self):
+        response = self.client.post(
+            self.url, [{"title": "Дубль"}, {"title": "Дубль"}], format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url, [{"title": "Готово"}], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Task.objects.filter(title="Дубль").exists())
+
+    def test_bulk_update_and_cycle_rejection(self):
+        first, second = self.create({"title": "Первая"}, {"title": "Вторая"})
+        response = self.client.patch(
+            self.url,
+            [
+                {"id": second, "dependencies": [first, self.done.pk]},
+                {"id": first, "progress": 40},
+            ],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertCounters(second, 2, 1)
+        self.assertEqual(
+            set(TaskClosure.objects.filter(descendant_id=second).values_list("ancestor_id", flat=True)),
+            {first, self.done.pk},
+        )
+        revision = TaskRevision.objects.filter(task_id=first).first()
+        self.assertEqual((revision.revision, revision.changes["progress"]), (2, 40))
+
+        # Ребро first -> second замыкает цикл: пакет отклоняется целиком
+        response = self.client.patch(
+            self.url,
+            [{"id": first, "title": "Переименована", "dependencies": [second]}],
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.get(pk=first).title, "Первая")
+        self.assertCounters(first, 0, 0)
+
+    def test_bulk_delete(self):
+        (dependent,) = self.create({"title": "Зависимая"})
+        (dependency,) = self.create({"title": "Зависимость"})
+        self.client.patch(
+            self.url, [{"id": dependent, "dependencies": [dependency]}], format="json"
+        )
+        self.assertCounters(dependent, 1, 0)
+
+        response = self.client.delete(self.url, {"ids": [dependency]}, format="json")
+        self.assertEqual(response.json(), {"ids": [dependency]})
+        self.assertFalse(Task.objects.filter(pk=dependency).exists())
+        self.assertCounters(dependent, 1, 1)
+        revision = TaskRevision.objects.filter(task_id=dependency).first()
+        self.assertEqual(revision.changes["status"], "canceled")
+
+
+class TaskAdminActionTests(TransactionTestCase):
+    """Пакетные действия администратора со статусом задач"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", password="admin")
+        self.client.force_login(self.admin)
+        self.task = Task.objects.create(title="Задача", author=self.admin)
+        self.dependent = Task.objects.create(title="Зависимая", author=self.admin)
+        self.dependent.dependencies.add(self.task)
+
+    def run_action(self, action):
+        response = self.client.post(
+            reverse("admin:tasks_task_changelist"),
+            {"action": action, "_selected_action": [self.task.pk]},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_actions_bump_revision_and_history(self):
+        for action, status in (("mark_as_done", "done"), ("mark_as_canceled", "canceled")):
+            with self.subTest(action=action):
+                etag = self.client.get("/api/tasks/")["ETag"]
+                revision = TaskRevision.objects.filter(task_id=self.task.pk).count()
+                self.run_action(action)
+
+                response = self.client.get("/api/tasks/", HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(Task.objects.get(pk=self.task.pk).status, status)
+                self.assertEqual(
+                    TaskRevision.objects.filter(task_id=self.task.pk).count(), revision + 1
+                )
+                self.assertEqual(
+                    Task.objects.get(pk=self.dependent.pk).completed_dependencies_count, 1
+                )
+
+    def test_history_page_shows_revisions(self):
+        task = Task.objects.get(pk=self.task.pk)
+        task.progress = 30
+        task.save()
+        url = reverse("admin:tasks_task_history", args=[task.pk])
+        self.assertContains(self.client.get(url), "Прогресс выполнения: 0 → 30")
+
+        # Удаление пишет контрольную точку, по ней открывается история удалённой задачи
+        task.hard_delete()
+        checkpoint = Task.history.get(id=self.task.pk, history_type="-")
+        self.assertEqual(
+            checkpoint.history_revision,
+            TaskRevision.objects.filter(task_id=self.task.pk).first().revision,
+        )
+        self.assertContains(self.client.get(url), "Удаление")
+
+
+class TaskArchiveTests(TestCase):
+    """Перенос задач в архив, чтение и восстановление из архива"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="archive")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def archive_old(self, *tasks, batch_size=500):
+        Task.all_objects.filter(pk__in=[task.pk for task in tasks]).update(
+            updated_at=timezone.now() - timedelta(days=365)
+        )
+        return [
+            pk for batch in archive_tasks(archive_cutoff(), batch_size) for pk in batch
+        ]
+
+    def test_dependency_of_hot_task_stays(self):
+        dependency = Task.objects.create(title="Сделано", author=self.user, status="done")
+        dependent = Task.objects.create(title="В работе", author=self.user)
+        dependent.dependencies.add(dependency)
+
+        self.assertEqual(self.archive_old(dependency), [])
+        dependent.status = "done"
+        dependent.save()
+        self.assertCountEqual(self.archive_old(dependency, dependent), [dependency.pk, dependent.pk])
+
+    def test_batches_smaller_than_dependency_chains(self):
+        tasks = [
+            Task.objects.create(title=f"Готово {i}", author=self.user, status="done")
+            for i in range(5)
+        ]
+        # Каждая задача цепочки зависит от предыдущей: по id первыми
+        # выбираются зависимости, зависящие от них задачи - вне пачки
+        for dependency, task in zip(tasks[:3], tasks[1:4]):
+            task.dependencies.add(dependency)
+
+        self.assertCountEqual(
+            self.archive_old(*tasks, batch_size=1), [task.pk for task in tasks]
+        )
+        self.assertFalse(Task.all_objects.exists())
+
+    def test_read_through_and_restore(self):
+        dependency = Task.objects.create(title="Зависимость", author=self.user)
+        task = Task.objects.create(title="Архивная", author=self.user, status="done")
+        task.dependencies.add(dependency)
+        task.tags.add("старое")
+        FileAttachment.objects.create(
+            task=task, file=SimpleUploadedFile("отчёт.txt", b"x"), description="Отчёт"
+        )
+
+        self.assertEqual(self.archive_old(task), [task.pk])
+        self.assertFalse(Task.all_objects.filter(pk=task.pk).exists())
+
+        url = f"/api/tasks/{task.pk}/"
+        data = self.client.get(url, {"expand": "total_dependencies"}).json()
+        self.assertEqual(data["dependencies"], [dependency.pk])
+        self.assertEqual(data["total_dependencies"], 1)
+
+        self.assertEqual(self.client.post(f"{url}restore/").status_code, 200)
+        task = Task.objects.get(pk=task.pk)
+        self.assertEqual(task.dependencies_count, 1)
+        self.assertEqual(list(task.tags.names()), ["старое"])
+        attachment = task.attachments.get()
+        self.assertTrue(attachment.file.path.startswith(TEST_MEDIA_ROOT))
+        self.assertFalse(ArchivedTask.objects.exists())
+
+
+    def test_export_includes_archived(self):
+        archived = Task.objects.create(title="Архивная", author=self.user, status="done")
+        live = Task.objects.create(title="Текущая", author=self.user)
+        self.archive_old(archived)
+
+        response = self.client.get("/api/tasks/export/", {"fields": "id,title"})
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(
+            rows,
+            [{"id": live.pk, "title": "Текущая"}, {"id": archived.pk, "title": "Архивная"}],
+        )
+
+class GraphChangeFeedTests(TransactionTestCase):
+    """Журнал изменений графа и лента изменений с ревизии"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="feed")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.category = TaskCategory.objects.create(name="Работа")
+        self.task = Task.objects.create(title="Задача", author=self.user)
+        self.task.categories.add(self.category)
+
+    def changed_since(self, revision):
+        return set(
+            GraphChange.objects.filter(revision__gt=revision).values_list("task_id", flat=True)
+        )
+
+    def test_related_changes_log_task_ids(self):
+        revision, _ = GraphRevision.objects.current()
+        self.category.name = "Дом"
+        self.category.save()
+        self.assertEqual(self.changed_since(revision), {self.task.pk})
+
+        revision, _ = GraphRevision.objects.current()
+        self.task.tags.add("срочно")
+        self.assertEqual(self.changed_since(revision), {self.task.pk})
+
+        revision, _ = GraphRevision.objects.current()
+        self.category.tasks.clear()
+        self.assertEqual(self.changed_since(revision), {self.task.pk})
+        self.assertGreater(GraphRevision.objects.current()[0], revision)
+
+    def test_pruned_revisions_require_reset(self):
+        GraphChange.objects.update(created_at=timezone.now() - timedelta(days=60))
+        self.task.title = "Новая задача"
+        self.task.save()
+        revision, _ = GraphRevision.objects.current()
+
+        call_command("prune_graph_changes", "--keep-days", "30", stdout=StringIO())
+        self.assertEqual(self.changed_since(0), {self.task.pk})
+        self.assertEqual(GraphChange.objects.count(), 1)
+
+        url = "/api/tasks/graph/changes/"
+        self.assertTrue(self.client.get(url, {"since": 0}).json()["reset"])
+        data = self.client.get(url, {"since": revision - 1}).json()
+        self.assertFalse(data["reset"])
+        self.assertEqual(data["nodes"]["id"], [self.task.pk])
+
+
+class HistoryPartitionTests(SimpleTestCase):
+    """Месячные секции таблицы истории"""
+
+    def test_months_and_bounds(self):
+        self.assertEqual(month_start(date(2026, 2, 28)), date(2026, 2, 1))
+        self.assertEqual(add_months(date(2026, 11, 1), 2), date(2027, 1, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -1), date(2025, 12, 1))
+        self.assertEqual(add_months(date(2026, 1, 1), -25), date(2023, 12, 1))
+        self.assertEqual(partition_name(date(2026, 3, 1)), "tasks_historicaltask_p2026_03")
+        self.assertEqual(
+            partition_bounds(date(2026, 12, 1)),
+            ("2026-12-01 00:00:00+00", "2027-01-01 00:00:00+00"),
+        )
+
+    def test_partition_takes_rows_from_default(self):
+        statements = partition_sql(date(2026, 12, 1))
+        move, attach = statements[-2], statements[-1]
+        self.assertIn(f"DELETE FROM {DEFAULT_PARTITION}", move[0])
+        self.assertIn("INSERT INTO tasks_historicaltask_p2026_12", move[0])
+        self.assertEqual(move[1], list(partition_bounds(date(2026, 12, 1))))
+        self.assertIn(
+            "ATTACH PARTITION tasks_historicaltask_p2026_12 "
+            "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')",
+            attach[0],
+        )
+
+
+class RecordingQueue(OnCommitQueue):
+    """Очередь, запоминающая содержимое каждого выполнения"""
+
+    connection_attribute = "_recording_queue"
+    flushed = []
+
+    def __init__(self):
+        self.items = []
+
+    def add(self, item):
+        self.items.append(item)
+
+    def flush(self):
+        self.flushed.append(self.items)
+
+
+class OnCommitQueueTests(TransactionTestCase):
+    """Объединение данных очереди в рамках транзакции"""
+
+    def setUp(self):
+        RecordingQueue.flushed = []
+
+    def test_coalesced_per_transaction(self):
+        RecordingQueue.enqueue(1)
+        RecordingQueue.enqueue(2)
+        with transaction.atomic():
+            RecordingQueue.enqueue(3)
+            with transaction.atomic():
+                RecordingQueue.enqueue(4)
+            RecordingQueue.enqueue(5)
+            self.assertEqual(RecordingQueue.flushed, [[1], [2]])
+        with transaction.atomic():
+            RecordingQueue.enqueue(6)
+        self.assertEqual(RecordingQueue.flushed, [[1], [2], [3, 4, 5], [6]])
+
+    def test_rollback_starts_new_queue(self):
+        with self.assertRaises(ValueError), transaction.atomic():
+            RecordingQueue.enqueue(1)
+            raise ValueError
+        with transaction.atomic():
+            RecordingQueue.enqueue(2)
+        self.assertEqual(RecordingQueue.flushed, [[2]])
+
+        # Очередь, созданная в откаченной точке сохранения, отброшена
+        with transaction.atomic():
+            with self.assertRaises(ValueError), transaction.atomic():
+                RecordingQueue.enqueue(3)
+                raise ValueError
+            RecordingQueue.enqueue(4)
+        self.assertEqual(RecordingQueue.flushed, [[2], [4]])
+
+
+class TaskHistoryTests(TransactionTestCase):
+    """Запись истории изменений задачи при фиксации транзакции"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="history")
+
+    def test_one_record_per_transaction(self):
+        with transaction.atomic():
+            task = Task.objects.create(title="Черновик", author=self.user)
+            task.title = "Задача"
+            task.save()
+            task.progress = 50
+            task.save()
+        self.assertEqual(
+            list(task.history.values_list("history_type", "title", "progress")),
+            [("+", "Задача", 50)],
+        )
+
+        # Сохранение без изменений не создаёт записи
+        Task.objects.get(pk=task.pk).save()
+        self.assertEqual(TaskRevision.objects.filter(task_id=task.pk).count(), 1)
+
+        # Ревизия изменения хранит только изменённые поля, без полной строки истории
+        task.priority = 1
+        task.save()
+        revision = TaskRevision.objects.filter(task_id=task.pk).first()
+        self.assertEqual((revision.revision, revision.history_type), (2, "~"))
+        self.assertEqual(set(revision.changes), {"priority", "updated_at"})
+        self.assertEqual(task.history.count(), 1)
+
+    def test_revision_write_queries(self):
+        task = Task.objects.create(title="Задача", author=self.user)
+        task = Task.objects.get(pk=task.pk)
+        task.progress = 40
+        queue = HistoryQueue()
+        queue.add([task], "~")
+
+        # Изменения берутся из загруженных значений, номер - из счётчика
+        # строки задачи: UPDATE и SELECT счётчика и INSERT ревизии
+        with transaction.atomic(), self.assertNumQueries(3):
+            write_revisions(Task, list(queue.snapshots.values()))
+        revision = TaskRevision.objects.filter(task_id=task.pk).first()
+        self.assertEqual((revision.revision, revision.changes), (2, {"progress": 40}))
+        self.assertEqual(Task.objects.get(pk=task.pk).last_revision, 2)
+
+    def test_prune_old_revisions(self):
+        task = Task.objects.create(title="Задача", author=self.user)
+        for progress in (10, 20, 30):
+            task.progress = progress
+            task.save()
+        cutoff = timezone.now() - timedelta(days=365)
+        TaskRevision.objects.filter(task_id=task.pk, revision__lte=2).update(
+            history_date=cutoff - timedelta(days=30)
+        )
+
+        self.assertEqual(prune_task_revisions(cutoff, batch_size=1), 2)
+        self.assertEqual(
+            list(TaskRevision.objects.filter(task_id=task.pk).values_list("revision", flat=True)),
+            [4, 3],
+        )
+
+    @override_settings(TASKS_HISTORY_CHECKPOINT_INTERVAL=3)
+    def test_history_diff_api(self):
+        task = Task.objects.create(title="Задача", author=self.user)
+        for progress in range(10, 80, 10):
+            task.progress = progress
+            task.save()
+        self.assertEqual(
+            list(task.history.values_list("history_revision", flat=True)), [6, 3, 1]
+        )
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f"/api/tasks/{task.pk}/history/"
+        data = client.get(url, {"page_size": 3}).json()
+        self.assertEqual([item["revision"] for item in data["results"]], [8, 7, 6])
+        self.assertEqual(
+            data["results"][0]["changes"], {"progress": {"old": 60, "new": 70}}
+        )
+
+        page = client.get(data["next"]).json()["results"]
+        self.assertEqual(page[-1]["changes"]["progress"], {"old": 10, "new": 20})
@@ -0,0 +1,52 @@
+from django.db import transaction
+
+
+class OnCommitQueue:
+    """
+    Очередь, накапливающая данные в рамках транзакции и выполняемая
+    один раз в transaction.on_commit.
+
+    Вне транзакции очередь выполняется сразу. После отката транзакции
+    Django отбрасывает её on_commit, и следующий вызов начинает новую очередь.
+
+    Подклассы задают connection_attribute и реализуют add() и flush().
+    """
+
+    connection_attribute = None
+
+    # Список on_commit соединения, в котором зарегистрирована очередь.
+    # Django заменяет этот список новым, когда выполняет или отбрасывает
+    # колбэки (фиксация, откат транзакции или точки сохранения)
+    hooks = None
+
+    def is_registered(self, connection):
+        """Ждёт ли очередь фиксации текущей транзакции"""
+        return self.hooks is not None and self.hooks is connection.run_on_commit
+
+    @classmethod
+    def enqueue(cls, *args, using=None, **kwargs):
+        """Добавляет данные в очередь текущей транзакции"""
+        connection = transaction.get_connection(using)
+        queue = getattr(connection, cls.connection_attribute, None)
+        registered = queue is not None and queue.is_registered(connection)
+        if not registered:
+            queue = cls()
+            setattr(connection, cls.connection_attribute, queue)
+
+        queue.add(*args, **kwargs)
+
+        if not registered:
+            if connection.in_atomic_block:
+                queue.hooks = connection.run_on_commit
+            transaction.on_commit(queue, using=using)
+
+    def add(self, *args, **kwargs):
+        """Добавление данных в очередь"""
+
+    def flush(self):
+        """Обработка накопленных данных"""
+        raise NotImplementedError
+
+    def __call__(self):
+        self.hooks = None
+        self.flush()
@@ -1,13 +1,21 @@
-from time import timezone
+from django.utils import timezone
 from warnings import filters
-from rest_framework import viewsets, permissions, status
+from rest_framework import generics, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
-from django.db.models import Count, Case, When, Q, F, ExpressionWrapper, IntegerField
+from django.db import transaction
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+import hashlib
 
 import json
 from django.db.models import Prefetch
@@ -16,6 +24,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 
 from tasks.models import (
+    ArchivedTask,
     TaskCategory,
     NotificationMethod,
     Location,
@@ -23,18 +32,194 @@ from tasks.models import (
     Task,
     TaskLink,
     FileAttachment,
+    GraphRevision,
+    GraphChange,
+    TaskRevision,
 )
+from tasks.models.task import has_categories, has_tags
 from tasks.serializers import (
     TaskCategorySerializer,
     NotificationMethodSerializer,
     LocationSerializer,
     LinkSerializer,
     TaskSerializer,
+    TaskValuesSerializer,
     TaskLinkSerializer,
     FileAttachmentSerializer,
+    TaskRevisionSerializer,
+)
+from tasks.archive import archived_representation, restore_archived_task
+from tasks.bulk import BULK_MAX_ITEMS, bulk_soft_delete
+from tasks.export import iter_tasks_ndjson
+from tasks.graph import check_cyclic_dependency
+from tasks.history import revision_diffs
+from tasks.pagination import (
+    TaskCursorPagination,
+    OverdueTaskCursorPagination,
+    TaskHistoryCursorPagination,
+    is_stream_requested,
+    stream_json_array,
+)
+from tasks.layout import compute_layout
+from tasks.search import (
+    TYPEAHEAD_LIMIT,
+    TYPEAHEAD_MAX_LIMIT,
+    TaskSearchFilter,
+    typeahead_tasks,
 )
 from django.shortcuts import render
 
+# Время хранения сериализованной задачи в кэше (сек.), переопределяется
+# settings.TASKS_DETAIL_CACHE_TIMEOUT. Ключ включает версию задачи,
+# поэтому устаревшие записи не читаются и вытесняются по времени
+DETAIL_CACHE_TIMEOUT = 60 * 60
+
+# Срок действия ETag списка задач (сек.), переопределяется
+# settings.TASKS_LIST_ETAG_SECONDS: просроченность (is_overdue) меняется
+# с наступлением дедлайна без записи в БД и без новой ревизии
+LIST_ETAG_SECONDS = 60
+
+
+def task_revision_etag(request, *args, **kwargs):
+    """
+    ETag ответов по задачам: текущая ревизия графа плюс адрес запроса
+    и формат ответа. Вычисляется без обращения к таблицам задач.
+    """
+    revision, _ = GraphRevision.objects.current()
+    variant = hashlib.sha1(
+        f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}".encode()
+    ).hexdigest()[:12]
+    return f"{revision}-{variant}"
+
+
+def task_list_etag(request, *args, **kwargs):
+    """
+    ETag списка задач: ревизия графа и номер интервала времени длиной
+    TASKS_LIST_ETAG_SECONDS - ответ с is_overdue устаревает не позже
+    чем через интервал после наступления дедлайна.
+    """
+    seconds = getattr(settings, 'TASKS_LIST_ETAG_SECONDS', LIST_ETAG_SECONDS)
+    bucket = int(timezone.now().timestamp() // seconds)
+    return f"{task_revision_etag(request)}-{bucket}"
+
+
+revision_conditional = method_decorator(condition(etag_func=task_revision_etag))
+list_conditional = method_decorator(condition(etag_func=task_list_etag))
+
+
+def task_detail_variant(request):
+    """
+    Вариант представления задачи: формат ответа и выбор полей.
+    Остальные параметры запроса на представление не влияют.
+    """
+    params = request.query_params
+    return hashlib.sha1(
+        f"{request.accepted_media_type}|{params.get('fields', '')}|{params.get('expand', '')}".encode()
+    ).hexdigest()[:12]
+
+
+def task_detail_state(request, pk):
+    """
+    Версия задачи и момент последнего изменения её представления -
+    одна выборка по первичному ключу, запоминается на время запроса.
+
+    Просроченность (is_overdue) меняется с наступлением дедлайна без
+    сохранения задачи, поэтому у просроченной задачи момент изменения
+    не раньше дедлайна.
+
+    Returns:
+        dict: version, is_overdue, last_modified (None - задачи нет)
+    """
+    cached = getattr(request, '_task_detail_state', None)
+    if cached is not None and cached[0] == pk:
+        return cached[1]
+
+    state = None
+    row = Task.objects.filter(pk=pk).values(
+        'version', 'updated_at', 'deadline', 'status'
+    ).first() if str(pk).isdigit() else None
+    if row:
+        is_overdue = Task(deadline=row['deadline'], status=row['status']).is_overdue
+        state = {
+            'version': row['version'],
+            'is_overdue': is_overdue,
+            'last_modified': (
+                max(row['updated_at'], row['deadline']) if is_overdue else row['updated_at']
+            ),
+        }
+    request._task_detail_state = (pk, state)
+    return state
+
+
+def task_detail_etag(request, pk, *args, **kwargs):
+    """ETag задачи: версия, время изменения (updated_at) и вариант ответа"""
+    state = task_detail_state(request, pk)
+    if state is None:
+        return None
+    modified = int(state['last_modified'].timestamp() * 1_000_000)
+    return f"{pk}-{state['version']}-{modified}-{task_detail_variant(request)}"
+
+
+def task_detail_last_modified(request, pk, *args, **kwargs):
+    """
+    Last-Modified задачи по updated_at (с учётом наступления дедлайна).
+
+    Производные изменения (счётчики зависимостей, названия категорий)
+    updated_at не меняют - их отражает ETag по версии задачи.
+    """
+    state = task_detail_state(request, pk)
+    return state['last_modified'] if state else None
+
+
+detail_conditional = method_decorator(condition(
+    etag_func=task_detail_etag,
+    last_modified_func=task_detail_last_modified,
+))
+
+
+def graph_nodes(task_ids):
+    """
+    Узлы графа параллельными массивами (один запрос values_list).
+
+    Args:
+        task_ids: Подзапрос с id задач
+    """
+    nodes = {
+        "id": [],
+        "title": [],
+        "status": [],
+        "progress_dependencies": [],
+        "deadline": [],
+        "category_names": [],
+    }
+    # Строки задачи идут подряд: по одной на каждую категорию.
+    # Отбор через id, чтобы фильтр по категориям не сужал их список
+    rows = Task.objects.filter(id__in=task_ids).order_by('id').values_list(
+        'id', 'title', 'status', 'progress_dependencies', 'deadline',
+        'categories__name'
+    )
+    for task_id, title, task_status, progress, deadline, category in rows:
+        if not nodes["id"] or nodes["id"][-1] != task_id:
+            nodes["id"].append(task_id)
+            nodes["title"].append(title)
+            nodes["status"].append(task_status)
+            nodes["progress_dependencies"].append(progress)
+            nodes["deadline"].append(deadline)
+            nodes["category_names"].append([])
+        if category is not None:
+            nodes["category_names"][-1].append(category)
+    return nodes
+
+
+def graph_edges(rows):
+    """Рёбра (зависимость, задача) параллельными массивами source/target"""
+    sources, targets = [], []
+    for source, target in rows:
+        sources.append(source)
+        targets.append(target)
+    return {"source": sources, "target": targets}
+
+
 class BaseViewSet(viewsets.ModelViewSet):
     """Базовый класс для ViewSet с общей конфигурацией"""
 
@@ -112,9 +297,8 @@ class FileAttachmentViewSet(BaseViewSet):
 class TaskViewSet(BaseViewSet):
     """ViewSet для управления задачами с расширенной функциональностью"""
     serializer_class = TaskSerializer
-    queryset = Task.objects.filter(is_deleted=False)  # Базовый queryset
+    queryset = Task.objects.all()  # Базовый queryset (без удалённых)
     
-    search_fields = ['title', 'description', 'assignee__username']
     ordering_fields = [
         'created_at', 'updated_at', 'deadline',
         'priority', 'progress', 'complexity'
@@ -126,8 +310,10 @@ class TaskViewSet(BaseViewSet):
     ]
     
 
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter, DjangoFilterBackend]
-    
+    # Поиск по названию, описанию и исполнителю - см. tasks.search
+    filter_backends = [TaskSearchFilter, filters.OrderingFilter, DjangoFilterBackend]
+    pagination_class = TaskCursorPagination
+
     @action(detail=False, methods=['get'])
     def categories(self, request):
         """Получение списка категорий с количеством задач"""
@@ -139,60 +325,300 @@ class TaskViewSet(BaseViewSet):
     def get_queryset(self):
         """
         Возвращает оптимизированный запрос для задач с:
-        - Аннотацией зависимостей
-        - Фильтрацией по категориям
-        - Оптимизацией связанных данных
+        - Фильтрацией по категориям и тегам
+        - select_related/Prefetch только для выводимых полей
+
+        Количество зависимостей хранится в счётчиках задачи,
+        поэтому группировка по таблице зависимостей не нужна.
+        """
+        if self.action == 'restore':
+            # Восстанавливать можно только удалённые задачи
+            return Task.all_objects.all()
+        queryset = self.filter_by_relations(super().get_queryset())
+        return self.plan_queryset(queryset, set(self.get_serializer().fields))
+
+    @staticmethod
+    def plan_queryset(queryset, field_names):
         """
+        Добавляет к запросу связанные данные, нужные полям field_names.
 
-        queryset = super().get_queryset()
-        
+        Args:
+            queryset (QuerySet): Выборка задач
+            field_names (set): Имена выводимых полей TaskSerializer
+        """
+        select_related = {
+            'author': 'author',
+            'last_editor': 'last_editor',
+        }
+        prefetches = {
+            'dependencies': lambda: Prefetch(
+                'dependencies', queryset=Task.all_objects.only('id', 'title', 'status')
+            ),
+            'categories': lambda: Prefetch(
+                'categories', queryset=TaskCategory.objects.only('id', 'name')
+            ),
+            'notifications': lambda: 'notifications',
+            'tags': lambda: 'tags',
+            'links': lambda: 'task_links',
+            'attachments': lambda: 'attachments',
+            'outgoing_dependencies': lambda: Prefetch(
+                'dependent_tasks', queryset=Task.all_objects.only('id')
+            ),
+        }
+        # category_names читает те же категории
+        if 'category_names' in field_names:
+            field_names = field_names | {'categories'}
+
+        related = [select_related[name] for name in select_related if name in field_names]
+        if related:
+            queryset = queryset.select_related(*related)
 
+        lookups = [prefetches[name]() for name in prefetches if name in field_names]
+        if lookups:
+            queryset = queryset.prefetch_related(*lookups)
+        return queryset
+
+    def filter_by_relations(self, queryset):
+        """
+        Фильтрация по категориям и тегам из параметров запроса.
+
+        - categories: id через запятую, задача в любой из категорий
+          (categories_match=all - во всех)
+        - include_no_category=true: плюс (ИЛИ) задачи без категорий
+        - exclude_categories: задача не входит ни в одну из категорий
+        - tags: названия через запятую, у задачи любой из тегов
+          (tags_match=all - все)
+        - exclude_tags: у задачи нет ни одного из тегов
+
+        Группы условий объединяются через И. Каждое условие - EXISTS,
+        поэтому выборка не размножается JOIN-ами и не требует DISTINCT.
+        """
         params = self.request.query_params
-        category_ids = params.get('categories')
-        include_no_category = params.get('include_no_category') == 'true'
-        tag_list = params.get('tags')
-        
+
+        def id_list(name):
+            return [int(id) for id in params.get(name, '').split(',') if id.isdigit()]
+
+        def name_list(name):
+            return [tag.strip() for tag in params.get(name, '').split(',') if tag.strip()]
+
+        condition = Q()
+        category_ids = id_list('categories')
         if category_ids:
-            category_ids = [int(id) for id in category_ids.split(',') if id.isdigit()]
-            if category_ids:
-                queryset = queryset.filter(categories__id__in=category_ids).distinct()
-        
-        if include_no_category:
-            no_category_qs = Task.objects.filter(is_deleted=False, categories__isnull=True)
-            queryset = queryset | no_category_qs if category_ids else no_category_qs
-        
-        if tag_list:
-            tags = [tag.strip() for tag in tag_list.split(',') if tag.strip()]
-            if tags:
-                queryset = queryset.filter(tags__name__in=tags).distinct()
-        
-        queryset = queryset.select_related(
-            'author', 'last_editor', 'assignee', 'location'
-        ).prefetch_related(
-            Prefetch('dependencies', queryset=Task.objects.only('id', 'title', 'status')),
-            Prefetch('categories', queryset=TaskCategory.objects.only('id', 'name')),
-            'notifications',
-            'tags',
-            Prefetch('links', queryset=Link.objects.only('id', 'url')),
-            Prefetch('attachments', queryset=FileAttachment.objects.only('id', 'file'))
+            condition = has_categories(
+                category_ids, match_all=params.get('categories_match') == 'all'
+            )
+        if params.get('include_no_category') == 'true':
+            condition |= ~has_categories()
+
+        excluded_category_ids = id_list('exclude_categories')
+        if excluded_category_ids:
+            condition &= ~has_categories(excluded_category_ids)
+
+        tags = name_list('tags')
+        if tags:
+            condition &= has_tags(tags, match_all=params.get('tags_match') == 'all')
+
+        excluded_tags = name_list('exclude_tags')
+        if excluded_tags:
+            condition &= ~has_tags(excluded_tags)
+
+        return queryset.filter(condition)
+
+    def paginated_response(self, queryset, serialize=None):
+        """
+        Ответ со списком: курсорная страница или, при ?stream=true,
+        потоковый JSON-массив всей выборки в порядке пагинатора.
+
+        По умолчанию задачи читаются через values() и TaskValuesSerializer
+        без создания экземпляров модели.
+        """
+        ordering = self.paginator.get_ordering(self.request, queryset, self)
+        if serialize is None:
+            values_serializer = TaskValuesSerializer(self.get_serializer())
+            queryset = values_serializer.get_values_queryset(queryset, ordering)
+            serialize = values_serializer.serialize
+
+        if is_stream_requested(self.request):
+            return stream_json_array(queryset.order_by(*ordering), serialize)
+
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(serialize(page))
+
+    @list_conditional
+    def list(self, request, *args, **kwargs):
+        """
+        Список задач с поддержкой ETag/If-None-Match.
+
+        Постраничный вывод курсором по (created_at, id), размер страницы
+        задаётся page_size в пределах max_page_size. ?stream=true отдаёт
+        весь список потоком.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.paginated_response(queryset)
+
+    @detail_conditional
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Задача с поддержкой ETag/If-None-Match и Last-Modified/If-Modified-Since.
+
+        JSON-ответ кэшируется байтами по id, версии задачи и варианту
+        запроса (формат, ?fields=, ?expand=): пока задача не изменилась,
+        повторные запросы не читают связанные таблицы и не сериализуют.
+        """
+        pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        state = task_detail_state(request, pk)
+        if state is None:
+            # Задачи нет в основной таблице - читаем из архива
+            archived = self.get_archived(is_deleted=False)
+            return Response(archived_representation(archived, self.get_serializer()))
+        if request.accepted_renderer.format != 'json':
+            return super().retrieve(request, *args, **kwargs)
+
+        content_type = request.accepted_media_type
+        if request.accepted_renderer.charset:
+            content_type = f"{content_type}; charset={request.accepted_renderer.charset}"
+        return HttpResponse(self.get_detail_body(pk, state), content_type=content_type)
+
+    def get_archived(self, **filters):
+        """
+        Архивная задача с pk из адреса запроса - для задач, перенесённых
+        из основной таблицы командой archive_tasks.
+
+        Raises:
+            Http404: Задачи нет и в архиве
+        """
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return generics.get_object_or_404(ArchivedTask.objects.all(), pk=pk, **filters)
+
+    def get_detail_body(self, pk, state):
+        """
+        Сериализованная задача в байтах текущего рендерера: из кэша
+        или, при промахе, сериализация с записью в кэш.
+
+        Args:
+            pk (str): id задачи
+            state (dict): Результат task_detail_state
+        """
+        key = "tasks:detail:{}:{}:{}:{}".format(
+            pk, state['version'], int(state['is_overdue']), task_detail_variant(self.request)
         )
-        
-        return queryset.annotate(
-            total_dependencies=Count('dependencies', distinct=True),
-            completed_dependencies=Count(
-                'dependencies',
-                distinct=True,
-                filter=Q(dependencies__status__in=['done', 'canceled'])
-            ),
-            dep_progress=Case(
-                When(total_dependencies=0, then=100),
-                default=ExpressionWrapper(
-                    F('completed_dependencies') * 100 / F('total_dependencies'),
-                    output_field=IntegerField()
-                ),
-                output_field=IntegerField()
+        body = cache.get(key)
+        if body is None:
+            serializer = self.get_serializer(self.get_object())
+            body = self.request.accepted_renderer.render(
+                serializer.data,
+                self.request.accepted_media_type,
+                self.get_renderer_context(),
             )
-        ).distinct()
+            cache.set(key, body, getattr(
+                settings, 'TASKS_DETAIL_CACHE_TIMEOUT', DETAIL_CACHE_TIMEOUT
+            ))
+        return body
+
+    @classmethod
+    def detail_json(cls, request, pk):
+        """
+        Полное JSON-представление задачи для страниц сайта - через тот же
+        кэш, что и GET /api/tasks/{id}/.
+
+        Returns:
+            bytes: Тело ответа (None - задачи нет)
+        """
+        view = cls(
+            args=(), kwargs={'pk': str(pk)}, format_kwarg=None,
+            action_map={'get': 'retrieve'},
+        )
+        view.request = view.initialize_request(request)
+        renderer = next(r for r in view.get_renderers() if r.format == 'json')
+        view.request.accepted_renderer = renderer
+        view.request.accepted_media_type = renderer.media_type
+        state = task_detail_state(view.request, str(pk))
+        return view.get_detail_body(str(pk), state) if state else None
+
+    @action(detail=False, methods=['get'])
+    @revision_conditional
+    def graph(self, request):
+        """
+        Компактное представление графа задач для страницы graph.html.
+
+        Узлы и рёбра возвращаются параллельными массивами и строятся
+        двумя запросами values_list без сериализации объектов.
+        Поддерживает фильтры по категориям и тегам (см. filter_by_relations).
+        Координаты узлов (x, y) рассчитываются послойным макетом.
+        """
+        revision, _ = GraphRevision.objects.current()
+        task_ids = self.filter_by_relations(Task.objects.all()).values('id')
+
+        nodes = graph_nodes(task_ids)
+        edges = graph_edges(
+            Task.dependencies.through.objects.filter(
+                from_task_id__in=task_ids,
+                to_task_id__in=task_ids,
+            ).values_list('to_task_id', 'from_task_id')
+        )
+
+        # Координаты узлов вычисляются на сервере и кэшируются по компонентам
+        positions = compute_layout(
+            nodes["id"], list(zip(edges["source"], edges["target"]))
+        )
+        nodes["x"] = [positions[task_id][0] for task_id in nodes["id"]]
+        nodes["y"] = [positions[task_id][1] for task_id in nodes["id"]]
+
+        return Response({
+            "revision": revision,
+            "nodes": nodes,
+            "edges": edges,
+        })
+
+    @action(detail=False, methods=['get'], url_path='graph/changes')
+    @revision_conditional
+    def graph_changes(self, request):
+        """
+        Изменения графа с ревизии since (параметр запроса).
+
+        Возвращает актуальные данные изменённых видимых задач вместе со
+        всеми их входящими рёбрами (замещают прежние на клиенте) и id задач,
+        которые были удалены или перестали подходить под фильтры.
+        Если since больше текущей ревизии или изменения после since уже
+        удалены из журнала по сроку хранения, ответ содержит reset=True -
+        клиент должен загрузить граф заново.
+        """
+        since = request.query_params.get('since', '')
+        if not since.isdigit():
+            return Response(
+                {"error": "Требуется параметр since (номер ревизии)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        since = int(since)
+        revision, _ = GraphRevision.objects.current()
+
+        if since > revision or since < GraphRevision.objects.pruned():
+            return Response({"revision": revision, "reset": True})
+
+        changed_ids = set(
+            GraphChange.objects.filter(
+                revision__gt=since, revision__lte=revision
+            ).values_list('task_id', flat=True).distinct()
+        )
+        task_ids = self.filter_by_relations(
+            Task.objects.filter(id__in=changed_ids)
+        ).values('id')
+
+        nodes = graph_nodes(task_ids)
+        edges = graph_edges(
+            Task.dependencies.through.objects.filter(
+                from_task_id__in=task_ids,
+                to_task__is_deleted=False,
+            ).values_list('to_task_id', 'from_task_id')
+        )
+
+        return Response({
+            "revision": revision,
+            "reset": False,
+            "nodes": nodes,
+            "edges": edges,
+            "removed": sorted(changed_ids - set(nodes["id"])),
+        })
 
     def perform_create(self, serializer):
         """Автоматическое заполнение автора при создании задачи"""
@@ -210,9 +636,27 @@ class TaskViewSet(BaseViewSet):
 
     @action(detail=True, methods=["post"])
     def restore(self, request, pk=None):
-        """Восстановление мягко удаленной задачи"""
-        task = self.get_object()
-        
+        """
+        Восстановление мягко удаленной задачи. Задача из архива
+        возвращается в основную таблицу (и восстанавливается, если
+        была удалена).
+        """
+        try:
+            task = self.get_object()
+        except Http404:
+            try:
+                task = restore_archived_task(self.get_archived())
+            except DjangoValidationError as e:
+                return Response(
+                    {"error": e.messages[0]},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            task.restore()
+            return Response(
+                {"status": "task restored"},
+                status=status.HTTP_200_OK
+            )
+
         if not task.is_deleted:
             return Response(
                 {"error": "Задача не была удалена"},
@@ -238,7 +682,7 @@ class TaskViewSet(BaseViewSet):
             )
         
         try:
-            dependency = Task.objects.get(pk=dependency_id, is_deleted=False)
+            dependency = Task.objects.get(pk=dependency_id)
         except Task.DoesNotExist:
             return Response(
                 {"error": "Зависимость не найдена или удалена"},
@@ -277,7 +721,7 @@ class TaskViewSet(BaseViewSet):
             )
         
         try:
-            dependency = Task.objects.get(pk=dependency_id)
+            dependency = Task.all_objects.get(pk=dependency_id)
             task.dependencies.remove(dependency)
             return Response({"status": "dependency removed"})
         except Task.DoesNotExist:
@@ -286,21 +730,110 @@ class TaskViewSet(BaseViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-    @action(detail=False, methods=["get"])
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request):
+        """
+        Пакетные операции с задачами (до BULK_MAX_ITEMS за запрос).
+
+        - POST: список задач для создания
+        - PATCH: список частичных изменений, у каждого элемента обязателен id
+        - DELETE: {"ids": [...]} - мягкое удаление
+
+        Пакет проверяется и сохраняется целиком в одной транзакции.
+        Возвращает id созданных/изменённых/удалённых задач.
+        """
+        if request.method == "DELETE":
+            ids = request.data.get("ids") if isinstance(request.data, dict) else None
+            if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+                raise ValidationError({"ids": "Ожидается список id задач"})
+            if len(ids) > BULK_MAX_ITEMS:
+                raise ValidationError({"ids": f"Не более {BULK_MAX_ITEMS} задач за запрос"})
+            with transaction.atomic():
+                deleted = bulk_soft_delete(ids, user=request.user)
+            return Response({"ids": deleted})
+
+        if request.method == "POST":
+            serializer = self.get_serializer(
+                data=request.data, many=True, max_length=BULK_MAX_ITEMS
+            )
+            serializer.is_valid(raise_exception=True)
+            tasks = serializer.save()
+            return Response(
+                {"ids": [task.pk for task in tasks]},
+                status=status.HTTP_201_CREATED
+            )
+
+        if not isinstance(request.data, list):
+            raise ValidationError({"detail": "Ожидается список изменений задач"})
+        ids = [item.get("id") if isinstance(item, dict) else None for item in request.data]
+        if not all(isinstance(pk, int) for pk in ids):
+            raise ValidationError({"id": "У каждого элемента должен быть id задачи"})
+        if len(set(ids)) != len(ids):
+            raise ValidationError({"id": "Задача может встречаться в пакете один раз"})
+        tasks = Task.objects.in_bulk(ids)
+        missing = sorted(set(ids) - set(tasks))
+        if missing:
+            raise ValidationError({"id": f"Задачи не найдены: {missing}"})
+
+        serializer = self.get_serializer(
+            [tasks[pk] for pk in ids],
+            data=request.data,
+            many=True,
+            partial=True,
+            max_length=BULK_MAX_ITEMS,
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response({"ids": ids})
+
+    @action(detail=False, methods=["get"], permission_classes=[permissions.IsAuthenticated])
+    def export(self, request):
+        """
+        Потоковая выгрузка всех задач (включая удалённые и архивные) в NDJSON.
+
+        Задачи читаются серверным курсором пачками, ответ отдаётся
+        по мере формирования. Поддерживает ?fields= и ?expand=.
+        """
+        response = StreamingHttpResponse(
+            iter_tasks_ndjson(self.get_serializer()),
+            content_type="application/x-ndjson",
+        )
+        response["Content-Disposition"] = 'attachment; filename="tasks.ndjson"'
+        return response
+
+    @action(detail=False, methods=["get"], pagination_class=OverdueTaskCursorPagination)
     def overdue(self, request):
-        """Получение списка просроченных задач"""
+        """
+        Получение списка просроченных задач (курсор по deadline, id).
+
+        Без ETag: состав списка меняется с наступлением дедлайнов
+        без изменения ревизии графа.
+        """
         queryset = self.get_queryset().filter(
             deadline__lt=timezone.now(), 
             status__in=["waiting", "progress"]
-        ).order_by('deadline')
-        
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-            
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        )
+        return self.paginated_response(queryset)
+
+    @action(detail=False, methods=["get"])
+    def typeahead(self, request):
+        """
+        Подсказки по названию задачи для полей с автодополнением.
+
+        ?q= - начало (или часть) названия, ?limit= - количество подсказок
+        (не больше TYPEAHEAD_MAX_LIMIT), ?exclude= - id задач через запятую,
+        которые не нужно предлагать (например, редактируемая задача).
+        """
+        limit = request.query_params.get('limit', '')
+        limit = min(int(limit), TYPEAHEAD_MAX_LIMIT) if limit.isdigit() else TYPEAHEAD_LIMIT
+        exclude = [
+            int(id) for id in request.query_params.get('exclude', '').split(',')
+            if id.isdigit()
+        ]
+        queryset = Task.objects.exclude(pk__in=exclude)
+        return Response(
+            typeahead_tasks(queryset, request.query_params.get('q', ''), limit)
+        )
 
     @action(detail=True, methods=["post"])
     def change_status(self, request, pk=None):
@@ -395,33 +928,27 @@ class TaskViewSet(BaseViewSet):
         task.tags.remove(tag)
         return Response({"status": "Тег удален"})
 
-    @action(detail=True, methods=["get"])
+    @action(detail=True, methods=["get"], pagination_class=TaskHistoryCursorPagination)
     def history(self, request, pk=None):
-        """Получение истории изменений задачи"""
-        task = self.get_object()
-        history = task.history.all().order_by('-history_date')
-        
-        page = self.paginate_queryset(history)
-        if page is not None:
-            serializer = HistoricalTaskSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-            
-        serializer = HistoricalTaskSerializer(history, many=True)
-        return Response(serializer.data)
+        """
+        История изменений задачи: ревизии с изменёнными полями
+        ({"поле": {"old": ..., "new": ...}}), сначала последние.
+        Ревизии архивной задачи остаются в журнале.
+        """
+        try:
+            task_id = self.get_object().pk
+        except Http404:
+            task_id = self.get_archived(is_deleted=False).pk
+
+        def serialize(revisions):
+            revisions = list(revisions)
+            return TaskRevisionSerializer(
+                revisions, many=True, context={"diffs": revision_diffs(Task, revisions)}
+            ).data
+
+        return self.paginated_response(TaskRevision.objects.filter(task_id=task_id), serialize)
+
 
-def check_cyclic_dependency(task, dependency):
-    """Рекурсивная проверка циклических зависимостей"""
-    visited = set()
-    stack = [dependency]
-    
-    while stack:
-        current = stack.pop()
-        if current.id == task.id:
-            return True
-        if current.id not in visited:
-            visited.add(current.id)
-            stack.extend(current.dependencies.all())
-    return False
 @login_required
 def update_graph_settings(request):
     """
@@ -464,7 +991,13 @@ def task_form(request, pk=None):
     """Рендеринг формы задачи для фронтенда"""
     context = {}
     if pk:
-        context["task"] = get_object_or_404(Task, pk=pk, is_deleted=False)
+        context["task"] = get_object_or_404(Task.objects, pk=pk)
+        # Данные формы - закэшированное представление задачи из API
+        body = TaskViewSet.detail_json(request, pk)
+        if body is None:
+            # Задачу удалили после проверки выше
+            raise Http404("Задача не найдена")
+        context["task_data"] = json.loads(body)
     return render(request, "task_form.html", context)
 
 